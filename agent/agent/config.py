@@ -1,6 +1,6 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, List, Any
-import toml
 from datetime import datetime
 
 # Profile:
@@ -37,7 +37,9 @@ class ErrorMessages:
     # Actual values inserted
     json_parse: str = "CRITICAL: Failed to parse JSON response. Error: {error}"
     tool_not_found: str = "ERROR: Tool '{tool_name}' is not available."
+    invalid_arguments: str = "ERROR: Tool '{tool_name}' was called with invalid arguments. {error} Expected: {input_format}"
     execution_error: str = "ERROR: Tool '{tool_name}' failed during execution. Details: {error}"
+    format_retries_exhausted: str = "Sorry, I got a bit confused. Could you say that again?"
 
   
   
@@ -93,6 +95,8 @@ LISTS_FILE_PATH = "lists.json"
 
 def load_google_api_key(secrets_file: str = "secrets.toml") -> str:
     """Load the Google API key from the secrets.toml file."""
+    import toml
+
     try:
         with open(secrets_file, "r") as file:
             secrets = toml.load(file)
@@ -102,7 +106,34 @@ def load_google_api_key(secrets_file: str = "secrets.toml") -> str:
     except Exception as e:
         raise RuntimeError(f"Failed to load Google API key: {e}")
 
-GOOGLE_API_KEY = load_google_api_key()
+@lru_cache(maxsize=None)
+def get_google_api_key() -> str:
+    """Load the Google API key on first use, so importing the config does not need secrets.toml."""
+    return load_google_api_key()
+
+def __getattr__(name: str) -> Any:
+    # GOOGLE_API_KEY is resolved lazily (PEP 562)
+    if name == "GOOGLE_API_KEY":
+        return get_google_api_key()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 RESOURCES_PATH = "/home/user/buddies/resources/"
 ONNX_PATH = f"{RESOURCES_PATH}/en_US-lessac-medium.onnx"
-VOSK_MODEL_PATH = f"{RESOURCES_PATH}/model"
\ No newline at end of file
+VOSK_MODEL_PATH = f"{RESOURCES_PATH}/model"
+TTS_CACHE_PATH = f"{RESOURCES_PATH}/tts_cache"
+
+# Speech-to-text engine of the dictation: "vosk", "whisper", or "auto" to pick
+# Whisper when its measured real-time factor allows it
+STT_ENGINE = "vosk"
+WHISPER_MODEL = "base.en"
+WHISPER_MAX_RTF = 0.3
+
+# Latency tracing (--trace): rotating JSONL of the turn timelines, and the
+# Prometheus endpoint of the per-stage quantiles
+TRACES_PATH = f"{RESOURCES_PATH}/traces.jsonl"
+METRICS_PORT = 9464
+
+# Sampling profiler, toggled with SIGUSR1 or through the control socket;
+# profiles are written as folded stacks to PROFILES_PATH
+PROFILER_SOCKET = "/tmp/buddy-profiler.sock"
+PROFILES_PATH = RESOURCES_PATH
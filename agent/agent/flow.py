@@ -1,71 +1,238 @@
 import json
-from typing import Any, Dict, List
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 from agent.parser import AgentParser, Config
-from agent.config import GOOGLE_API_KEY, VOSK_MODEL_PATH
+from agent.config import VOSK_MODEL_PATH
 from agent.llm.gemini_client import GeminiClient, GeminiConfig
+from agent.llm.speculative import SpeculativeCall
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.barge_in import BargeInMonitor
 from agent.speech.stt import SpeechToText
+from agent.speech.stt_engine import STTEngine
 from agent.speech import tts
+from agent.speech.tts_service import PRIORITY_ALERT
+from agent.turns import TURN_ALERT, TURN_USER, Turn, TurnExecutor
+from agent.utils.tracing import TRACER
+
+logger = logging.getLogger("AgentFlow")
 
 class AgentFlow:
     """Main flow of the system encapsulated in a class."""
 
-    def __init__(self, parser: AgentParser, llm_client: GeminiClient):
+    def __init__(self, parser: AgentParser, llm_client: GeminiClient, speculative: bool = False,
+                 max_format_retries: int = 2, capture: Optional[AudioCaptureService] = None,
+                 barge_in: Optional[BargeInMonitor] = None, stt_engine: Optional[STTEngine] = None,
+                 turns: Optional[TurnExecutor] = None, stt: Optional[SpeechToText] = None):
         self.parser = parser
         self.llm_client = llm_client
+        self.max_format_retries = max_format_retries
         self.notes: List[str] = []
-        self.stt = SpeechToText(model_path=VOSK_MODEL_PATH)
+        # The notes are read by the speculation (on the speech-to-text thread)
+        # while the turns (on the executor thread) add and consume them
+        self._notes_lock = threading.RLock()
+        self.stt = stt or SpeechToText(model_path=VOSK_MODEL_PATH, capture=capture, engine=stt_engine)
         self.is_running: bool = False
+        # Every turn against the chat session runs on this executor, one at a time
+        self.turns = turns or TurnExecutor()
+
+        # Speculative mode: start the LLM request on a stable partial transcript
+        self.speculative = speculative
+        self._speculation: Optional[SpeculativeCall] = None
+        self._speculation_notes = 0
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculative-llm") if speculative else None
+
+        # Barge-in: the user can interrupt the spoken answer, the new utterance
+        # starts at _barge_in_position in the capture
+        self.barge_in = barge_in
+        self._barge_in_position: Optional[int] = None
 
     def add_note(self, note: str):
         """Add a special note to the list of notes."""
-        self.notes.append(note)
+        with self._notes_lock:
+            self.notes.append(note)
+
+    def main_flow(self, start_position: Optional[int] = None, capture: Optional[AudioCaptureService] = None):
+        """
+        Run a conversation until the LLM ends it.
 
-    def main_flow(self):
+        Args:
+            start_position: Capture position the first utterance starts at
+                (e.g. just before the wake word ended).
+            capture: Listen to this capture from now on (the room the wake
+                word was heard in), instead of the current one.
+        """
+        if capture is not None:
+            self.stt.capture = capture
+            if self.barge_in is not None:
+                self.barge_in.capture = capture
         self.is_running = True
         should_continue = True
 
-        while should_continue:
-            user_input = self.stt.listen_once()
-            print("----> Input:", user_input)
-            should_continue = self.basic_flow(user_input)
+        try:
+            with self.turns.conversation():
+                while should_continue:
+                    # The wake word started the first trace, the next utterances start their own
+                    TRACER.ensure_trace("turn")
+                    on_stable_partial = self._speculate if self.speculative else None
+                    with TRACER.span("stt"):
+                        user_input = self.stt.listen_once(on_stable_partial=on_stable_partial,
+                                                          start_position=start_position)
+                    start_position = None
+                    print("----> Input:", user_input)
+                    should_continue = self.turns.submit(
+                        TURN_USER, lambda turn: self._user_turn(turn, user_input)).result()
+                    TRACER.end_trace()
+                    if self._barge_in_position is not None:
+                        # The user interrupted the answer, listen to what they said
+                        start_position, self._barge_in_position = self._barge_in_position, None
+                        should_continue = True
+        finally:
+            TRACER.end_trace()
+            self.is_running = False
+
+    def _user_turn(self, turn: Turn, user_input: str) -> bool:
+        """Answer an utterance, mentioning the alerts folded into the turn."""
+        with self._notes_lock:
+            self.notes.extend(turn.notes)
+        with TRACER.span("agent_turn", speculated=False) as attributes:
+            llm_response = self._claim_speculation(user_input)
+            attributes["speculated"] = llm_response is not None
+            return self.basic_flow(user_input, llm_response=llm_response)
+
+    def _alert_turn(self, message: str) -> bool:
+        # A trace of its own, even when the alert was raised during a conversation
+        with TRACER.trace("alert"), TRACER.span("alert_turn"):
+            return self.basic_flow(f"system message: {message} Do it now.", priority=PRIORITY_ALERT)
+
+    def alert(self, message: str, key: Optional[str] = None) -> Turn:
+        """
+        Queue a spoken alert, without waiting for it.
 
-        self.is_running = False
-    
-    def basic_flow(self, user_input: str):
+        During a conversation the alert is mentioned in the next answer, or
+        spoken on its own after the executor's max_alert_delay.
+
+        Args:
+            message: What the user needs to be alerted about.
+            key: Alerts with the same key are delivered once.
+        """
+        return self.turns.submit(
+            TURN_ALERT,
+            lambda turn: self._alert_turn(message),
+            key=key, note=f"You need to alert the user: {message}")
+
+    def basic_flow(self, user_input: str, llm_response: Optional[str] = None, priority: Optional[int] = None):
+        format_retries = 0
         while True:
-            # Step 2: Add notes from the list
-            if self.notes:
-                notes_text = "\n".join(f"[NOTE]: {note}" for note in self.notes)
-                user_input += f"\n{notes_text}"
-                self.notes.clear()  # Clear notes after including them
+            if llm_response is None:
+                # Step 2: Add notes from the list
+                with self._notes_lock:
+                    user_input = self._compose_input(user_input)
+                    self.notes.clear()  # Clear notes after including them
 
-            # Step 3: Pass input to LLM
-            system_prompt = self.parser.get_system_prompt()
-            llm_response = self.llm_client.call(system_prompt, user_input)
+                # Step 3: Pass input to LLM
+                system_prompt = self.parser.get_system_prompt()
+                llm_response = self.llm_client.call(system_prompt, user_input)
 
             print("========\n", llm_response, "\n========")
             # Step 4: Parse and execute LLM output
             try:
                 thought, response, should_end, results = self.parser.parse_and_execute(llm_response)
             except Exception as e:
+                # Local repair already failed, ask the LLM again (within the retry budget)
+                format_retries += 1
+                if format_retries > self.max_format_retries:
+                    logger.error(f"Giving up after {self.max_format_retries} format retries: {e}")
+                    self.call_output_function(self.parser.config.get_error("format_retries_exhausted"), priority)
+                    return True
                 user_input = f"There was an error processing the previous response: {str(e)}. Please provide the same message exactly, in the correct format"
+                llm_response = None
                 continue
-            
+            llm_response = None
+
             # Step 5: Handle results
             if results:
                 user_input = "This is the tool usage report. Make sure that all tools were invoked properly, and after that respond to the user."
                 user_input += "\n" + json.dumps({"tool_results": results}, indent=2)
-                
+
                 print("********\n", user_input, "\n********")
             elif response:
                 # Call output function if no tools were invoked
-                self.call_output_function(response)
+                self.call_output_function(response, priority)
+                if self._barge_in_position is not None:
+                    return True
                 if should_end:
                     return False
                 return True
 
-    def call_output_function(self, output_text: str):
+    def _on_barge_in(self):
+        """Stop speaking and drop the work done for the abandoned answer."""
+        tts.stop()
+        if self._speculation is not None:
+            self._speculation.cancel()
+            self._speculation = None
+
+    def _compose_input(self, user_input: str) -> str:
+        """Append the pending notes to the user input (without clearing them)."""
+        with self._notes_lock:
+            if self.notes:
+                notes_text = "\n".join(f"[NOTE]: {note}" for note in self.notes)
+                user_input += f"\n{notes_text}"
+        return user_input
+
+    def _speculate(self, partial_text: str):
+        """Start a read-only LLM request for a partial transcript that stopped changing."""
+        with self._notes_lock:
+            user_input = self._compose_input(partial_text)
+            notes = len(self.notes)
+        if self._speculation is not None:
+            if self._speculation.matches(user_input):
+                return
+            self._speculation.cancel()
+
+        logger.debug(f"Speculating on partial transcript: {partial_text!r}")
+        self._speculation_notes = notes
+        self._speculation = SpeculativeCall(
+            self.llm_client, self.parser.get_system_prompt(), user_input, self._executor
+        )
+
+    def _claim_speculation(self, user_input: str) -> Optional[str]:
+        """
+        Return the speculative response if it was made for the final transcript.
+
+        Tools are only executed when the claimed response is parsed, so no side
+        effect happens for a discarded speculation.
+        """
+        speculation, self._speculation = self._speculation, None
+        if speculation is None:
+            return None
+
+        if not speculation.matches(self._compose_input(user_input)):
+            logger.info("Final transcript differs from the speculation, discarding it.")
+            speculation.cancel()
+            return None
+
+        try:
+            llm_response = speculation.commit()
+        except Exception as e:
+            logger.warning(f"Speculative request could not be used: {e}")
+            return None
+
+        logger.info("Using speculative LLM response.")
+        with self._notes_lock:
+            del self.notes[:self._speculation_notes]
+        return llm_response
+
+    def call_output_function(self, output_text: str, priority: Optional[int] = None):
         """Simulates calling an output function with the LLM's text."""
-        tts.talk(output_text)
+        if self.barge_in is None:
+            tts.talk(output_text, priority)
+        else:
+            with self.barge_in.watch(on_barge_in=self._on_barge_in):
+                tts.talk(output_text, priority)
+            # Outside a conversation (an alert) the wake word engine is listening anyway
+            if self.barge_in.triggered.is_set() and self.is_running:
+                self._barge_in_position = self.barge_in.position
+                self.add_note("The user interrupted your previous answer while it was being spoken.")
         print("Output:", output_text)
-
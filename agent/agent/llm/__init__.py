@@ -6,6 +6,7 @@ with external LLM services.
 
 from agent.llm.llm_client import LLMClient
 from agent.llm.mock_llm_client import MockLLMClient
+from agent.llm.replay_llm_client import ReplayLLMClient
 from agent.llm.gemini_client import GeminiClient
 
-__all__ = ["LLMClient", "MockLLMClient", "GeminiClient"]
+__all__ = ["LLMClient", "MockLLMClient", "ReplayLLMClient", "GeminiClient"]
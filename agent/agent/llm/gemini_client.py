@@ -3,12 +3,15 @@
 This module provides a client for communicating with Google's Gemini API.
 """
 
+import importlib
 import logging
-from typing import Any, Dict, Optional
-
-import google.generativeai as genai
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
 from agent.llm.llm_client import LLMClient
+from agent.utils.tracing import TRACER
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger("IO.GeminiClient")
@@ -46,46 +49,122 @@ class GeminiClient(LLMClient):
         if not self.config.api_key:
             raise ValueError("GeminiConfig.api_key is required.")
 
-        # Configure the global genai library
-        # Note: In a multi-client setup, you might need to handle this differently
-        genai.configure(api_key=self.config.api_key)
+        # The genai library is slow to import, it is loaded and configured on first use
+        self._genai = None
 
         logger.info(
             f"Initialized GeminiClient with model: {self.config.model_name}, "
             f"Chat Mode: {self.config.chat_mode}"
         )
 
+    @property
+    def genai(self) -> Any:
+        """The configured google.generativeai module."""
+        if self._genai is None:
+            self.warm_up()
+        return self._genai
+
+    def warm_up(self) -> None:
+        """
+        Import and configure the genai library.
+
+        Called on the first request, or ahead of time from a background thread.
+        """
+        genai = importlib.import_module("google.generativeai")
+        # Configure the global genai library
+        # Note: In a multi-client setup, you might need to handle this differently
+        genai.configure(api_key=self.config.api_key)
+        self._genai = genai
+
     def call(self, system_prompt: str, user_message: str) -> str:
         """
         Send a request to Gemini.
         """
         try:
-            # --- CHAT MODE (Stateful) ---
-            if self.config.chat_mode:
-                if self.chat_session is None:
-                    logger.debug("Starting new chat session with system prompt.")
+            with TRACER.span("llm_call", model=self.config.model_name):
+                # --- CHAT MODE (Stateful) ---
+                if self.config.chat_mode:
+                    if self.chat_session is None:
+                        logger.debug("Starting new chat session with system prompt.")
+                        model = self._create_model(system_prompt)
+                        self.chat_session = model.start_chat(history=[])
+
+                    response = self.chat_session.send_message(user_message, stream=True)
+
+                # --- STANDARD MODE (Stateless) ---
+                else:
+                    # Create a fresh model for every call
                     model = self._create_model(system_prompt)
-                    self.chat_session = model.start_chat(history=[])
-                
-                response = self.chat_session.send_message(user_message)
+                    response = model.generate_content(user_message, stream=True)
 
-            # --- STANDARD MODE (Stateless) ---
-            else:
-                # Create a fresh model for every call
-                model = self._create_model(system_prompt)
-                response = model.generate_content(user_message)
+                return self._collect(response)
+
+        except Exception as e:
+            logger.error(f"Error calling Gemini API: {e}")
+            raise
+
+    def call_readonly(self, system_prompt: str, user_message: str) -> Tuple[str, Callable[[], None]]:
+        """
+        Send a request to Gemini without touching the current chat session.
 
-            if not response.text:
-                raise RuntimeError("No response text received from Gemini.")
+        In chat mode the request is sent on a fork of the session history.
+        Committing replaces the session with the fork, unless the session was
+        advanced in the meantime.
+        """
+        if not self.config.chat_mode:
+            return self.call(system_prompt, user_message), lambda: None
 
-            return response.text
+        base_session = self.chat_session
+        # The session's history grows in place, the session object stays the same
+        base_length = len(base_session.history) if base_session is not None else 0
+        try:
+            if base_session is None:
+                fork = self._create_model(system_prompt).start_chat(history=[])
+            else:
+                fork = base_session.model.start_chat(history=list(base_session.history))
+
+            with TRACER.span("llm_speculative", model=self.config.model_name):
+                text = self._collect(fork.send_message(user_message, stream=True), first_token=False)
 
         except Exception as e:
-            logger.error(f"Error calling Gemini API: {e}")
+            logger.error(f"Error calling Gemini API (read-only): {e}")
             raise
 
-    def _create_model(self, system_instruction: str) -> genai.GenerativeModel:
+        def commit() -> None:
+            session = self.chat_session
+            if session is not base_session or (session is not None and len(session.history) != base_length):
+                raise RuntimeError("Chat session advanced since the request was made.")
+            self.chat_session = fork
+
+        return text, commit
+
+    @staticmethod
+    def _collect(response: Any, first_token: bool = True) -> str:
+        """
+        Read a streamed response to the end.
+
+        The response is streamed only to time its first token: the agent
+        parses the complete JSON. Iterating it to the end also commits the
+        turn to the chat history.
+        """
+        parts = []
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # A chunk without text (e.g. only the finish reason)
+                continue
+            if text and not parts and first_token:
+                TRACER.event("llm_first_token")
+            if text:
+                parts.append(text)
+        if not parts:
+            raise RuntimeError("No response text received from Gemini.")
+        return "".join(parts)
+
+    def _create_model(self, system_instruction: str) -> "genai.GenerativeModel":
         """Helper to create the model object based on current config."""
+        genai = self.genai
         generation_config = genai.types.GenerationConfig(
             temperature=self.config.temperature,
             max_output_tokens=self.config.max_output_tokens
@@ -110,8 +189,8 @@ class GeminiClient(LLMClient):
         )
         
         # Re-authenticate if key changed
-        if new_config.api_key != self.config.api_key:
-             genai.configure(api_key=new_config.api_key)
+        if new_config.api_key != self.config.api_key and self._genai is not None:
+             self._genai.configure(api_key=new_config.api_key)
 
         self.config = new_config
         
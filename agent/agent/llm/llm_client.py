@@ -5,7 +5,7 @@ implementations must follow.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
 
 class LLMClient(ABC):
@@ -49,6 +49,24 @@ class LLMClient(ABC):
             API errors, or other failures.
         """
         pass
+
+    def call_readonly(self, system_prompt: str, user_message: str) -> Tuple[str, Callable[[], None]]:
+        """
+        Send a request to the LLM without committing any client state.
+
+        Used for speculative requests that may be discarded. Stateful clients
+        (e.g. chat sessions) must not record the exchange until the returned
+        commit callback is called.
+
+        Args:
+            system_prompt: The system prompt for the request.
+            user_message: The user's message or query to process.
+
+        Returns:
+            A tuple of the raw response and a callback that commits the
+            exchange to the client state.
+        """
+        return self.call(system_prompt, user_message), lambda: None
     
     def configure(self, config: Dict[str, Any]) -> None:
         """
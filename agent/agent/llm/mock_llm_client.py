@@ -6,7 +6,7 @@ without making actual API calls.
 
 import json
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from agent.llm.llm_client import LLMClient
 
@@ -87,3 +87,19 @@ class MockLLMClient(LLMClient):
         logger.debug("Using default mock response")
         return json.dumps(default_response, indent=2)
 
+    def call_readonly(self, system_prompt: str, user_message: str) -> Tuple[str, Callable[[], None]]:
+        """
+        Return the next mock response without advancing the response cycle.
+
+        The cycle only advances when the returned commit callback is called.
+        """
+        index = self._response_index
+        response = self.call(system_prompt, user_message)
+        advanced = self._response_index
+        self._response_index = index
+
+        def commit() -> None:
+            self._response_index = advanced
+
+        return response, commit
+
@@ -0,0 +1,106 @@
+"""Replay implementation of LLMClient for benchmarks.
+
+This module provides a client that replays a script of responses with a
+configurable latency, so a conversation can be driven end to end with
+timings close to the real service and without network access.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agent.llm.llm_client import LLMClient
+from agent.utils.tracing import TRACER
+
+logger = logging.getLogger("IO.ReplayLLMClient")
+
+
+class ReplayLLMClient(LLMClient):
+    """
+    LLMClient that answers with scripted responses, in order, after a delay.
+
+    Unlike MockLLMClient it does not cycle: running out of responses is an
+    error, so a conversation that calls the LLM more often than scripted
+    fails instead of silently reusing answers.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Initialize the replay client.
+
+        Args:
+            config: Optional configuration dictionary. Can include:
+                   - "responses": List of responses, in call order
+                   - "latency": Seconds each call takes (default: 0)
+                   - "first_token_latency": Seconds until the first token,
+                     within the latency (default: the whole latency)
+        """
+        super().__init__(config)
+        self._responses: List[str] = list(self.config.get("responses", []))
+        self._index = 0
+        self._lock = threading.Lock()
+        # (system prompt, user message) of every call, speculative ones included
+        self.calls: List[Tuple[str, str]] = []
+
+    @classmethod
+    def from_file(cls, path: str, **config: Any) -> "ReplayLLMClient":
+        """
+        Load the responses from a JSONL recording, one {"response": ...} per line.
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            responses = [json.loads(line)["response"] for line in file if line.strip()]
+        return cls(dict(config, responses=responses))
+
+    @property
+    def remaining(self) -> int:
+        """Responses not replayed yet."""
+        return len(self._responses) - self._index
+
+    def _wait(self) -> None:
+        latency = self.config.get("latency", 0.0)
+        first_token = min(self.config.get("first_token_latency", latency), latency)
+        time.sleep(first_token)
+        TRACER.event("llm_first_token")
+        time.sleep(latency - first_token)
+
+    def _peek(self, system_prompt: str, user_message: str) -> Tuple[int, str]:
+        """The index of the next response and the response, read together."""
+        with self._lock:
+            self.calls.append((system_prompt, user_message))
+            if self._index >= len(self._responses):
+                raise RuntimeError(f"Replay exhausted after {len(self._responses)} responses.")
+            return self._index, self._responses[self._index]
+
+    def call(self, system_prompt: str, user_message: str) -> str:
+        """
+        Return the next scripted response after the configured latency.
+
+        Raises:
+            RuntimeError: When all the responses were replayed.
+        """
+        with TRACER.span("llm_call", model="replay"):
+            _, response = self._peek(system_prompt, user_message)
+            self._wait()
+            with self._lock:
+                self._index += 1
+        return response
+
+    def call_readonly(self, system_prompt: str, user_message: str) -> Tuple[str, Callable[[], None]]:
+        """
+        Return the next scripted response without consuming it.
+
+        The response is consumed when the returned commit callback is called.
+        """
+        with TRACER.span("llm_speculative", model="replay"):
+            index, response = self._peek(system_prompt, user_message)
+            self._wait()
+
+        def commit() -> None:
+            with self._lock:
+                if self._index != index:
+                    raise RuntimeError("Replay advanced since the request was made.")
+                self._index += 1
+
+        return response, commit
@@ -0,0 +1,74 @@
+"""Speculative LLM requests.
+
+A speculative request is started from a partial transcript, before the user
+has finished speaking. It is sent through `LLMClient.call_readonly`, so the
+client state (e.g. the chat history) is left untouched until the final
+transcript confirms the request and `commit` is called.
+"""
+
+import contextvars
+import logging
+from concurrent.futures import Executor
+from typing import Optional
+
+from agent.llm.llm_client import LLMClient
+
+logger = logging.getLogger("IO.Speculative")
+
+
+def normalize_transcript(text: str) -> str:
+    """Normalize a transcript for comparison (case and whitespace)."""
+    return " ".join(text.lower().split())
+
+
+class SpeculativeCall:
+    """
+    A cancellable, read-only LLM request running in the background.
+    """
+
+    def __init__(self, client: LLMClient, system_prompt: str, user_message: str,
+                 executor: Executor) -> None:
+        """
+        Start the request.
+
+        Args:
+            client: The LLM client to send the request with.
+            system_prompt: The system prompt for the request.
+            user_message: The full message (transcript and notes) being sent.
+            executor: Executor the blocking request runs on.
+        """
+        self.user_message = user_message
+        self.cancelled = False
+        # In the context of the caller, the request is part of its trace
+        self._future = executor.submit(contextvars.copy_context().run, client.call_readonly, system_prompt,
+                                       user_message)
+
+    def matches(self, user_message: str) -> bool:
+        """Whether this request was made for the given message."""
+        return normalize_transcript(self.user_message) == normalize_transcript(user_message)
+
+    def cancel(self) -> None:
+        """
+        Discard the request. A request that is already in flight cannot be
+        interrupted, its result is simply never committed.
+        """
+        self.cancelled = True
+        self._future.cancel()
+
+    def commit(self, timeout: Optional[float] = None) -> str:
+        """
+        Wait for the response and commit the client state it produced.
+
+        Returns:
+            The raw LLM response.
+
+        Raises:
+            RuntimeError: If the request was cancelled.
+            Any exception raised by the underlying request or commit.
+        """
+        if self.cancelled:
+            raise RuntimeError("Speculative request was cancelled.")
+        response, commit = self._future.result(timeout)
+        commit()
+        logger.debug("Speculative response committed.")
+        return response
@@ -1,10 +1,10 @@
-import json
 from dataclasses import asdict
 import logging
 from typing import Any, Dict, List
 from agent.utils import utils
-from agent.tools.tool_interface import Tool
-from agent.tools import AVAILABLE_TOOLS, TOOLS_CONFIG
+from agent.utils.tracing import TRACER
+from agent.tools.schema import ArgumentValidationError
+from agent.tools import TOOLS_CONFIG, LazyTool, ToolRegistry, build_registry
 from agent.config import LoggingConfig, ErrorMessages, ResponseTemplate
 
 # Configure Logging
@@ -19,6 +19,7 @@ logger = logging.getLogger("AgentSystem")
 class Config:
     def __init__(self):
         self._tools_config = TOOLS_CONFIG
+        self._tool_registry = build_registry()
         self._error_messages = ErrorMessages()
         self._response_template = ResponseTemplate
 
@@ -30,6 +31,10 @@ class Config:
     def tools_config(self) -> Dict[str, Any]:
         return self._tools_config
 
+    @property
+    def tool_registry(self) -> ToolRegistry:
+        return self._tool_registry
+
     @property
     def error_messages(self) -> Dict[str, str]:
         return asdict(self._error_messages)
@@ -44,12 +49,12 @@ class Config:
 class AgentParser:
     def __init__(self, config: Config):
         self.config = config
-        self.tools: Dict[str, Tool] = self._get_tools(config)
+        self.tools: Dict[str, LazyTool] = self._get_tools(config)
         self.tool_descriptions = self._build_descriptions()
 
     @staticmethod
     def _get_tools(config):
-        return {tool.NAME: tool(config.tools_config.get(tool.NAME, {})) for tool in AVAILABLE_TOOLS}
+        return config.tool_registry.create_tools(config.tools_config)
         
     
     def _build_descriptions(self) -> str:
@@ -73,7 +78,7 @@ class AgentParser:
         except ValueError:
             logger.error("Could not parse LLM response")
             logger.debug(f"Full response: {llm_response}")
-            return []
+            raise
 
         results = []
         if "thought" in data:
@@ -86,11 +91,26 @@ class AgentParser:
         for call in tool_calls:
             tool_name = call.get("tool_name")
             args_dict = call.get("arguments", {})
-            args_str = json.dumps(args_dict)
             if tool_name in self.tools:
+                tool = self.tools[tool_name]
+                try:
+                    arguments = tool.validator(args_dict)
+                except ArgumentValidationError as e:
+                    err_msg = self.config.get_error("invalid_arguments", tool_name=tool_name, error=str(e), input_format=tool.INPUT_FORMAT)
+                    results.append({"tool": tool_name, "status": "error", "output": err_msg})
+                    logger.error(err_msg)
+                    continue
+                except Exception as e:
+                    # The tool could not be loaded
+                    err_msg = self.config.get_error("execution_error", tool_name=tool_name, error=str(e))
+                    results.append({"tool": tool_name, "status": "error", "output": err_msg})
+                    logger.error(err_msg)
+                    continue
+
                 logger.info(f"Invoking tool: {tool_name}")
                 try:
-                    output = self.tools[tool_name].execute(args_str)
+                    with TRACER.span(f"tool:{tool_name}"):
+                        output = tool.execute(arguments)
                     results.append({"tool": tool_name, "status": "success", "output": output})
                     logger.info(f"Tool '{tool_name}' execution successful.")
                 except Exception as e:
@@ -0,0 +1,229 @@
+"""Persistent microphone capture with a shared ring buffer.
+
+A single long-lived thread reads the microphone and writes int16 frames into
+a preallocated ring buffer. Consumers (wake word, speech-to-text, VAD, level
+meters) each hold an `AudioReader` with their own position and get zero-copy
+NumPy views of the buffer. Since the audio is kept for a few seconds, a
+consumer can start reading from slightly in the past, e.g. speech-to-text
+starting a few hundred milliseconds before the wake word ended. The audio
+comes from an `AudioSource`, the microphone unless a file or synthetic source
+is given.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from agent.speech.audio_source import AudioSource, MicrophoneSource
+
+logger = logging.getLogger("Speech.Capture")
+
+
+class AudioRingBuffer:
+    """
+    Preallocated single-writer ring buffer of audio samples.
+
+    The storage is mirrored (every sample is written twice, `capacity` apart),
+    so any window of up to `capacity` samples is contiguous and can be
+    returned as a view without copying. Positions are absolute sample counts
+    since the start of the capture.
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16) -> None:
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+        self._write_position = 0
+        self._condition = threading.Condition()
+        # Set when the writer stopped, so blocked readers return
+        self.closed = False
+
+    @property
+    def write_position(self) -> int:
+        """Absolute position of the next sample to be written."""
+        return self._write_position
+
+    @property
+    def oldest_position(self) -> int:
+        """Absolute position of the oldest sample still in the buffer."""
+        return max(0, self._write_position - self.capacity)
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append samples, overwriting the oldest ones."""
+        if len(samples) > self.capacity:
+            self._write_position += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+
+        count = len(samples)
+        index = self._write_position % self.capacity
+        first = min(count, self.capacity - index)
+        for offset in (0, self.capacity):
+            self._data[offset + index:offset + index + first] = samples[:first]
+            if first < count:
+                self._data[offset:offset + count - first] = samples[first:]
+
+        with self._condition:
+            self._write_position += count
+            self._condition.notify_all()
+
+    def view(self, position: int, length: int) -> np.ndarray:
+        """
+        Return a read-only view of `length` samples starting at `position`.
+
+        The view is only valid until the writer laps it (after `capacity`
+        more samples), copy it to keep it longer.
+        """
+        if position < self.oldest_position or position + length > self._write_position:
+            raise IndexError(f"Samples [{position}, {position + length}) are not in the buffer")
+        index = position % self.capacity
+        view = self._data[index:index + length]
+        view.flags.writeable = False
+        return view
+
+    def wait_for(self, position: int, timeout: Optional[float] = None) -> bool:
+        """Block until the buffer holds samples up to `position` (False on timeout or close)."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._write_position >= position or self.closed, timeout)
+            return self._write_position >= position
+
+    def close(self) -> None:
+        """Mark the writer as stopped and wake up the blocked readers."""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def reopen(self) -> None:
+        self.closed = False
+
+
+class AudioReader:
+    """
+    A consumer's cursor into the capture ring buffer.
+    """
+
+    def __init__(self, capture: "AudioCaptureService", position: int) -> None:
+        self.capture = capture
+        self.position = position
+
+    def read(self, count: int, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Read the next `count` samples as a zero-copy view.
+
+        Blocks until they are captured. Returns None on timeout or when the
+        capture is stopped. A reader that fell behind by more than the buffer
+        size skips ahead to the oldest samples available.
+        """
+        ring = self.capture.ring
+        if not ring.wait_for(self.position + count, timeout):
+            return None
+
+        oldest = ring.oldest_position
+        if self.position < oldest:
+            logger.warning(f"Audio reader fell behind, skipping {oldest - self.position} samples")
+            self.position = oldest
+
+        samples = ring.view(self.position, count)
+        self.position += count
+        return samples
+
+    def available(self) -> int:
+        """Number of captured samples not read yet."""
+        return self.capture.ring.write_position - self.position
+
+    def seek(self, position: int) -> None:
+        self.position = max(position, self.capture.ring.oldest_position)
+
+
+class AudioCaptureService:
+    """
+    Long-lived capture thread feeding an `AudioRingBuffer`.
+    """
+
+    def __init__(self, device_index: Optional[int] = None, sample_rate: int = 16000,
+                 frames_per_buffer: int = 800, buffer_seconds: float = 10.0,
+                 source: Optional[AudioSource] = None, ring=None) -> None:
+        """
+        Args:
+            device_index: Optional microphone device index.
+            sample_rate: Capture sample rate (mono int16).
+            frames_per_buffer: Samples read from the device at a time.
+            buffer_seconds: How much audio history the ring buffer keeps.
+            source: Where the audio comes from, the microphone by default.
+                The buffer holds the whole of a finite source (a file), so
+                consumers can read it from the start however fast it is fed.
+            ring: Buffer to write into instead of a new `AudioRingBuffer`,
+                e.g. a `SharedRingBuffer` read by other processes.
+        """
+        self.device_index = device_index
+        self.sample_rate = sample_rate
+        self.frames_per_buffer = frames_per_buffer
+        self.source = source or MicrophoneSource(device_index, sample_rate, frames_per_buffer)
+        capacity = int(buffer_seconds * sample_rate)
+        if self.source.length is not None:
+            capacity = max(capacity, self.source.length)
+        self.ring = ring if ring is not None else AudioRingBuffer(capacity)
+        self.is_running = False
+        # Monotonic time of the last block read, a watchdog spots a stalled device with it
+        self.last_block_at = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    def start(self) -> "AudioCaptureService":
+        """Open the microphone and start capturing (idempotent)."""
+        if self._thread is None:
+            self.is_running = True
+            self.ring.reopen()
+            self._started.clear()
+            self._thread = threading.Thread(target=self._capture_loop, name="audio-capture", daemon=True)
+            self._thread.start()
+            self._started.wait()
+        return self
+
+    def stop(self) -> None:
+        self.is_running = False
+        self.ring.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def reader(self, seconds_back: float = 0.0, position: Optional[int] = None) -> AudioReader:
+        """
+        Create a reader.
+
+        Args:
+            seconds_back: Start this many seconds before the current position.
+            position: Absolute start position (overrides seconds_back).
+        """
+        self.start()
+        if position is None:
+            position = self.ring.write_position - self.seconds_to_samples(seconds_back)
+        return AudioReader(self, max(position, self.ring.oldest_position))
+
+    def seconds_to_samples(self, seconds: float) -> int:
+        return int(seconds * self.sample_rate)
+
+    def _capture_loop(self) -> None:
+        try:
+            self.source.open()
+            logger.info("Audio capture started.")
+            self.last_block_at = time.monotonic()
+            self._started.set()
+
+            while self.is_running:
+                samples = self.source.read(self.frames_per_buffer)
+                if samples is None:
+                    # End of a file or synthetic source
+                    break
+                self.ring.write(samples)
+                self.last_block_at = time.monotonic()
+
+        except Exception as e:
+            logger.error(f"Audio capture error: {e}")
+        finally:
+            self.is_running = False
+            self._started.set()
+            self.ring.close()
+            self.source.close()
+            logger.info("Audio capture stopped.")
@@ -0,0 +1,195 @@
+"""Audio sources of the capture service.
+
+`AudioCaptureService` reads its audio from an `AudioSource`: the microphone
+in production, or a WAV file, raw PCM file or synthetic signal to exercise
+the speech stack without hardware. File and synthetic sources are fed
+either as fast as possible (benchmarks) or paced at simulated real time.
+"""
+
+import logging
+import time
+import wave
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("Speech.AudioSource")
+
+
+class AudioSource(ABC):
+    """
+    A stream of mono int16 audio blocks.
+    """
+
+    sample_rate = 16000
+    # Total number of samples, None for endless sources (the microphone)
+    length: Optional[int] = None
+
+    def open(self) -> None:
+        """Start producing audio."""
+        pass
+
+    @abstractmethod
+    def read(self, count: int) -> Optional[np.ndarray]:
+        """
+        Read up to `count` samples, blocking as a device would.
+
+        Returns:
+            The samples, or None at the end of the stream.
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """
+    Live microphone input through PyAudio.
+    """
+
+    def __init__(self, device_index: Optional[int] = None, sample_rate: int = 16000,
+                 frames_per_buffer: int = 800) -> None:
+        self.device_index = device_index
+        self.sample_rate = sample_rate
+        self.frames_per_buffer = frames_per_buffer
+        self._audio = None
+        self._stream = None
+
+    def open(self) -> None:
+        import pyaudio
+
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16,
+                                        channels=1,
+                                        rate=self.sample_rate,
+                                        input=True,
+                                        frames_per_buffer=self.frames_per_buffer,
+                                        input_device_index=self.device_index)
+        self._stream.start_stream()
+
+    def read(self, count: int) -> Optional[np.ndarray]:
+        data = self._stream.read(count, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=np.int16)
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+
+class ArraySource(AudioSource):
+    """
+    Audio held in an array, fed as fast as possible or at real time.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int = 16000, realtime: bool = False) -> None:
+        """
+        Args:
+            samples: Mono int16 samples.
+            sample_rate: Their sample rate.
+            realtime: Pace the reads at the audio's own rate, like a microphone.
+        """
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self.length = len(samples)
+        self.position = 0
+        self._started_at = 0.0
+
+    def open(self) -> None:
+        self.position = 0
+        self._started_at = time.perf_counter()
+
+    def read(self, count: int) -> Optional[np.ndarray]:
+        if self.position >= self.length:
+            return None
+        block = self.samples[self.position:self.position + count]
+        self.position += len(block)
+        if self.realtime:
+            delay = self._started_at + self.position / self.sample_rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return block
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling, good enough for recognizer input."""
+    if from_rate == to_rate:
+        return samples
+    times = np.arange(int(len(samples) * to_rate / from_rate)) / to_rate
+    return np.interp(times, np.arange(len(samples)) / from_rate, samples).astype(np.int16)
+
+
+def read_wav(path: str, sample_rate: int = 16000) -> np.ndarray:
+    """Read a 16-bit PCM WAV file as mono int16 at `sample_rate`."""
+    with wave.open(path, "rb") as file:
+        if file.getsampwidth() != 2:
+            raise ValueError(f"'{path}' is not 16-bit PCM")
+        channels = file.getnchannels()
+        rate = file.getframerate()
+        samples = np.frombuffer(file.readframes(file.getnframes()), dtype="<i2")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return resample(samples, rate, sample_rate)
+
+
+class WavFileSource(ArraySource):
+    """A WAV file (16-bit PCM, converted to mono at `sample_rate`)."""
+
+    def __init__(self, path: str, sample_rate: int = 16000, realtime: bool = False) -> None:
+        self.path = path
+        super().__init__(read_wav(path, sample_rate), sample_rate, realtime)
+
+
+class RawPCMSource(ArraySource):
+    """A headerless little-endian int16 mono file, memory-mapped."""
+
+    def __init__(self, path: str, sample_rate: int = 16000, realtime: bool = False) -> None:
+        self.path = path
+        super().__init__(np.memmap(path, dtype="<i2", mode="r"), sample_rate, realtime)
+
+
+def synthetic_audio(segments: Sequence[Tuple[str, float]], sample_rate: int = 16000,
+                    seed: int = 0) -> np.ndarray:
+    """
+    Build a synthetic signal from segments.
+
+    Args:
+        segments: (kind, seconds) pairs. Kinds: "silence", "noise" (low
+            background hiss), "voice" (a loud, amplitude-modulated harmonic
+            tone that passes the VAD, but is not words).
+        sample_rate: Sample rate of the result.
+        seed: Seed of the noise.
+    """
+    random = np.random.default_rng(seed)
+    parts: List[np.ndarray] = []
+    for kind, seconds in segments:
+        count = int(seconds * sample_rate)
+        t = np.arange(count) / sample_rate
+        if kind == "silence":
+            part = np.zeros(count)
+        elif kind == "noise":
+            part = random.normal(0, 60, count)
+        elif kind == "voice":
+            envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+            part = envelope * sum(4000 / harmonic * np.sin(2 * np.pi * 140 * harmonic * t)
+                                  for harmonic in range(1, 6))
+        else:
+            raise ValueError(f"Unknown segment kind '{kind}'")
+        parts.append(part)
+    signal = np.concatenate(parts) if parts else np.zeros(0)
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+class SyntheticSource(ArraySource):
+    """A synthetic signal, see `synthetic_audio`."""
+
+    def __init__(self, segments: Sequence[Tuple[str, float]], sample_rate: int = 16000,
+                 realtime: bool = False, seed: int = 0) -> None:
+        super().__init__(synthetic_audio(segments, sample_rate, seed), sample_rate, realtime)
@@ -0,0 +1,145 @@
+"""Barge-in: listening while the agent talks.
+
+While a message is played, `BargeInMonitor` keeps reading the shared
+microphone capture. Speech (or, optionally, only the wake phrase) from the
+user stops the playback. The speaker's own echo is suppressed with a simple
+energy test against the played signal: the microphone has to be clearly
+louder than the echo the current playback level would produce, with the
+speaker-to-microphone coupling learned while the user is silent.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.playback import AudioPlayer
+from agent.speech.stt_engine import STTEngine, contains_phrase
+from agent.speech.vad import EnergyVAD, VADConfig
+
+logger = logging.getLogger("Speech.BargeIn")
+
+
+@dataclass
+class BargeInConfig:
+    """Tuning of the barge-in detector."""
+    chunk_ms: int = 40                 # Microphone audio analyzed at a time
+    trigger_chunks: int = 2            # Consecutive speech chunks that interrupt the playback
+    preroll_ms: int = 200              # Audio before the detected speech handed to speech-to-text
+    echo_coupling: float = 0.5         # Initial microphone RMS per played RMS
+    echo_margin: float = 2.0           # Speech is this many times louder than the expected echo
+    coupling_adaptation: float = 0.1   # EMA rate of the coupling on non-speech chunks
+    wake_phrase: Optional[str] = None  # Only interrupt on the wake phrase (needs a streaming engine)
+
+
+class BargeInMonitor:
+    """
+    Watches the microphone during playback and interrupts it when the user talks.
+    """
+
+    def __init__(self, capture: AudioCaptureService, player: AudioPlayer, config: Optional[BargeInConfig] = None,
+                 vad_config: Optional[VADConfig] = None, engine: Optional[STTEngine] = None) -> None:
+        """
+        Args:
+            capture: The shared microphone capture.
+            player: The player whose output is the echo reference.
+            config: Barge-in tuning.
+            vad_config: Tuning of the voice activity detector.
+            engine: Speech-to-text engine of the wake phrase mode, it needs
+                partial results.
+        """
+        self.capture = capture
+        self.player = player
+        self.config = config or BargeInConfig()
+        self.vad = EnergyVAD(capture.sample_rate, vad_config)
+        self.chunk = capture.seconds_to_samples(self.config.chunk_ms / 1000)
+        self.coupling = self.config.echo_coupling
+        self.engine = engine
+        if self.config.wake_phrase and (engine is None or not engine.streaming):
+            raise ValueError("The wake phrase mode of barge-in needs a streaming speech-to-text engine")
+
+        # Set by a detection: where the new utterance starts in the capture
+        self.triggered = threading.Event()
+        self.position: Optional[int] = None
+        self._active = False
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def watch(self, on_barge_in: Callable[[], None]) -> Iterator["BargeInMonitor"]:
+        """
+        Monitor the microphone for the duration of a `with` block.
+
+        Args:
+            on_barge_in: Called (from the monitor thread) on detection, it
+                should stop the playback and the pending work.
+        """
+        self.triggered.clear()
+        self.position = None
+        self._active = True
+        reader = self.capture.reader()
+        self._thread = threading.Thread(target=self._monitor, args=(reader, on_barge_in),
+                                        name="barge-in", daemon=True)
+        self._thread.start()
+        try:
+            yield self
+        finally:
+            self._active = False
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def is_user_speech(self, samples: np.ndarray) -> bool:
+        """Whether a chunk is speech louder than the echo of the playback."""
+        voiced = self.vad.speech_frames(samples)
+        rms = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+        reference = self.player.reference_level()
+        expected_echo = self.coupling * reference
+
+        speech = int(np.count_nonzero(voiced)) >= self.vad.config.min_speech_frames and \
+            rms > self.config.echo_margin * expected_echo
+        if not speech and reference > 0:
+            # Learn how much of the playback the microphone picks up
+            self.coupling += self.config.coupling_adaptation * (rms / reference - self.coupling)
+        return speech
+
+    def _monitor(self, reader, on_barge_in: Callable[[], None]) -> None:
+        config = self.config
+        stream = None
+        consecutive = 0
+        try:
+            if config.wake_phrase:
+                stream = self.engine.open_stream(grammar=[config.wake_phrase, "[unk]"])
+            while self._active:
+                samples = reader.read(self.chunk, timeout=0.2)
+                if samples is None:
+                    if self.capture.ring.closed:
+                        return
+                    continue
+
+                if not self.is_user_speech(samples):
+                    consecutive = 0
+                    continue
+                consecutive += 1
+
+                if stream is not None:
+                    text = stream.accept(samples)
+                    if not contains_phrase(stream.partial() if text is None else text, config.wake_phrase):
+                        continue
+                    # The command follows the wake phrase
+                    self.position = reader.position
+                elif consecutive >= config.trigger_chunks:
+                    preroll = self.capture.seconds_to_samples(config.preroll_ms / 1000)
+                    self.position = reader.position - consecutive * self.chunk - preroll
+                else:
+                    continue
+
+                logger.info("Barge-in detected, interrupting the playback.")
+                self.triggered.set()
+                on_barge_in()
+                return
+        finally:
+            if stream is not None:
+                stream.close()
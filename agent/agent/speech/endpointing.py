@@ -0,0 +1,171 @@
+"""End-of-utterance detection for speech-to-text.
+
+Instead of waiting a fixed silence after the last partial result, the
+`Endpointer` combines three cues on every chunk:
+
+- VAD energy: the chunk contains speech.
+- Partial-result stability: the transcript changed.
+- Sentence completeness: the transcript does not end on a word that needs a
+  continuation ("turn on the ...", "remind me to ...").
+
+The silence needed to end an utterance is derived from the pauses the user
+makes between words, tracked per utterance and as a per-user moving
+average. Short, complete commands end after about 300-500 ms, while hesitant
+speakers and unfinished sentences get more time.
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger("Speech.Endpointing")
+
+# Words a finished sentence rarely ends with
+TRAILING_WORDS = frozenset("""
+a an the and or but so because then that which who if when while to of for from with without about
+at in on into onto by my your his her our their its is are was were be been am will would can could
+should shall may might must do does did have has had um uh er erm like please
+""".split())
+
+
+@dataclass
+class EndpointerConfig:
+    """Tuning of the endpointer."""
+    min_silence: float = 0.3         # Never end an utterance on a shorter silence
+    max_silence: float = 2.0         # Always end it after this much silence
+    initial_pause: float = 0.25      # Typical pause between words of a new user
+    pause_margin: float = 1.5        # The end silence is this many typical pauses
+    min_pause: float = 0.15          # Shorter gaps are not pauses
+    incomplete_factor: float = 2.5   # Extra wait when the sentence looks unfinished
+    pause_adaptation: float = 0.1    # EMA rate of a user's typical pause
+
+
+@dataclass
+class EndpointRecord:
+    """One detected end of utterance."""
+    user: str
+    utterance_seconds: float  # From the start of listening to the end of speech
+    silence_seconds: float    # Silence waited before ending, the endpointing delay
+    threshold: float          # Silence threshold in effect
+    complete: bool            # Whether the transcript looked complete
+
+
+def looks_complete(transcript: str) -> bool:
+    """Whether a transcript looks like a finished sentence."""
+    words = transcript.lower().split()
+    return bool(words) and words[-1] not in TRAILING_WORDS
+
+
+class Endpointer:
+    """
+    Adaptive end-of-utterance detector, fed once per audio chunk.
+    """
+
+    def __init__(self, config: Optional[EndpointerConfig] = None, history: int = 200) -> None:
+        self.config = config or EndpointerConfig()
+        # Typical pause between words, per user
+        self.typical_pauses: Dict[str, float] = {}
+        self.records: Deque[EndpointRecord] = deque(maxlen=history)
+        self.start(0.0)
+
+    def start(self, now: float, user: str = "default", require_transcript: bool = True) -> None:
+        """
+        Start a new utterance.
+
+        Args:
+            now: Audio time of the start (seconds).
+            user: Whose typical pause to use and update.
+            require_transcript: Only end once there is text. Disable for
+                engines that only transcribe when the utterance ended.
+        """
+        self.user = user
+        self.require_transcript = require_transcript
+        self._started = now
+        self._last_activity = now
+        self._transcript = ""
+        self._heard = False
+        self._longest_pause = 0.0
+
+    @property
+    def typical_pause(self) -> float:
+        return self.typical_pauses.get(self.user, self.config.initial_pause)
+
+    def threshold(self, transcript: str) -> float:
+        """Silence needed to end the utterance with this transcript."""
+        config = self.config
+        pause = max(self.typical_pause, self._longest_pause)
+        threshold = config.pause_margin * pause
+        # Engines without partial results have no transcript yet, trust the pauses
+        if transcript and not looks_complete(transcript):
+            threshold *= config.incomplete_factor
+        return min(config.max_silence, max(config.min_silence, threshold))
+
+    def update(self, now: float, speech: bool, transcript: str) -> bool:
+        """
+        Feed the state after a chunk.
+
+        Args:
+            now: Audio time at the end of the chunk (seconds).
+            speech: Whether the VAD found speech in the chunk.
+            transcript: The transcript so far (final segments and partial).
+
+        Returns:
+            True when the utterance ended.
+        """
+        transcript = " ".join(transcript.split())
+        active = speech or transcript != self._transcript
+        self._transcript = transcript
+
+        if active:
+            if self._heard:
+                self._record_pause(now - self._last_activity)
+            self._heard = True
+            self._last_activity = now
+            return False
+
+        if not self._heard or (self.require_transcript and not transcript):
+            return False
+
+        silence = now - self._last_activity
+        threshold = self.threshold(transcript)
+        if silence < threshold:
+            return False
+
+        record = EndpointRecord(self.user, self._last_activity - self._started, silence, threshold,
+                                looks_complete(transcript))
+        self.records.append(record)
+        logger.debug(f"End of utterance after {silence:.2f}s of silence (threshold {threshold:.2f}s)")
+        return True
+
+    def _record_pause(self, gap: float) -> None:
+        # The gap includes the chunk the activity resumed in, pauses are approximate
+        if gap < self.config.min_pause or gap >= self.config.max_silence:
+            return
+        self._longest_pause = max(self._longest_pause, gap)
+        typical = self.typical_pause
+        self.typical_pauses[self.user] = typical + self.config.pause_adaptation * (gap - typical)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Endpointing statistics over the recent utterances.
+
+        Returns:
+            utterances, p50/p95 of the endpointing delay (silence waited),
+            mean threshold, share of complete-looking utterances, and the
+            typical pause of the current user.
+        """
+        delays = sorted(record.silence_seconds for record in self.records)
+        count = len(delays)
+
+        def percentile(fraction: float) -> float:
+            return delays[min(count - 1, int(fraction * count))] if count else 0.0
+
+        return {
+            "utterances": count,
+            "endpoint_delay_p50": percentile(0.5),
+            "endpoint_delay_p95": percentile(0.95),
+            "mean_threshold": sum(record.threshold for record in self.records) / count if count else 0.0,
+            "complete_ratio": sum(record.complete for record in self.records) / count if count else 0.0,
+            "typical_pause": self.typical_pause,
+        }
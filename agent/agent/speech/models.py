@@ -0,0 +1,131 @@
+"""Process-wide registry of Vosk models and recognizer pools.
+
+The wake-word engine and speech-to-text use the same acoustic model. The
+registry loads each model once and hands out recognizers from pools: a
+grammar-restricted pool for the wake phrase and a full one for dictation.
+Recognizers are reset and reused between utterances instead of rebuilt.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("Speech.Models")
+
+
+class RecognizerPool:
+    """
+    Pool of `KaldiRecognizer`s sharing one model and configuration.
+    """
+
+    def __init__(self, model: Any, sample_rate: int, grammar: Optional[Sequence[str]] = None,
+                 max_idle: int = 2) -> None:
+        """
+        Args:
+            model: The loaded Vosk model.
+            sample_rate: Sample rate of the audio fed to the recognizers.
+            grammar: Optional list of phrases restricting the vocabulary.
+            max_idle: Maximum number of idle recognizers kept for reuse.
+        """
+        self.model = model
+        self.sample_rate = sample_rate
+        self.grammar = json.dumps(list(grammar)) if grammar else None
+        self.max_idle = max_idle
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Any:
+        """Take an idle recognizer, or build a new one."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+
+        from vosk import KaldiRecognizer
+
+        if self.grammar:
+            return KaldiRecognizer(self.model, self.sample_rate, self.grammar)
+        return KaldiRecognizer(self.model, self.sample_rate)
+
+    def release(self, recognizer: Any) -> None:
+        """Reset a recognizer and return it to the pool."""
+        recognizer.Reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(recognizer)
+
+    def clear(self) -> None:
+        """Drop the idle recognizers."""
+        with self._lock:
+            self._idle.clear()
+
+    @contextmanager
+    def recognizer(self) -> Iterator[Any]:
+        """Borrow a recognizer for the duration of a `with` block."""
+        recognizer = self.acquire()
+        try:
+            yield recognizer
+        finally:
+            self.release(recognizer)
+
+
+class VoskModelRegistry:
+    """
+    Loads each Vosk model once and keeps the recognizer pools built on it.
+    """
+
+    def __init__(self) -> None:
+        self._models: Dict[str, Any] = {}
+        self._pools: Dict[Tuple[str, int, Optional[str]], RecognizerPool] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, model_path: str) -> Any:
+        """Return the model at `model_path`, loading it on first use."""
+        model_path = os.path.abspath(model_path)
+        with self._lock:
+            model = self._models.get(model_path)
+            if model is not None:
+                return model
+            path_lock = self._locks.setdefault(model_path, threading.Lock())
+
+        # Loading takes seconds, only callers of the same path wait for it
+        with path_lock:
+            model = self._models.get(model_path)
+            if model is None:
+                if not os.path.exists(model_path):
+                    raise FileNotFoundError(f"Model not found at '{model_path}'")
+                from vosk import Model
+
+                logger.info(f"Loading Vosk model from '{model_path}'...")
+                model = Model(model_path)
+                with self._lock:
+                    self._models[model_path] = model
+        return model
+
+    def pool(self, model_path: str, sample_rate: int, grammar: Optional[Sequence[str]] = None) -> RecognizerPool:
+        """Return the recognizer pool for a model, rate and grammar."""
+        model = self.get_model(model_path)
+        key = (os.path.abspath(model_path), sample_rate, json.dumps(list(grammar)) if grammar else None)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = RecognizerPool(model, sample_rate, grammar)
+        return pool
+
+    def is_loaded(self, model_path: str) -> bool:
+        return os.path.abspath(model_path) in self._models
+
+    def unload(self, model_path: str) -> None:
+        """Forget a model and its pools. Recognizers in use keep it alive until released."""
+        model_path = os.path.abspath(model_path)
+        with self._lock:
+            self._models.pop(model_path, None)
+            for key in [key for key in self._pools if key[0] == model_path]:
+                self._pools.pop(key).clear()
+
+
+# Shared by the wake-word engine and speech-to-text
+MODEL_REGISTRY = VoskModelRegistry()
@@ -0,0 +1,213 @@
+"""Streaming audio playback.
+
+`AudioPlayer` keeps one `sounddevice.OutputStream` open for the life of the
+process. Audio chunks are appended to a deque (append/popleft are atomic in
+CPython, so the producer and the audio callback never take a lock) and
+played as soon as they arrive, so speech starts with the first synthesized
+chunk instead of after the whole answer. `stop` cuts the speech short
+(barge-in): the queued chunks are tagged with the generation of their
+message, so only the interrupted messages are dropped, not a message queued
+right after. The recent output levels serve as the echo reference of the
+microphone.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger("Speech.Playback")
+
+
+class _EndOfStream:
+    """Queued after the last chunk of a `play` call, set once it is played."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+class AudioPlayer:
+    """
+    Long-lived output stream fed from a queue of int16 chunks.
+    """
+
+    def __init__(self, sample_rate: int = 24000, blocksize: int = 1024, device: Optional[int] = None) -> None:
+        """
+        Args:
+            sample_rate: Playback sample rate (mono int16).
+            blocksize: Samples per audio callback.
+            device: Optional output device index.
+        """
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.device = device
+        # (generation, chunk or end of a message)
+        self._queue: Deque[Tuple[int, Union[np.ndarray, _EndOfStream]]] = deque()
+        self._current: Optional[np.ndarray] = None
+        self._current_generation = 0
+        self._offset = 0
+        self._stream = None
+        self._lock = threading.Lock()
+        # Incremented by stop, play stops queueing chunks of an older generation
+        self._generation = 0
+        # Chunks of older generations than this are dropped (set by stop)
+        self._flush_generation = 0
+        # (monotonic time, RMS) of the recently played blocks
+        self.levels: Deque[Tuple[float, float]] = deque(maxlen=64)
+
+    def start(self) -> "AudioPlayer":
+        """Open the output stream (idempotent)."""
+        with self._lock:
+            if self._stream is None:
+                import sounddevice as sd
+
+                self._stream = sd.OutputStream(samplerate=self.sample_rate, channels=1, dtype="int16",
+                                               blocksize=self.blocksize, device=self.device,
+                                               callback=self._callback)
+                self._stream.start()
+                logger.info("Audio output stream started.")
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            if self._stream is not None:
+                self._stream.stop()
+                self._stream.close()
+                self._stream = None
+
+    def enqueue(self, samples: np.ndarray, generation: Optional[int] = None) -> None:
+        """
+        Queue a chunk for playback. The array is played in place, not copied.
+
+        Args:
+            samples: The chunk.
+            generation: Generation of its message (the current one by default),
+                a later `stop` drops it.
+        """
+        if len(samples):
+            self._queue.append((self._generation if generation is None else generation, samples))
+
+    def play(self, chunks: Iterable[np.ndarray], blocking: bool = True) -> threading.Event:
+        """
+        Play chunks as they are produced.
+
+        Each chunk is queued as soon as the iterable yields it, so a generator
+        of synthesized audio starts playing with its first chunk.
+
+        Returns:
+            An event set when the last chunk finished playing.
+        """
+        self.start()
+        generation = self._generation
+        for samples in chunks:
+            if self._generation != generation:
+                break
+            self.enqueue(samples, generation)
+        end = _EndOfStream()
+        self._queue.append((generation, end))
+        if blocking:
+            end.done.wait()
+        return end.done
+
+    def stop(self) -> None:
+        """
+        Drop the queued and playing audio (of the messages played so far,
+        not of those played after the call).
+
+        Takes effect at the next audio callback, and the pending `play` calls
+        return.
+        """
+        self._generation += 1
+        self._flush_generation = self._generation
+
+    def reference_level(self, window: float = 0.3) -> float:
+        """Loudest RMS played over the last `window` seconds (0 when silent)."""
+        since = time.monotonic() - window
+        return max((rms for played_at, rms in list(self.levels) if played_at >= since), default=0.0)
+
+    def _callback(self, outdata, frames, time_info, status) -> None:
+        out = outdata[:, 0]
+        filled = 0
+        flush_generation = self._flush_generation
+        if self._current is not None and self._current_generation < flush_generation:
+            self._current = None
+
+        while filled < frames:
+            if self._current is None:
+                try:
+                    generation, item = self._queue.popleft()
+                except IndexError:
+                    break
+                if isinstance(item, _EndOfStream):
+                    item.done.set()
+                    continue
+                if generation < flush_generation:
+                    # Interrupted message
+                    continue
+                self._current, self._current_generation, self._offset = item, generation, 0
+
+            count = min(frames - filled, len(self._current) - self._offset)
+            out[filled:filled + count] = self._current[self._offset:self._offset + count]
+            filled += count
+            self._offset += count
+            if self._offset >= len(self._current):
+                self._current = None
+
+        if filled < frames:
+            out[filled:] = 0
+        if filled:
+            played = out[:filled].astype(np.float32)
+            self.levels.append((time.monotonic(), float(np.sqrt(np.mean(played * played)))))
+
+
+class NullAudioSink(AudioPlayer):
+    """
+    `AudioPlayer` without an output device, for benchmarks and headless runs.
+
+    A thread drains the queue through the same callback as the sound card,
+    so `play`, `stop` and the echo reference behave as with a real stream.
+    """
+
+    def __init__(self, sample_rate: int = 24000, blocksize: int = 1024, speed: float = 1.0) -> None:
+        """
+        Args:
+            sample_rate: Playback sample rate (mono int16).
+            blocksize: Samples per callback.
+            speed: Playback speed relative to real time, 0 to drain as fast as possible.
+        """
+        super().__init__(sample_rate=sample_rate, blocksize=blocksize)
+        self.speed = speed
+        # Audio received by play, in seconds
+        self.audio_seconds = 0.0
+        self._closed = threading.Event()
+
+    def start(self) -> "NullAudioSink":
+        with self._lock:
+            if self._stream is None:
+                self._closed.clear()
+                self._stream = threading.Thread(target=self._drain, name="null-audio-sink", daemon=True)
+                self._stream.start()
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            self._closed.set()
+            stream.join()
+
+    def enqueue(self, samples: np.ndarray, generation: Optional[int] = None) -> None:
+        self.audio_seconds += len(samples) / self.sample_rate
+        super().enqueue(samples, generation)
+
+    def _drain(self) -> None:
+        block = np.zeros((self.blocksize, 1), dtype=np.int16)
+        period = self.blocksize / self.sample_rate
+        while not self._closed.is_set():
+            busy = bool(self._queue) or self._current is not None
+            self._callback(block, self.blocksize, None, None)
+            if not busy or self.speed:
+                self._closed.wait(period / self.speed if busy else 0.002)
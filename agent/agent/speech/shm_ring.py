@@ -0,0 +1,177 @@
+"""Shared-memory audio ring buffer.
+
+The cross-process version of `AudioRingBuffer`: one process writes audio
+into a `multiprocessing.shared_memory` segment, any number of processes
+read it by name without copying it through a pipe. The layout is a small
+header (write position, closed flag, time of the last write, capacity)
+followed by the mirrored sample storage, so any window is contiguous.
+
+Readers poll the write position instead of waiting on a condition, a few
+milliseconds of latency against a pipe round trip per audio block.
+`SharedCapture` exposes an attached ring with the interface of
+`AudioCaptureService`, so readers (barge-in, speech-to-text) work unchanged
+on audio captured by another process.
+"""
+
+import logging
+import time
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from agent.speech.audio_capture import AudioReader
+
+logger = logging.getLogger("Speech.SharedRing")
+
+_HEADER_BYTES = 32
+# Indices in the int64 header
+_WRITE_POSITION = 0
+_CLOSED = 1
+_CAPACITY = 3
+# Index of the last write time in the float64 view of the header
+_LAST_WRITE = 2
+
+
+class SharedRingBuffer:
+    """
+    Single-writer ring buffer of samples in shared memory.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool, dtype=np.int16) -> None:
+        self.memory = memory
+        self.owner = owner
+        self._header = np.ndarray((4,), dtype=np.int64, buffer=memory.buf[:_HEADER_BYTES])
+        self._times = np.ndarray((4,), dtype=np.float64, buffer=memory.buf[:_HEADER_BYTES])
+        self.capacity = int(self._header[_CAPACITY])
+        self._data = np.ndarray((2 * self.capacity,), dtype=dtype, buffer=memory.buf, offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, capacity: int, name: Optional[str] = None, dtype=np.int16) -> "SharedRingBuffer":
+        """Allocate a new ring. The creator unlinks it with `unlink`."""
+        size = _HEADER_BYTES + 2 * capacity * np.dtype(dtype).itemsize
+        memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((4,), dtype=np.int64, buffer=memory.buf[:_HEADER_BYTES])
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        del header
+        ring = cls(memory, owner=True, dtype=dtype)
+        ring._times[_LAST_WRITE] = time.monotonic()
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, dtype=np.int16) -> "SharedRingBuffer":
+        """Open a ring created by another process."""
+        return cls(shared_memory.SharedMemory(name=name), owner=False, dtype=dtype)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    @property
+    def write_position(self) -> int:
+        """Absolute position of the next sample to be written."""
+        return int(self._header[_WRITE_POSITION])
+
+    @property
+    def oldest_position(self) -> int:
+        """Absolute position of the oldest sample still in the buffer."""
+        return max(0, self.write_position - self.capacity)
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._header[_CLOSED])
+
+    @property
+    def last_write(self) -> float:
+        """Monotonic time of the last write (the clock is shared by the processes)."""
+        return float(self._times[_LAST_WRITE])
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append samples, overwriting the oldest ones."""
+        position = self.write_position
+        if len(samples) > self.capacity:
+            position += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+
+        count = len(samples)
+        index = position % self.capacity
+        first = min(count, self.capacity - index)
+        for offset in (0, self.capacity):
+            self._data[offset + index:offset + index + first] = samples[:first]
+            if first < count:
+                self._data[offset:offset + count - first] = samples[first:]
+        # Publish the samples after they are written
+        self._header[_WRITE_POSITION] = position + count
+        self._times[_LAST_WRITE] = time.monotonic()
+
+    def view(self, position: int, length: int) -> np.ndarray:
+        """
+        Return a read-only view of `length` samples starting at `position`.
+
+        The view is only valid until the writer laps it, copy it to keep it longer.
+        """
+        if position < self.oldest_position or position + length > self.write_position:
+            raise IndexError(f"Samples [{position}, {position + length}) are not in the buffer")
+        index = position % self.capacity
+        view = self._data[index:index + length]
+        view.flags.writeable = False
+        return view
+
+    def wait_for(self, position: int, timeout: Optional[float] = None, poll: float = 0.005) -> bool:
+        """Block until the buffer holds samples up to `position` (False on timeout or close)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.write_position < position:
+            if self.closed or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            time.sleep(poll)
+        return True
+
+    def close(self) -> None:
+        """Mark the writer as stopped, the readers return."""
+        self._header[_CLOSED] = 1
+
+    def reopen(self) -> None:
+        self._header[_CLOSED] = 0
+
+    def release(self) -> None:
+        """Unmap the segment in this process."""
+        # The views must go before the mapping can be closed
+        self._header = self._times = self._data = None
+        self.memory.close()
+
+    def unlink(self) -> None:
+        """Release and destroy the segment (creator only)."""
+        self.release()
+        if self.owner:
+            self.memory.unlink()
+
+
+class SharedCapture:
+    """
+    The reading side of an `AudioCaptureService` running in another process.
+    """
+
+    def __init__(self, ring: SharedRingBuffer, sample_rate: int = 16000) -> None:
+        self.ring = ring
+        self.sample_rate = sample_rate
+
+    @property
+    def last_block_at(self) -> float:
+        return self.ring.last_write
+
+    def start(self) -> "SharedCapture":
+        # The capturing process owns the device
+        return self
+
+    def stop(self) -> None:
+        pass
+
+    def reader(self, seconds_back: float = 0.0, position: Optional[int] = None) -> AudioReader:
+        """Create a reader, see `AudioCaptureService.reader`."""
+        if position is None:
+            position = self.ring.write_position - self.seconds_to_samples(seconds_back)
+        return AudioReader(self, max(position, self.ring.oldest_position))
+
+    def seconds_to_samples(self, seconds: float) -> int:
+        return int(seconds * self.sample_rate)
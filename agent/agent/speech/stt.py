@@ -1,74 +1,123 @@
 import os
-import json
-import time
-import pyaudio
-from vosk import Model, KaldiRecognizer
+from typing import Callable, Optional
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.endpointing import Endpointer, EndpointerConfig
+from agent.speech.stt_engine import STTEngine, VoskEngine
+from agent.speech.vad import EnergyVAD
+from agent.utils.tracing import TRACER
 
 class SpeechToText:
-    def __init__(self, model_path="model", device_index=None, silence_limit=2.0):
+    def __init__(self, model_path="model", device_index=None, silence_limit=2.0, stable_window=0.4,
+                 capture: Optional[AudioCaptureService] = None, engine: Optional[STTEngine] = None,
+                 endpointer: Optional[Endpointer] = None):
         self.model_path = model_path
         self.device_index = device_index
         self.silence_limit = silence_limit
+        self.stable_window = stable_window
         self.rate = 16000
-        self.chunk = 4000 
+        # Small chunks, the end of an utterance is decided every 100 ms
+        self.chunk = 1600
+        # silence_limit is the longest silence an utterance waits for
+        self.endpointer = endpointer or Endpointer(EndpointerConfig(max_silence=silence_limit))
+        # Shared, long-lived microphone capture
+        self.capture = capture or AudioCaptureService(device_index=device_index, sample_rate=self.rate)
 
-        if not os.path.exists(self.model_path):
-            raise FileNotFoundError(f"Model not found at '{self.model_path}'")
-        
-        print(f"Loading Vosk model (Silence Limit: {self.silence_limit}s)...")
-        self.model = Model(self.model_path)
-        self.recognizer = KaldiRecognizer(self.model, self.rate)
+        if engine is None:
+            if not os.path.exists(self.model_path):
+                raise FileNotFoundError(f"Model not found at '{self.model_path}'")
+            # The Vosk model is shared with the wake-word engine through the model registry
+            engine = VoskEngine(self.model_path, self.rate)
+        # The model is loaded on first use, or ahead of time with load_model()
+        self.engine = engine
+        self._loaded_engine = None
+        # Speech energy, one of the end-of-utterance cues
+        self.vad = EnergyVAD(self.rate)
+
+    def load_model(self):
+        """Load the speech-to-text model. Safe to call from a background thread at startup."""
+        engine = self.engine
+        if self._loaded_engine is not engine:
+            print(f"Loading {engine.name} model (Silence Limit: {self.silence_limit}s)...")
+            engine.load()
+            self._loaded_engine = engine
+        return engine
+
+    def unload_model(self):
+        """Free the model's memory until the next load_model (a shared Vosk model stays loaded)."""
+        if self._loaded_engine is not None:
+            self._loaded_engine.unload()
+            self._loaded_engine = None
 
-    def listen_once(self) -> str:
+    def listen_once(self, on_stable_partial: Optional[Callable[[str], None]] = None,
+                    start_position: Optional[int] = None, user: str = "default") -> str:
         """
         Listens for a single sentence. 
         Blocks execution until speech is detected and finished.
-        Returns the string and cleans up the audio stream immediately.
+        Returns the string. The microphone keeps capturing in the background.
+
+        Args:
+            on_stable_partial: Optional callback invoked with the transcript so far
+                whenever it has not changed for `stable_window` seconds. It is called
+                at most once per distinct transcript, from the listening thread.
+            start_position: Absolute capture position to start from, e.g. slightly
+                before the wake word ended. Defaults to the current position.
+            user: Whose pauses the end-of-utterance detection adapts to.
         """
-        p = pyaudio.PyAudio()
-        stream = p.open(format=pyaudio.paInt16,
-                        channels=1,
-                        rate=self.rate,
-                        input=True,
-                        frames_per_buffer=self.chunk,
-                        input_device_index=self.device_index)
+        self.load_model()
+        reader = self.capture.reader(position=start_position)
         
-        print(f"Listening... (Waiting for input + {self.silence_limit}s silence)")
-        stream.start_stream()
+        print(f"Listening... (Waiting for input + up to {self.silence_limit}s silence)")
 
+        # Time is measured on the audio clock, so a backlog is processed correctly
         text_buffer = []
-        last_speech_time = time.time()
+        start_time = reader.position / self.rate
+        self.endpointer.start(start_time, user, require_transcript=self.engine.streaming)
+        candidate = ""
+        candidate_since = start_time
+        reported = ""
         
-        try:
-            while True:
-                data = stream.read(self.chunk, exception_on_overflow=False)
-                current_time = time.time()
+        with self.engine.open_stream() as stream:
+            try:
+                while True:
+                    samples = reader.read(self.chunk)
+                    if samples is None:
+                        return " ".join(text_buffer)
+                    current_time = reader.position / self.rate
+                    partial = ""
 
-                # 1. Check for "Official" Sentence End
-                if self.recognizer.AcceptWaveform(data):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get('text', '')
-                    if text:
-                        text_buffer.append(text)
-                        last_speech_time = current_time
+                    # 1. Check for "Official" Sentence End
+                    text = stream.accept(samples)
+                    if text is not None:
+                        if text:
+                            text_buffer.append(text)
                 
-                # 2. Check for "Ongoing" Speech (Reset timer if user is mid-sentence)
-                else:
-                    partial = json.loads(self.recognizer.PartialResult())
-                    if partial.get('partial', ''):
-                        last_speech_time = current_time
+                    # 2. Check for "Ongoing" Speech
+                    else:
+                        partial = stream.partial()
+
+                    current = " ".join(" ".join(text_buffer + [partial]).split())
+                    if current:
+                        TRACER.event("first_partial")
+
+                    # 3. Report the transcript once it stopped changing (for speculative callers)
+                    if on_stable_partial is not None:
+                        if current != candidate:
+                            candidate, candidate_since = current, current_time
+                        elif candidate and candidate != reported and current_time - candidate_since >= self.stable_window:
+                            reported = candidate
+                            on_stable_partial(candidate)
 
-                # 3. Return Trigger
-                # Only return if we have captured text AND the silence limit has passed
-                if text_buffer and (current_time - last_speech_time > self.silence_limit):
-                    full_sentence = " ".join(text_buffer)
-                    return full_sentence  # <--- Returns string and exits loop
+                    # 4. Return Trigger
+                    # Speech energy, transcript changes and sentence completeness decide
+                    if self.endpointer.update(current_time, self.vad.is_speech(samples), current):
+                        TRACER.event("end_of_speech")
+                        # Finalize the last segment (whole-utterance engines transcribe everything now)
+                        text_buffer.append(stream.finish())
+                        full_sentence = " ".join(text for text in text_buffer if text)
+                        return full_sentence  # <--- Returns string and exits loop
                     
-        except KeyboardInterrupt:
-            return ""
-        finally:
-            # This block runs immediately after 'return'
-            print("Stopping listener...")
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
+            except KeyboardInterrupt:
+                return ""
+            finally:
+                # This block runs immediately after 'return'
+                print("Stopping listener...")
@@ -0,0 +1,345 @@
+"""Speech-to-text engines.
+
+`STTEngine` is the interface the wake-word engine, dictation and barge-in use
+to recognize audio from the shared capture. Each utterance is a
+`RecognitionStream` fed with int16 chunks. Two backends are provided:
+
+- `VoskEngine`: streaming recognition with partial results, recognizers from
+  the shared model registry. Supports restricted grammars (wake phrase).
+- `WhisperEngine`: faster-whisper with int8 CPU inference. The model is
+  loaded once and reused; the audio of an utterance is transcribed in one
+  batched call when it ends. More accurate, but only affordable where the
+  measured real-time factor allows it (see `select_engine`).
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agent.utils.counters import COUNTERS
+
+logger = logging.getLogger("Speech.STTEngine")
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+def contains_phrase(text: str, phrase: str) -> bool:
+    """Whether a transcript contains a phrase, ignoring case and punctuation."""
+    words = " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+    return f" {phrase.lower()} " in f" {words} "
+
+
+class RecognitionStream(ABC):
+    """
+    Recognition of one utterance, fed chunk by chunk.
+    """
+
+    @abstractmethod
+    def accept(self, samples: np.ndarray) -> Optional[str]:
+        """
+        Feed the next int16 chunk.
+
+        Returns:
+            The text of a segment the engine finalized with this chunk
+            (possibly empty), or None if no segment ended.
+        """
+        pass
+
+    @abstractmethod
+    def partial(self) -> str:
+        """The text of the current, unfinished segment (empty if the engine has none)."""
+        pass
+
+    @abstractmethod
+    def finish(self) -> str:
+        """Finalize the current segment and return its text. The stream can be fed again after."""
+        pass
+
+    def close(self) -> None:
+        """Release the resources of the stream."""
+        pass
+
+    def __enter__(self) -> "RecognitionStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class STTEngine(ABC):
+    """
+    Abstract base class for speech-to-text backends.
+    """
+
+    name = "stt"
+    sample_rate = 16000
+    # Whether partial results and segment ends are available while streaming.
+    # Callers detect the end of speech with a VAD otherwise.
+    streaming = True
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load (and warm up) the model. Safe to call from a background thread at startup."""
+        pass
+
+    def unload(self) -> None:
+        """Free the model's memory, load brings it back."""
+        pass
+
+    @abstractmethod
+    def open_stream(self, grammar: Optional[Sequence[str]] = None) -> RecognitionStream:
+        """
+        Start recognizing an utterance.
+
+        Args:
+            grammar: Optional phrases the result should be restricted to
+                (or biased toward, for engines without grammars).
+        """
+        pass
+
+    def transcribe(self, samples: np.ndarray, grammar: Optional[Sequence[str]] = None) -> str:
+        """Recognize a complete recording."""
+        with self.open_stream(grammar) as stream:
+            texts = []
+            for start in range(0, len(samples), self.sample_rate // 4):
+                text = stream.accept(samples[start:start + self.sample_rate // 4])
+                if text:
+                    texts.append(text)
+            texts.append(stream.finish())
+        return " ".join(text for text in texts if text)
+
+
+class _VoskStream(RecognitionStream):
+    def __init__(self, pool) -> None:
+        self.pool = pool
+        self.recognizer = pool.acquire()
+
+    def accept(self, samples: np.ndarray) -> Optional[str]:
+        # Vosk takes bytes (the length is read as a byte count)
+        COUNTERS.increment("stt.accept_waveform")
+        if self.recognizer.AcceptWaveform(samples.tobytes()):
+            return json.loads(self.recognizer.Result()).get("text", "")
+        return None
+
+    def partial(self) -> str:
+        return json.loads(self.recognizer.PartialResult()).get("partial", "")
+
+    def finish(self) -> str:
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        self.recognizer.Reset()
+        return text
+
+    def close(self) -> None:
+        if self.recognizer is not None:
+            self.pool.release(self.recognizer)
+            self.recognizer = None
+
+
+class VoskEngine(STTEngine):
+    """
+    Streaming Vosk recognition, sharing the models of `MODEL_REGISTRY`.
+    """
+
+    name = "vosk"
+
+    def __init__(self, model_path: str, sample_rate: int = 16000) -> None:
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+
+    def load(self) -> None:
+        from agent.speech.models import MODEL_REGISTRY
+
+        MODEL_REGISTRY.get_model(self.model_path)
+
+    def open_stream(self, grammar: Optional[Sequence[str]] = None) -> RecognitionStream:
+        from agent.speech.models import MODEL_REGISTRY
+
+        return _VoskStream(MODEL_REGISTRY.pool(self.model_path, self.sample_rate, grammar=grammar))
+
+
+# Loaded faster-whisper models, by (model, device, compute type, threads)
+_WHISPER_MODELS: Dict[Tuple[str, str, str, int], Any] = {}
+_WHISPER_LOCK = threading.Lock()
+
+
+class _WhisperStream(RecognitionStream):
+    def __init__(self, engine: "WhisperEngine", grammar: Optional[Sequence[str]]) -> None:
+        self.engine = engine
+        self.prompt = ", ".join(phrase for phrase in grammar or () if not phrase.startswith("[")) or None
+        # Grown by doubling, the audio is converted to float once per chunk
+        self._audio = np.zeros(engine.sample_rate * 10, dtype=np.float32)
+        self._length = 0
+        self._partial = ""
+        self._partial_length = 0
+
+    def accept(self, samples: np.ndarray) -> Optional[str]:
+        end = self._length + len(samples)
+        if end > len(self._audio):
+            grown = np.zeros(max(end, 2 * len(self._audio)), dtype=np.float32)
+            grown[:self._length] = self._audio[:self._length]
+            self._audio = grown
+        np.multiply(samples, 1 / 32768, out=self._audio[self._length:end], casting="unsafe")
+        self._length = end
+
+        interval = self.engine.partial_interval
+        if interval and self._length - self._partial_length >= interval * self.engine.sample_rate:
+            self._partial = self.engine._transcribe(self._audio[:self._length], self.prompt)
+            self._partial_length = self._length
+        return None
+
+    def partial(self) -> str:
+        return self._partial
+
+    def finish(self) -> str:
+        text = self.engine._transcribe(self._audio[:self._length], self.prompt) if self._length else ""
+        self._length = self._partial_length = 0
+        self._partial = ""
+        return text
+
+
+class WhisperEngine(STTEngine):
+    """
+    faster-whisper recognition of whole utterances, int8 on the CPU by default.
+    """
+
+    name = "whisper"
+    streaming = False
+
+    def __init__(self, model_size: str = "base.en", device: str = "cpu", compute_type: str = "int8",
+                 cpu_threads: int = 0, beam_size: int = 1, batch_size: int = 8,
+                 language: Optional[str] = "en", partial_interval: Optional[float] = None) -> None:
+        """
+        Args:
+            model_size: faster-whisper model name or path.
+            device: "cpu" or "cuda".
+            compute_type: CTranslate2 quantization, int8 is the fastest on CPUs.
+            cpu_threads: Inference threads, 0 for the CTranslate2 default.
+            beam_size: Decoding beam, 1 is greedy.
+            batch_size: Segments of a long utterance decoded together (needs
+                faster-whisper's BatchedInferencePipeline, 1 to disable).
+            language: Spoken language, None to detect it.
+            partial_interval: Seconds of new audio between partial transcriptions,
+                None to only transcribe when the utterance ends.
+        """
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self.batch_size = batch_size
+        self.language = language
+        self.partial_interval = partial_interval
+        self._model = None
+        self._pipeline = None
+
+    def load(self) -> None:
+        if self._model is not None:
+            return
+        key = (self.model_size, self.device, self.compute_type, self.cpu_threads)
+        with _WHISPER_LOCK:
+            model = _WHISPER_MODELS.get(key)
+            if model is None:
+                from faster_whisper import WhisperModel
+
+                logger.info(f"Loading Whisper model '{self.model_size}' ({self.compute_type} on {self.device})...")
+                model = _WHISPER_MODELS[key] = WhisperModel(self.model_size, device=self.device,
+                                                            compute_type=self.compute_type,
+                                                            cpu_threads=self.cpu_threads)
+        self._model = model
+
+        if self.batch_size > 1:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+
+                self._pipeline = BatchedInferencePipeline(model=model)
+            except ImportError:
+                logger.info("faster-whisper has no batched pipeline, decoding sequentially")
+
+        # The first inference allocates the decoder buffers
+        self._transcribe(np.zeros(self.sample_rate, dtype=np.float32), None)
+
+    def unload(self) -> None:
+        key = (self.model_size, self.device, self.compute_type, self.cpu_threads)
+        with _WHISPER_LOCK:
+            _WHISPER_MODELS.pop(key, None)
+        self._model = None
+        self._pipeline = None
+
+    def open_stream(self, grammar: Optional[Sequence[str]] = None) -> RecognitionStream:
+        self.load()
+        return _WhisperStream(self, grammar)
+
+    def _transcribe(self, audio: np.ndarray, prompt: Optional[str]) -> str:
+        options = dict(beam_size=self.beam_size, language=self.language, initial_prompt=prompt,
+                       without_timestamps=True, condition_on_previous_text=False)
+        if self._pipeline is not None:
+            segments, _ = self._pipeline.transcribe(audio, batch_size=self.batch_size, **options)
+        else:
+            segments, _ = self._model.transcribe(audio, **options)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+def measure_rtf(engine: STTEngine, samples: np.ndarray) -> float:
+    """
+    Measure the real-time factor of an engine: processing seconds per second of audio.
+
+    The engine is loaded (and warmed up) before timing.
+    """
+    engine.load()
+    started = time.perf_counter()
+    engine.transcribe(samples)
+    elapsed = time.perf_counter() - started
+    return elapsed / (len(samples) / engine.sample_rate)
+
+
+def select_engine(candidates: Sequence[STTEngine], samples: np.ndarray, max_rtf: float = 0.3) -> STTEngine:
+    """
+    Pick the first engine fast enough on this machine.
+
+    Args:
+        candidates: Engines in order of preference (e.g. most accurate first).
+        samples: Calibration speech (int16 at the engines' sample rate).
+        max_rtf: Highest acceptable real-time factor. Whole-utterance engines
+            add roughly rtf * utterance length to the response latency.
+
+    Returns:
+        The first engine within `max_rtf`, or the fastest one. The other
+        candidates are unloaded.
+    """
+    measured = []
+    chosen = None
+    for engine in candidates:
+        try:
+            rtf = measure_rtf(engine, samples)
+        except Exception as e:
+            logger.warning(f"STT engine '{engine.name}' is unavailable: {e}")
+            continue
+        logger.info(f"STT engine '{engine.name}': real-time factor {rtf:.3f}")
+        if rtf <= max_rtf:
+            chosen = engine
+            break
+        measured.append((rtf, engine))
+    if chosen is None and measured:
+        chosen = min(measured, key=lambda item: item[0])[1]
+    # Only the chosen model stays in memory
+    for engine in candidates:
+        if engine is not chosen:
+            engine.unload()
+    if chosen is None:
+        raise RuntimeError("No speech-to-text engine is available")
+    return chosen
+
+
+def create_engine(name: str, model_path: str, **kwargs) -> STTEngine:
+    """Build an engine by name ("vosk" or "whisper")."""
+    if name == "vosk":
+        return VoskEngine(model_path, **kwargs)
+    if name == "whisper":
+        return WhisperEngine(**kwargs)
+    raise ValueError(f"Unknown speech-to-text engine '{name}'")
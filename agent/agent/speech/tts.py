@@ -1,29 +1,183 @@
-from piper import PiperVoice
-import sounddevice as sd
-import numpy as np
 import logging
-from agent.config import ONNX_PATH
+import threading
+from agent.config import ONNX_PATH, TTS_CACHE_PATH
+from agent.utils.tracing import TRACER
 
 logger = logging.getLogger(__name__)
 logging.basicConfig()
 logger.setLevel(logging.DEBUG)
 
-voice = PiperVoice.load(ONNX_PATH)
+SAMPLE_RATE = 24000
+# Longer messages are LLM answers, they rarely repeat
+MAX_CACHED_MESSAGE_LENGTH = 300
 
-def talk(message):
+# The synthesis service and the output stream are created on first use
+# (or ahead of time with start_service)
+_service = None
+_service_lock = threading.Lock()
+_player = None
+_player_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+# The message being synthesized, cancelled by stop
+_current_job = None
+# Synthesize in worker processes (see use_worker_processes)
+_use_process = False
+# Replaces the Piper voices (see use_output)
+_synthesizer_factory = None
+
+def get_service():
+    """The text-to-speech service, not started yet."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            from agent.speech.tts_service import TTSService, TTSServiceConfig
+
+            _service = TTSService(TTSServiceConfig(model_path=ONNX_PATH, sample_rate=SAMPLE_RATE,
+                                                   use_process=_use_process),
+                                  synthesizer_factory=_synthesizer_factory)
+    return _service
+
+def use_worker_processes(enabled=True):
+    """Synthesize in worker processes, off the GIL of the agent. Call before the service is created."""
+    global _use_process
+    if _service is not None:
+        raise RuntimeError("The TTS service is already created")
+    _use_process = enabled
+
+def use_output(player=None, synthesizer_factory=None, cache_directory=None):
+    """
+    Speak through other components, e.g. a NullAudioSink and a fake voice for
+    benchmarks. Called without arguments, restores the defaults.
+
+    Args:
+        player: Player of the messages, instead of the sound card.
+        synthesizer_factory: Builds the synthesizers instead of loading Piper
+            voices (see TTSService). The current service is stopped and replaced.
+        cache_directory: Directory of the speech cache, instead of TTS_CACHE_PATH.
+    """
+    global _service, _player, _cache, _synthesizer_factory
+    with _service_lock:
+        service, _service = _service, None
+        _synthesizer_factory = synthesizer_factory
+    if service is not None:
+        service.stop()
+    with _player_lock:
+        _player = player
+    with _cache_lock:
+        _cache = None
+        if cache_directory is not None:
+            from agent.speech.tts_cache import TTSCache
+
+            _cache = TTSCache(cache_directory)
+
+def start_service():
+    """Load and warm up the voices. Safe to call from a background thread at startup."""
+    logger.info(f"Loading Piper voice from {ONNX_PATH}")
+    return get_service().start()
+
+def stop_service():
+    """Unload the voices to save memory, e.g. while nobody is around."""
+    with _service_lock:
+        service = _service
+    if service is not None:
+        logger.info("Unloading the Piper voices")
+        service.stop()
+
+def metrics():
+    """Metrics of the synthesis service (see TTSService.metrics), empty before it is created."""
+    with _service_lock:
+        service = _service
+    return service.metrics() if service is not None else {}
+
+def get_player():
+    """The process-wide audio player, its output stream stays open between messages."""
+    global _player
+    with _player_lock:
+        if _player is None:
+            from agent.speech.playback import AudioPlayer
+
+            _player = AudioPlayer(sample_rate=SAMPLE_RATE)
+    return _player
+
+def get_cache():
+    """The synthesized speech cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from agent.speech.tts_cache import TTSCache
+
+            _cache = TTSCache(TTS_CACHE_PATH)
+        return _cache
+
+def synthesize(message, priority=None, keep=None):
+    """
+    Yield the synthesized audio of a message sentence by sentence, as int16 arrays.
+
+    Args:
+        message: The text to synthesize.
+        priority: Scheduling priority in the service, a response by default.
+        keep: Optional list the chunks are also appended to.
+    """
+    from agent.speech.tts_service import PRIORITY_RESPONSE
+
+    global _current_job
+    job = _current_job = get_service().submit(message, PRIORITY_RESPONSE if priority is None else priority)
+    for samples in job:
+        if keep is not None:
+            keep.append(samples)
+        yield samples
+
+def talk(message, priority=None):
+    """
+    Speak a message.
+
+    Args:
+        message: The text to speak.
+        priority: tts_service.PRIORITY_ALERT to be synthesized ahead of responses.
+    """
     logger.info(f"Talking message: {message}")
 
-    audio_bytes = b""
-    for chunk in voice.synthesize(message):
-        audio_bytes += chunk.audio_int16_bytes
+    cache = get_cache() if len(message) <= MAX_CACHED_MESSAGE_LENGTH else None
+    key = cache.key(message, ONNX_PATH, SAMPLE_RATE) if cache else None
+    cached = cache.get(key) if cache else None
+
+    chunks = []
+    if cached is not None:
+        logger.debug("Playing from cache")
+        audio = [cached]
+    else:
+        # Playing starts with the first synthesized sentence
+        logger.debug("Playing")
+        audio = synthesize(message, priority, keep=chunks)
+    with TRACER.span("tts_talk", cached=cached is not None):
+        get_player().play(_first_chunk_event(audio), blocking=True)
+        TRACER.event("playback_end")
 
-    # Playing
-    logger.debug("Playing")
-    audio_arr = np.frombuffer(audio_bytes, dtype="<i2").astype(np.int16)
-    sd.play(audio_arr, samplerate=24000, blocking=True)
+    if cache and chunks and not interrupted():
+        import numpy as np
+        cache.put(key, np.concatenate(chunks))
 
     logger.info("Finished talking")
 
+def _first_chunk_event(audio):
+    """Pass the audio through, marking when its first chunk reaches the player."""
+    for index, chunk in enumerate(audio):
+        if index == 0:
+            TRACER.event("tts_first_chunk")
+        yield chunk
+
+def stop():
+    """Interrupt the message being spoken (barge-in), and cancel the rest of its synthesis."""
+    job = _current_job
+    if job is not None:
+        job.cancel()
+    get_player().stop()
+
+def interrupted():
+    """Whether the last synthesized message was interrupted by stop."""
+    return _current_job is not None and _current_job.cancelled
+
 if __name__ == '__main__':
     #talk("Say hello to my little friend")
-    talk("rega ima ani tehef ba")
\ No newline at end of file
+    talk("rega ima ani tehef ba")
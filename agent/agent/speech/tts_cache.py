@@ -0,0 +1,142 @@
+"""Content-addressed cache of synthesized speech.
+
+Confirmations, greetings and alert phrases repeat word for word. Their PCM is
+cached under the SHA-256 of (text, voice, sample rate) in two tiers: a small
+in-memory LRU and a directory of raw int16 `.pcm` files that are
+memory-mapped for playback. A hit plays without loading or running the voice.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("Speech.TTSCache")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class TTSCache:
+    """
+    Two-tier (memory, disk) LRU cache of int16 PCM keyed by content hash.
+    """
+
+    def __init__(self, directory: str, memory_bytes: int = 8 * 1024 * 1024,
+                 disk_bytes: int = 200 * 1024 * 1024) -> None:
+        """
+        Args:
+            directory: Directory of the on-disk tier (created on first write).
+            memory_bytes: Size cap of the in-memory tier.
+            disk_bytes: Size cap of the on-disk tier.
+        """
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, voice: str, sample_rate: int) -> str:
+        """Cache key of a message, insensitive to surrounding and repeated whitespace."""
+        text = _WHITESPACE.sub(" ", text).strip()
+        return hashlib.sha256(f"{voice}\0{sample_rate}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look up a message.
+
+        Returns:
+            The samples (in memory, or memory-mapped from disk), or None on a miss.
+        """
+        path = self._path(key)
+        with self._lock:
+            samples = self._memory.get(key)
+            if samples is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+        if samples is not None:
+            self._touch(path)
+            return samples
+
+        try:
+            samples = np.memmap(path, dtype="<i2", mode="r")
+            self._touch(path)
+        except (FileNotFoundError, ValueError):
+            # ValueError: an empty file cannot be mapped
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        self._remember(key, samples)
+        return samples
+
+    def put(self, key: str, samples: np.ndarray) -> None:
+        """Store the samples of a message in both tiers."""
+        samples = np.ascontiguousarray(samples, dtype="<i2")
+        if not len(samples):
+            return
+        self._remember(key, samples)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first, readers never map a partial file
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                file.write(samples.tobytes())
+            os.replace(temporary, self._path(key))
+            self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Failed to write TTS cache entry: {e}")
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        # The modification time orders the disk tier's eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _remember(self, key: str, samples: np.ndarray) -> None:
+        if samples.nbytes > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= previous.nbytes
+            self._memory[key] = samples
+            self._memory_size += samples.nbytes
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= evicted.nbytes
+
+    def _evict_disk(self) -> None:
+        """Delete the least recently used files above the size cap."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pcm"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
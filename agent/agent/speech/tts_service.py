@@ -0,0 +1,326 @@
+"""Text-to-speech service.
+
+Owns one or more warmed-up Piper voices, each driven by a worker thread (or,
+optionally, a worker process so synthesis does not compete with the rest of
+the agent for the GIL, returning its audio through shared memory). Messages are split into sentences and queued by
+priority, so an alert submitted while a long answer is being synthesized is
+spoken after the current sentence rather than after the whole answer.
+"""
+
+import json
+import logging
+import multiprocessing
+import queue
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger("Speech.TTSService")
+
+# Lower values are synthesized first
+PRIORITY_ALERT = 0
+PRIORITY_RESPONSE = 1
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class TTSServiceConfig:
+    """Configuration of the text-to-speech service."""
+    model_path: str
+    voices: int = 1                      # Voice instances, i.e. sentences synthesized in parallel
+    intra_op_threads: Optional[int] = None  # ONNX Runtime threads per voice, None for its default
+    use_process: bool = False            # Synthesize in worker processes instead of threads
+    warm_up_text: str = "Hello."         # Synthesized once per voice at startup
+    sample_rate: int = 24000             # Playback rate, to report seconds of audio
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a message into sentences, the unit of scheduling."""
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+def load_piper_voice(model_path: str, intra_op_threads: Optional[int] = None):
+    """
+    Load a Piper voice, with a tuned ONNX session when `intra_op_threads` is set.
+
+    Falls back to `PiperVoice.load` on Piper versions that do not take a
+    prebuilt session.
+    """
+    from piper import PiperVoice
+
+    if intra_op_threads is None:
+        return PiperVoice.load(model_path)
+
+    try:
+        import onnxruntime
+        from piper.config import PiperConfig
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        with open(f"{model_path}.json", "r", encoding="utf-8") as file:
+            config = PiperConfig.from_dict(json.load(file))
+        session = onnxruntime.InferenceSession(str(model_path), sess_options=options,
+                                               providers=["CPUExecutionProvider"])
+        return PiperVoice(config=config, session=session)
+    except (ImportError, TypeError) as e:
+        logger.warning(f"Cannot tune the ONNX session ({e}), using the default one")
+        return PiperVoice.load(model_path)
+
+
+def _synthesize_with(voice, text: str) -> np.ndarray:
+    chunks = [np.frombuffer(chunk.audio_int16_bytes, dtype="<i2") for chunk in voice.synthesize(text)]
+    if len(chunks) == 1:
+        return chunks[0]
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype="<i2")
+
+
+class _LocalSynthesizer:
+    """A voice in this process."""
+
+    def __init__(self, config: TTSServiceConfig) -> None:
+        self.voice = load_piper_voice(config.model_path, config.intra_op_threads)
+
+    def synthesize(self, text: str) -> np.ndarray:
+        return _synthesize_with(self.voice, text)
+
+    def close(self) -> None:
+        pass
+
+
+def _synthesis_process(connection, model_path: str, intra_op_threads: Optional[int], ring_name: str) -> None:
+    """Worker process: receives texts, writes the int16 PCM to the shared ring and sends its position back."""
+    from agent.speech.shm_ring import SharedRingBuffer
+
+    ring = SharedRingBuffer.attach(ring_name)
+    voice = load_piper_voice(model_path, intra_op_threads)
+    connection.send(None)  # Ready
+    try:
+        while True:
+            try:
+                text = connection.recv()
+            except EOFError:
+                break
+            if text is None:
+                break
+            samples = _synthesize_with(voice, text)
+            position = ring.write_position
+            ring.write(samples)
+            connection.send((position, len(samples)))
+    finally:
+        ring.release()
+
+
+class _ProcessSynthesizer:
+    """
+    A voice in a worker process. Texts and positions go over a pipe, the
+    audio comes back through a shared-memory ring.
+    """
+
+    # Longest sentence the ring holds (seconds)
+    max_sentence_seconds = 120
+
+    def __init__(self, config: TTSServiceConfig) -> None:
+        from agent.speech.shm_ring import SharedRingBuffer
+
+        self.ring = SharedRingBuffer.create(config.sample_rate * self.max_sentence_seconds)
+        context = multiprocessing.get_context("spawn")
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_synthesis_process, name="tts-worker", daemon=True,
+                                       args=(child, config.model_path, config.intra_op_threads, self.ring.name))
+        self.process.start()
+        child.close()
+        self.connection.recv()
+
+    def synthesize(self, text: str) -> np.ndarray:
+        self.connection.send(text)
+        position, length = self.connection.recv()
+        # Copied out before the next sentence overwrites it
+        return self.ring.view(position, length).copy()
+
+    def close(self) -> None:
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=2.0)
+        self.ring.unlink()
+
+
+class SpeechJob:
+    """
+    A message being synthesized. Iterate it to get the audio of its
+    sentences, in order, as soon as each one is ready.
+    """
+
+    def __init__(self, text: str, priority: int) -> None:
+        self.text = text
+        self.priority = priority
+        self.sentences = split_sentences(text)
+        self.submitted_at = time.perf_counter()
+        self.first_audio_at: Optional[float] = None
+        self.cancelled = False
+        self._results: Dict[int, Optional[np.ndarray]] = {}
+        self._condition = threading.Condition()
+
+    def cancel(self) -> None:
+        """Stop synthesizing the remaining sentences."""
+        with self._condition:
+            self.cancelled = True
+            self._condition.notify_all()
+
+    def _set_result(self, index: int, samples: Optional[np.ndarray]) -> None:
+        with self._condition:
+            self._results[index] = samples
+            self._condition.notify_all()
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for index in range(len(self.sentences)):
+            with self._condition:
+                self._condition.wait_for(lambda: index in self._results or self.cancelled)
+                if self.cancelled:
+                    return
+                samples = self._results.pop(index)
+            if samples is None:
+                # The sentence failed, the rest of the message would not make sense
+                return
+            yield samples
+
+
+class TTSService:
+    """
+    Pool of warmed-up Piper voices synthesizing prioritized jobs.
+    """
+
+    def __init__(self, config: TTSServiceConfig, synthesizer_factory: Optional[Callable] = None) -> None:
+        """
+        Args:
+            config: The service configuration.
+            synthesizer_factory: Builds a synthesizer (an object with
+                `synthesize(text) -> samples` and `close()`) from the config.
+                Defaults to a Piper voice in this process or in a worker process.
+        """
+        self.config = config
+        self.synthesizer_factory = synthesizer_factory or (
+            _ProcessSynthesizer if config.use_process else _LocalSynthesizer)
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = 0
+        self._sequence_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._synthesizers: list = []
+        self._started = False
+        self._start_lock = threading.Lock()
+
+        # Metrics
+        self._metrics_lock = threading.Lock()
+        self._sentences = 0
+        self._audio_seconds = 0.0
+        self._synthesis_seconds = 0.0
+        self._first_audio_latencies: Deque[float] = deque(maxlen=100)
+
+    def start(self) -> "TTSService":
+        """Load and warm up the voices, then start the workers (idempotent)."""
+        with self._start_lock:
+            if self._started:
+                return self
+            for index in range(self.config.voices):
+                started = time.perf_counter()
+                synthesizer = self.synthesizer_factory(self.config)
+                # The first inference of an ONNX session is much slower than the next ones
+                synthesizer.synthesize(self.config.warm_up_text)
+                logger.info(f"TTS voice {index} ready in {time.perf_counter() - started:.2f}s")
+                self._synthesizers.append(synthesizer)
+
+                worker = threading.Thread(target=self._work, args=(synthesizer,), name=f"tts-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            self._started = True
+        return self
+
+    def stop(self) -> None:
+        """Finish the queued messages and unload the voices (start loads them again)."""
+        with self._start_lock:
+            for _ in self._workers:
+                self._queue.put((float("inf"), 0, 0, None))
+            for worker in self._workers:
+                worker.join(timeout=2.0)
+            for synthesizer in self._synthesizers:
+                synthesizer.close()
+            self._workers.clear()
+            self._synthesizers.clear()
+            self._started = False
+
+    def submit(self, text: str, priority: int = PRIORITY_RESPONSE) -> SpeechJob:
+        """
+        Queue a message for synthesis.
+
+        Args:
+            text: The message.
+            priority: PRIORITY_ALERT or PRIORITY_RESPONSE, lower is sooner.
+
+        Returns:
+            The job, iterate it to get the audio.
+        """
+        self.start()
+        job = SpeechJob(text, priority)
+        with self._sequence_lock:
+            sequence = self._sequence
+            self._sequence += 1
+        # Sentences of earlier jobs go first within a priority
+        for index in range(len(job.sentences)):
+            self._queue.put((priority, sequence, index, job))
+        return job
+
+    def _work(self, synthesizer) -> None:
+        while True:
+            _, _, index, job = self._queue.get()
+            if job is None:
+                return
+            if job.cancelled:
+                continue
+
+            started = time.perf_counter()
+            try:
+                samples = synthesizer.synthesize(job.sentences[index])
+            except Exception as e:
+                logger.error(f"Synthesis failed: {e}")
+                job._set_result(index, None)
+                continue
+            finished = time.perf_counter()
+
+            with self._metrics_lock:
+                self._sentences += 1
+                self._synthesis_seconds += finished - started
+                self._audio_seconds += len(samples) / self.config.sample_rate
+                if index == 0:
+                    job.first_audio_at = finished
+                    self._first_audio_latencies.append(finished - job.submitted_at)
+            job._set_result(index, samples)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Throughput and latency of the service.
+
+        Returns:
+            sentences, audio_seconds, synthesis_seconds, real_time_factor
+            (synthesis time per second of audio), queued sentences, and the
+            p50/p95 latency from submission to the first sentence's audio.
+        """
+        with self._metrics_lock:
+            latencies = sorted(self._first_audio_latencies)
+            metrics = {
+                "sentences": self._sentences,
+                "audio_seconds": self._audio_seconds,
+                "synthesis_seconds": self._synthesis_seconds,
+                "real_time_factor": self._synthesis_seconds / self._audio_seconds if self._audio_seconds else 0.0,
+                "queued": self._queue.qsize(),
+            }
+        for name, fraction in (("first_audio_p50", 0.5), ("first_audio_p95", 0.95)):
+            metrics[name] = latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else 0.0
+        return metrics
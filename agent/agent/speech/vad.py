@@ -0,0 +1,135 @@
+"""Voice activity detection in front of the Vosk recognizers.
+
+A cheap, vectorized energy plus zero-crossing detector with an adaptive noise
+floor (the RMS logic of `poc_examples/microphone_poc.py`, made adaptive).
+`VADGate` uses it to pass audio to a recognizer only around speech, with a
+short pre-roll, so a silent room costs almost no decoding CPU.
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List
+
+import numpy as np
+
+logger = logging.getLogger("Speech.VAD")
+
+
+@dataclass
+class VADConfig:
+    """Tuning of the energy/zero-crossing detector."""
+    frame_ms: int = 20                # Analysis frame length
+    min_rms: float = 300.0            # Absolute floor, quieter frames are never speech
+    threshold_ratio: float = 3.0      # Speech is this many times louder than the noise floor
+    max_zero_crossing_rate: float = 0.5  # Above this a frame is hiss rather than voice,
+                                         # unless it is very loud
+    noise_adaptation: float = 0.05    # EMA rate of the noise floor on non-speech frames
+    min_speech_frames: int = 2        # Speech frames needed in a chunk to call it speech
+    preroll_ms: int = 300             # Audio passed on from before the speech onset
+    hangover_ms: int = 400            # Audio passed on after the speech stops
+
+
+class EnergyVAD:
+    """
+    Frame-level voice activity detector with an adaptive noise floor.
+    """
+
+    def __init__(self, sample_rate: int = 16000, config: VADConfig = None) -> None:
+        self.sample_rate = sample_rate
+        self.config = config or VADConfig()
+        self.frame_length = max(1, sample_rate * self.config.frame_ms // 1000)
+        self.noise_floor = self.config.min_rms / self.config.threshold_ratio
+
+    def frame_features(self, samples: np.ndarray):
+        """
+        Compute the RMS and zero-crossing rate of every full frame.
+
+        Returns:
+            A tuple of two arrays (rms, zero_crossing_rate), one value per frame.
+        """
+        frame_count = len(samples) // self.frame_length
+        frames = samples[:frame_count * self.frame_length].reshape(frame_count, self.frame_length)
+        # Cast to float to prevent overflow when squaring
+        frames = frames.astype(np.float32)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_length
+        return rms, zero_crossing_rate
+
+    def speech_frames(self, samples: np.ndarray) -> np.ndarray:
+        """Classify the frames of a chunk, updating the noise floor."""
+        config = self.config
+        rms, zero_crossing_rate = self.frame_features(samples)
+        threshold = max(config.min_rms, self.noise_floor * config.threshold_ratio)
+        loud = rms > threshold
+        voiced = loud & ((zero_crossing_rate < config.max_zero_crossing_rate) | (rms > 2 * threshold))
+
+        # The noise floor follows the quiet frames only
+        quiet = rms[~voiced]
+        if len(quiet):
+            self.noise_floor += config.noise_adaptation * (float(np.mean(quiet)) - self.noise_floor)
+        return voiced
+
+    def is_speech(self, samples: np.ndarray) -> bool:
+        """Whether a chunk contains speech."""
+        return int(np.count_nonzero(self.speech_frames(samples))) >= self.config.min_speech_frames
+
+
+class VADGate:
+    """
+    Passes audio chunks on only around speech.
+
+    Keeps the last `preroll_ms` of audio while closed, and stays open for
+    `hangover_ms` after the last speech chunk. `closed_now` is set for the
+    chunk that closed the gate, the cue to finalize the recognizer.
+    """
+
+    def __init__(self, vad: EnergyVAD, chunk_samples: int) -> None:
+        self.vad = vad
+        chunk_ms = 1000 * chunk_samples / vad.sample_rate
+        self.preroll_chunks = int(np.ceil(vad.config.preroll_ms / chunk_ms))
+        self.hangover_chunks = int(np.ceil(vad.config.hangover_ms / chunk_ms))
+        self._preroll: Deque[np.ndarray] = deque(maxlen=self.preroll_chunks)
+        self._hangover = 0
+        self.is_open = False
+        self.closed_now = False
+        self.chunks_total = 0
+        self.chunks_passed = 0
+
+    def process(self, chunk: np.ndarray) -> List[np.ndarray]:
+        """
+        Feed the next chunk.
+
+        Returns:
+            The chunks to pass to the recognizer (empty while silent).
+        """
+        self.chunks_total += 1
+        self.closed_now = False
+        speech = self.vad.is_speech(chunk)
+
+        if speech:
+            self._hangover = self.hangover_chunks
+            if not self.is_open:
+                self.is_open = True
+                passed = list(self._preroll) + [chunk]
+                self._preroll.clear()
+                self.chunks_passed += len(passed)
+                return passed
+        elif self.is_open:
+            self._hangover -= 1
+            if self._hangover < 0:
+                self.is_open = False
+                self.closed_now = True
+
+        if self.is_open or self.closed_now:
+            self.chunks_passed += 1
+            return [chunk]
+
+        self._preroll.append(chunk)
+        return []
+
+    @property
+    def pass_ratio(self) -> float:
+        """Fraction of the audio passed on to the recognizer."""
+        return self.chunks_passed / self.chunks_total if self.chunks_total else 0.0
@@ -1,43 +1,104 @@
 from __future__ import annotations
-from agent.tools.list_tools.file_based_list_tool import FileBasedListToolConfig
-from agent.tools.list_tools.list_add_item_tool import ListAddTool, ListAddToolConfig
-from agent.tools.list_tools.list_remove_item_tool import ListRemoveTool, ListRemoveToolConfig
-from agent.tools.event_tools.add_event_tool import AddEventTool, AddEventToolConfig
-from agent.tools.event_tools.remove_event_tool import RemoveEventTool, RemoveEventToolConfig
-from agent.tools.event_tools.get_events_tool import GetEventsTool, GetEventsToolConfig
-from agent.tools.list_tools.get_lists_headers import GetListsHeadersTool
-from agent.tools.list_tools.get_list_by_name import GetListByNameTool
+from typing import Optional
+from agent.tools.registry import ENTRY_POINT_GROUP, LazyTool, ToolManifest, ToolRegistry
 
 from agent.config import LISTS_FILE_PATH, EVENTS_FILE_PATH
 
-AVAILABLE_TOOLS = [ListAddTool, ListRemoveTool, AddEventTool, RemoveEventTool, GetEventsTool, GetListsHeadersTool, GetListByNameTool]
+# Tool manifests. The tool modules themselves are imported on first call.
+AVAILABLE_TOOLS = [
+    ToolManifest(
+        name="add_to_list",
+        description="Adds a specific item to a named list.",
+        input_format='{"item": "str", "list_name": "str (optional)"}',
+        target="agent.tools.list_tools.list_add_item_tool:ListAddTool",
+        config_target="agent.tools.list_tools.list_add_item_tool:ListAddToolConfig",
+    ),
+    ToolManifest(
+        name="remove_from_list",
+        description="Removes an item from a list.",
+        input_format='{"item": "str", "list_name": "str"}',
+        target="agent.tools.list_tools.list_remove_item_tool:ListRemoveTool",
+        config_target="agent.tools.list_tools.list_remove_item_tool:ListRemoveToolConfig",
+    ),
+    ToolManifest(
+        name="add_event",
+        description="Creates an event with time, notification, importance, and description fields. The time field can be a specific datetime or a duration from now. Datetime is in the format dd/mm/yyyy hh:mm. Duration is in the format HH:MM:SS.",
+        input_format='{"time": "str", "notification": "bool", "importance": "int", "description": "str"}',
+        target="agent.tools.event_tools.add_event_tool:AddEventTool",
+        config_target="agent.tools.event_tools.add_event_tool:AddEventToolConfig",
+    ),
+    ToolManifest(
+        name="remove_event",
+        description="Removes an event from the 'events.json' file based on a unique identifier or description.",
+        input_format='{"description": "str"}',
+        target="agent.tools.event_tools.remove_event_tool:RemoveEventTool",
+        config_target="agent.tools.event_tools.remove_event_tool:RemoveEventToolConfig",
+    ),
+    ToolManifest(
+        name="get_events",
+        description="Retrieves events by date range. To get today's events, provide today's date start_date and tomorrow's as end_date.",
+        input_format='{"start_date": "str (optional, format: YYYY-MM-DD)", "end_date": "str (optional, format: YYYY-MM-DD)"}',
+        target="agent.tools.event_tools.get_events_tool:GetEventsTool",
+        config_target="agent.tools.event_tools.get_events_tool:GetEventsToolConfig",
+    ),
+    ToolManifest(
+        name="get_lists_headers",
+        description="Retrieves the headers of all lists in the system.",
+        input_format="{}",
+        target="agent.tools.list_tools.get_lists_headers:GetListsHeadersTool",
+        config_target="agent.tools.list_tools.file_based_list_tool:FileBasedListToolConfig",
+    ),
+    ToolManifest(
+        name="get_list_by_name",
+        description="Retrieves the contents of a specific list by its name.",
+        input_format='{"list_name": "str"}',
+        target="agent.tools.list_tools.get_list_by_name:GetListByNameTool",
+        config_target="agent.tools.list_tools.file_based_list_tool:FileBasedListToolConfig",
+    ),
+]
 
 
+# Config keyword arguments by tool name
 TOOLS_CONFIG = {
-    ListAddTool.NAME: ListAddToolConfig(
+    "add_to_list": dict(
         list_file_path=LISTS_FILE_PATH,
         default_list_name="inbox",
         max_list_size=5
     ),
-    ListRemoveTool.NAME: ListRemoveToolConfig(
+    "remove_from_list": dict(
         list_file_path=LISTS_FILE_PATH,
         allow_audit_logging=True
     ),
-    GetListByNameTool.NAME: FileBasedListToolConfig(
+    "get_list_by_name": dict(
         list_file_path=LISTS_FILE_PATH
     ),
-    GetListsHeadersTool.NAME: FileBasedListToolConfig(
+    "get_lists_headers": dict(
         list_file_path=LISTS_FILE_PATH
     ),
-    
-    AddEventTool.NAME: AddEventToolConfig(
+
+    "add_event": dict(
         event_files_path=EVENTS_FILE_PATH
     ),
-    RemoveEventTool.NAME: RemoveEventToolConfig(
+    "remove_event": dict(
         events_file_path=EVENTS_FILE_PATH
     ),
-    GetEventsTool.NAME: GetEventsToolConfig(
+    "get_events": dict(
         events_file_path=EVENTS_FILE_PATH
     ),
-    
-}   
\ No newline at end of file
+
+}
+
+
+def manifest_for(tool_class: type) -> Optional[ToolManifest]:
+    """The built-in manifest of a tool class, None for tools of other packages."""
+    target = f"{tool_class.__module__}:{tool_class.__qualname__}"
+    return next((manifest for manifest in AVAILABLE_TOOLS if manifest.target == target), None)
+
+
+def build_registry(discover: bool = True) -> ToolRegistry:
+    """Create a registry with the built-in tools and, optionally, installed plugins."""
+    registry = ToolRegistry()
+    registry.register_all(AVAILABLE_TOOLS)
+    if discover:
+        registry.discover_entry_points()
+    return registry
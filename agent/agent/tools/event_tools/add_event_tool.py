@@ -1,36 +1,29 @@
 from dataclasses import dataclass, asdict
-from dacite import from_dict, Config
 import json
 from datetime import datetime, timedelta
 import os
 from typing import Any, Dict
 from agent.tools.tool_interface import Tool
-from agent.tools.event_tools.models import Event
+from agent.utils.counters import COUNTERS
+from agent.tools.event_tools.models import Event, NewEvent
 
 @dataclass
 class AddEventToolConfig:
     event_files_path: str
 
 class AddEventTool(Tool):
-    NAME="add_event"
-    DESCRIPTION="Creates an event with time, notification, importance, and description fields. The time field can be a specific datetime or a duration from now. Datetime is in the format dd/mm/yyyy hh:mm. Duration is in the format HH:MM:SS."
-    INPUT_FORMAT='{"time": "str", "notification": "bool", "importance": "int", "description": "str"}'
+    ARGS_SCHEMA=NewEvent
 
     def __init__(self, config: AddEventToolConfig) -> None:
         super().__init__(config)
     
-    def execute(self, arguments_json: str) -> Any:
+    def execute(self, arguments: NewEvent) -> Any:
         try:
-            args = json.loads(arguments_json)
-            try:
-                event = from_dict(data_class=Event, data=args, config=Config(type_hooks={int:int, str:str}))
-            except Exception as e:
-                raise f"Error: Can't parse arguments - {e}"
-            
+            event = Event(**asdict(arguments))
             event.time = self._parse_time(event.time)
             
             if not (1 <= event.importance <= 5):
-                raise "Error: 'importance' must be between 1 and 5."
+                raise ValueError("Error: 'importance' must be between 1 and 5.")
             
 
             # Save event to file
@@ -49,6 +42,7 @@ class AddEventTool(Tool):
         if os.path.exists(file_path):
             with open(file_path, "r") as f:
                 try:
+                    COUNTERS.increment("json.file_loads")
                     events = json.load(f)
                 except json.JSONDecodeError:
                     pass
@@ -3,8 +3,9 @@ import logging
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 from agent.tools.tool_interface import Tool
+from agent.utils.counters import COUNTERS
 from dataclasses import asdict, dataclass
-from .models import Event
+from .models import DateRange, Event
 
 logger = logging.getLogger("Tools.GetEvents")
 
@@ -13,9 +14,7 @@ class GetEventsToolConfig:
     events_file_path: str
 
 class GetEventsTool(Tool):
-    NAME = "get_events"
-    DESCRIPTION = "Retrieves events by date range. To get today's events, provide today's date start_date and tomorrow's as end_date."
-    INPUT_FORMAT = '{"start_date": "str (optional, format: YYYY-MM-DD)", "end_date": "str (optional, format: YYYY-MM-DD)"}'
+    ARGS_SCHEMA = DateRange
 
     def __init__(self, config: GetEventsToolConfig) -> None:
         super().__init__(config)
@@ -25,6 +24,7 @@ class GetEventsTool(Tool):
         """Load events from the file."""
         try:
             with open(self.events_file_path, "r") as file:
+                COUNTERS.increment("json.file_loads")
                 return json.load(file)
         except FileNotFoundError:
             return []
@@ -32,12 +32,10 @@ class GetEventsTool(Tool):
             logger.error(f"Failed to load events: {e}")
             raise
 
-    def execute(self, arguments_json: str) -> Any:
+    def execute(self, arguments: DateRange) -> Any:
         try:
-            # Parse the input arguments
-            args = json.loads(arguments_json)
-            start_date: Optional[str] = args.get("start_date")
-            end_date: Optional[str] = args.get("end_date")
+            start_date: Optional[str] = arguments.start_date
+            end_date: Optional[str] = arguments.end_date
 
             # Load the events data
             data = self._load_data()
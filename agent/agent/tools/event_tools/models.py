@@ -1,9 +1,24 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
-class Event:
+class NewEvent:
+    # What the LLM gives add_event
     time: str
     notification: bool
     importance: int
     description: str
+
+@dataclass
+class Event(NewEvent):
+    # Set once the event was alerted, not an argument of the tools
     has_passed: bool = False
+
+@dataclass
+class EventDescription:
+    description: str
+
+@dataclass
+class DateRange:
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
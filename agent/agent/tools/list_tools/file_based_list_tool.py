@@ -4,6 +4,7 @@ import os
 import logging
 from typing import Dict, List
 from agent.tools.tool_interface import Tool
+from agent.utils.counters import COUNTERS
 
 logger = logging.getLogger("Tools.Lists")
 
@@ -25,6 +26,7 @@ class FileBasedListTool(Tool):
             return {}
         try:
             with open(path, 'r') as f:
+                COUNTERS.increment("json.file_loads")
                 return json.load(f)
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"Failed to load list data from {path}: {e}")
@@ -1,23 +1,19 @@
-import json
 import logging
 from typing import Any
+from agent.tools.list_tools.models import ListName
 from agent.tools.list_tools.file_based_list_tool import FileBasedListTool, FileBasedListToolConfig
 
 logger = logging.getLogger("Tools.GetListByName")
 
 class GetListByNameTool(FileBasedListTool):
-    NAME = "get_list_by_name"
-    DESCRIPTION = "Retrieves the contents of a specific list by its name."
-    INPUT_FORMAT = '{"list_name": "str"}'
+    ARGS_SCHEMA = ListName
 
     def __init__(self, config: FileBasedListToolConfig) -> None:
         super().__init__(config)
 
-    def execute(self, arguments_json: str) -> Any:
+    def execute(self, arguments: ListName) -> Any:
         try:
-            # Parse the input arguments
-            args = json.loads(arguments_json)
-            list_name = args.get("list_name")
+            list_name = arguments.list_name
 
             if not list_name:
                 return "Error: 'list_name' is required."
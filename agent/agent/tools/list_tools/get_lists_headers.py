@@ -1,19 +1,16 @@
-import json
 import logging
 from typing import Any
+from agent.tools.schema import NoArguments
 from agent.tools.list_tools.file_based_list_tool import FileBasedListTool, FileBasedListToolConfig
 
 logger = logging.getLogger("Tools.GetListsHeaders")
 
 class GetListsHeadersTool(FileBasedListTool):
-    NAME = "get_lists_headers"
-    DESCRIPTION = "Retrieves the headers of all lists in the system."
-    INPUT_FORMAT = "{}"  # No input required
 
     def __init__(self, config: FileBasedListToolConfig) -> None:
         super().__init__(config)
 
-    def execute(self, arguments_json: str) -> Any:
+    def execute(self, arguments: NoArguments) -> Any:
         try:
             # Load the data from the file
             data = self._load_data()
@@ -1,9 +1,8 @@
 from dataclasses import dataclass
-import json
 import logging
 from typing import Any
 
-from agent.tools.list_tools.models import ListItem
+from agent.tools.list_tools.models import NewListItem
 from agent.tools.list_tools.file_based_list_tool import FileBasedListTool, FileBasedListToolConfig
 
 logger = logging.getLogger("Tools.ListAddItem")
@@ -14,26 +13,19 @@ class ListAddToolConfig(FileBasedListToolConfig):
     max_list_size: int
 
 class ListAddTool(FileBasedListTool):
-    NAME = "add_to_list"
-    DESCRIPTION = "Adds a specific item to a named list."
-    INPUT_FORMAT = '{"item": "str", "list_name": "str (optional)"}'
+    ARGS_SCHEMA = NewListItem
 
     def __init__(self, config: ListAddToolConfig) -> None:
         super().__init__(config)
     
-    def execute(self, arguments_json: str) -> Any:
+    def execute(self, item: NewListItem) -> Any:
         try:
-            args = json.loads(arguments_json)
-            
             # Config
             default_list = self.config.default_list_name
             max_size = self.config.max_list_size
             
-            item = args.get("item")
-            try:
-                item = ListItem(**args)
-            except Exception as e:
-                return f"Error: Can't parse arguments - {e}."
+            if not item.list_name:
+                item.list_name = default_list
 
             data = self._load_data()
             
@@ -1,5 +1,4 @@
 from dataclasses import dataclass
-import json
 import logging
 from typing import Any
 from agent.tools.list_tools.models import ListItem
@@ -11,18 +10,13 @@ class ListRemoveToolConfig(FileBasedListToolConfig):
     allow_audit_logging: bool
 
 class ListRemoveTool(FileBasedListTool):
-    NAME="remove_from_list"
-    DESCRIPTION="Removes an item from a list."
-    INPUT_FORMAT='{"item": "str", "list_name": "str"}'
+    ARGS_SCHEMA=ListItem
 
     def __init__(self, config: ListRemoveToolConfig) -> None:
         super().__init__(config)
     
-    def execute(self, arguments_json: str) -> Any:
+    def execute(self, item: ListItem) -> Any:
         try:
-            args = json.loads(arguments_json)
-            item = ListItem(**args)
-            
             audit = self.config.allow_audit_logging
 
             data = self._load_data()
@@ -1,6 +1,16 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class ListItem:
     list_name: str
     item: str
+
+@dataclass
+class NewListItem:
+    item: str
+    list_name: Optional[str] = None
+
+@dataclass
+class ListName:
+    list_name: str
@@ -0,0 +1,154 @@
+"""Lazy tool registry.
+
+Tools are described by lightweight `ToolManifest`s: the metadata the LLM needs
+(`NAME`, `DESCRIPTION`, `INPUT_FORMAT`) plus import paths of the tool and its
+config class. The tool module is only imported, and the tool only built, on
+its first call, so tools with heavy dependencies cost nothing at startup.
+
+Third-party packages register tools through the `buddies.tools` entry point
+group. The entry point must resolve to a `ToolManifest` (or a list of them)
+and should live in a module that does not import the tool itself:
+
+    [project.entry-points."buddies.tools"]
+    weather = "buddies_weather.manifest:MANIFEST"
+"""
+
+import importlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from importlib import metadata
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("Tools.Registry")
+
+ENTRY_POINT_GROUP = "buddies.tools"
+
+
+@dataclass(frozen=True)
+class ToolManifest:
+    """Metadata of a tool, available without importing it."""
+    name: str
+    description: str
+    input_format: str
+    target: str                         # "package.module:ToolClass"
+    config_target: Optional[str] = None  # "package.module:ConfigClass"
+    config_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_object(target: str) -> Any:
+    """Import an object from a "package.module:attribute" path."""
+    module_name, _, attribute = target.partition(":")
+    obj = importlib.import_module(module_name)
+    for part in attribute.split(".") if attribute else []:
+        obj = getattr(obj, part)
+    return obj
+
+
+class LazyTool:
+    """
+    Stands in for a tool until its first call.
+
+    Exposes the manifest metadata under the `Tool` attribute names, and
+    imports and builds the real tool when it is validated or executed.
+    """
+
+    def __init__(self, manifest: ToolManifest, config_kwargs: Optional[Dict[str, Any]] = None) -> None:
+        self.manifest = manifest
+        self.NAME = manifest.name
+        self.DESCRIPTION = manifest.description
+        self.INPUT_FORMAT = manifest.input_format
+        self._config_kwargs = {**manifest.config_kwargs, **(config_kwargs or {})}
+        self._tool = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._tool is not None
+
+    @property
+    def tool(self):
+        """The real tool, imported and built on first access."""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    self._tool = self._build()
+        return self._tool
+
+    @property
+    def validator(self):
+        return self.tool.validator
+
+    def execute(self, arguments: Any) -> Any:
+        return self.tool.execute(arguments)
+
+    def _build(self):
+        logger.info(f"Loading tool '{self.NAME}' from {self.manifest.target}")
+        try:
+            tool_class = load_object(self.manifest.target)
+            config = None
+            if self.manifest.config_target:
+                config = load_object(self.manifest.config_target)(**self._config_kwargs)
+            return tool_class(config)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load tool '{self.NAME}': {e}") from e
+
+
+class ToolRegistry:
+    """
+    Keeps the manifests of all known tools.
+    """
+
+    def __init__(self) -> None:
+        self._manifests: Dict[str, ToolManifest] = {}
+
+    def register(self, manifest: ToolManifest) -> None:
+        """Register a tool manifest. A later manifest with the same name wins."""
+        if manifest.name in self._manifests:
+            logger.warning(f"Tool '{manifest.name}' registered twice, using {manifest.target}")
+        self._manifests[manifest.name] = manifest
+
+    def register_all(self, manifests: Iterable[ToolManifest]) -> None:
+        for manifest in manifests:
+            self.register(manifest)
+
+    def discover_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """Register the manifests published by installed packages."""
+        try:
+            entry_points = metadata.entry_points()
+            if hasattr(entry_points, "select"):
+                entry_points = entry_points.select(group=group)
+            else:  # Python < 3.10
+                entry_points = entry_points.get(group, [])
+        except Exception as e:
+            logger.error(f"Failed to list tool entry points: {e}")
+            return
+
+        for entry_point in entry_points:
+            try:
+                loaded = entry_point.load()
+            except Exception as e:
+                logger.error(f"Failed to load tool entry point '{entry_point.name}': {e}")
+                continue
+            manifests = [loaded] if isinstance(loaded, ToolManifest) else list(loaded)
+            for manifest in manifests:
+                logger.info(f"Discovered tool '{manifest.name}' from entry point '{entry_point.name}'")
+                self.register(manifest)
+
+    @property
+    def manifests(self) -> List[ToolManifest]:
+        return list(self._manifests.values())
+
+    def create_tools(self, tools_config: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, LazyTool]:
+        """
+        Create lazy tools for all registered manifests.
+
+        Args:
+            tools_config: Config keyword arguments by tool name. They override
+                the defaults given in the manifests.
+        """
+        tools_config = tools_config or {}
+        return {
+            name: LazyTool(manifest, tools_config.get(name))
+            for name, manifest in self._manifests.items()
+        }
@@ -0,0 +1,195 @@
+"""Typed argument schemas for tools.
+
+Each tool declares its arguments as a dataclass (`Tool.ARGS_SCHEMA`). The
+schema is compiled once, when the tool class is defined, into an
+`ArgumentValidator`: a flat list of per-field converters. Validating a call is
+then a single pass over the LLM's `arguments` dict, with light coercion
+(e.g. "3" -> 3, "true" -> True) and precise error messages the LLM can act on.
+"""
+
+import dataclasses
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+
+Converter = Callable[[Any], Any]
+
+_TRUE_STRINGS = {"true", "yes", "1", "on"}
+_FALSE_STRINGS = {"false", "no", "0", "off"}
+
+
+class ArgumentValidationError(ValueError):
+    """Raised when tool arguments do not match the tool's schema."""
+
+    def __init__(self, errors: List[str]) -> None:
+        self.errors = errors
+        super().__init__("Invalid arguments: " + "; ".join(errors) + ".")
+
+
+@dataclass
+class NoArguments:
+    """Schema for tools that take no arguments."""
+
+
+def _describe(value: Any) -> str:
+    return f"{type(value).__name__} {value!r}"
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise TypeError(f"expected a string, got {_describe(value)}")
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise TypeError(f"expected an integer, got {_describe(value)}")
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    raise TypeError(f"expected a number, got {_describe(value)}")
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+    raise TypeError(f"expected a boolean, got {_describe(value)}")
+
+
+_SCALAR_CONVERTERS: Dict[Any, Converter] = {
+    str: _to_str,
+    int: _to_int,
+    float: _to_float,
+    bool: _to_bool,
+    Any: lambda value: value,
+}
+
+
+def _compile_type(tp: Any) -> Converter:
+    """Build a converter function for a type annotation."""
+    if tp in _SCALAR_CONVERTERS:
+        return _SCALAR_CONVERTERS[tp]
+
+    origin = get_origin(tp)
+    args = get_args(tp)
+
+    if origin is Union:
+        options = [arg for arg in args if arg is not type(None)]
+        inner = _compile_type(options[0]) if len(options) == 1 else _compile_union(options)
+        if len(options) == len(args):
+            return inner
+
+        def optional(value: Any) -> Any:
+            return None if value is None else inner(value)
+        return optional
+
+    if origin in (list, List):
+        item = _compile_type(args[0]) if args else _SCALAR_CONVERTERS[Any]
+
+        def to_list(value: Any) -> list:
+            if not isinstance(value, list):
+                raise TypeError(f"expected a list, got {_describe(value)}")
+            return [item(element) for element in value]
+        return to_list
+
+    if origin in (dict, Dict):
+        def to_dict(value: Any) -> dict:
+            if not isinstance(value, dict):
+                raise TypeError(f"expected an object, got {_describe(value)}")
+            return value
+        return to_dict
+
+    raise TypeError(f"Unsupported argument type in tool schema: {tp!r}")
+
+
+def _compile_union(options: List[Any]) -> Converter:
+    converters = [_compile_type(option) for option in options]
+
+    def union(value: Any) -> Any:
+        for converter in converters:
+            try:
+                return converter(value)
+            except TypeError:
+                continue
+        raise TypeError(f"unexpected value {_describe(value)}")
+    return union
+
+
+class ArgumentValidator:
+    """
+    Validates and coerces an arguments dict into a schema instance.
+    """
+
+    def __init__(self, schema: type) -> None:
+        if not dataclasses.is_dataclass(schema):
+            raise TypeError(f"Tool argument schema must be a dataclass, got {schema!r}")
+
+        self.schema = schema
+        hints = get_type_hints(schema)
+        self._fields: List[Tuple[str, Converter, bool]] = []
+        for field in dataclasses.fields(schema):
+            if not field.init:
+                continue
+            required = field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+            self._fields.append((field.name, _compile_type(hints[field.name]), required))
+        self._names = frozenset(name for name, _, _ in self._fields)
+
+    def __call__(self, arguments: Optional[Dict[str, Any]]) -> Any:
+        """
+        Validate the arguments of a tool call.
+
+        Returns:
+            An instance of the schema dataclass.
+
+        Raises:
+            ArgumentValidationError: Listing every problem found.
+        """
+        if arguments is None:
+            arguments = {}
+        if not isinstance(arguments, dict):
+            raise ArgumentValidationError([f"arguments must be an object, got {_describe(arguments)}"])
+
+        errors = [f"unexpected argument '{name}'" for name in arguments if name not in self._names]
+        values = {}
+        for name, converter, required in self._fields:
+            if name not in arguments:
+                if required:
+                    errors.append(f"missing required argument '{name}'")
+                continue
+            try:
+                values[name] = converter(arguments[name])
+            except TypeError as e:
+                errors.append(f"'{name}' {e}")
+
+        if errors:
+            raise ArgumentValidationError(errors)
+        return self.schema(**values)
+
+
+def compile_schema(schema: type) -> ArgumentValidator:
+    """Compile a dataclass schema into an argument validator."""
+    return ArgumentValidator(schema)
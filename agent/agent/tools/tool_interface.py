@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import Any
+from agent.tools.schema import ArgumentValidator, NoArguments, compile_schema
 
 
 class Tool(ABC):
@@ -9,19 +10,37 @@ class Tool(ABC):
     NAME: str
     INPUT_FORMAT: str
     DESCRIPTION: str
+    ARGS_SCHEMA: type = NoArguments
+
+    # Compiled from ARGS_SCHEMA when the tool class is defined
+    validator: ArgumentValidator = compile_schema(NoArguments)
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "ARGS_SCHEMA" in cls.__dict__:
+            cls.validator = compile_schema(cls.ARGS_SCHEMA)
+        if "NAME" not in cls.__dict__:
+            # The metadata of the built-in tools is kept in their manifests (see AVAILABLE_TOOLS)
+            from agent.tools import manifest_for
+
+            manifest = manifest_for(cls)
+            if manifest is not None:
+                cls.NAME = manifest.name
+                cls.DESCRIPTION = manifest.description
+                cls.INPUT_FORMAT = manifest.input_format
        
     def __init__(self, config) -> None:
         self.config = config
     
     @abstractmethod
-    def execute(self, arguments_json: str) -> Any:
+    def execute(self, arguments: Any) -> Any:
         """
         Executes the tool logic.
         
         Args:
-            arguments_json: A JSON string containing the arguments.
+            arguments: An instance of ARGS_SCHEMA, already validated by `validator`.
             
         Returns:
             The result of the tool execution (Any serializable type).
         """
-        pass
\ No newline at end of file
+        pass
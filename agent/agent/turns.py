@@ -0,0 +1,223 @@
+"""Agent turn executor.
+
+Every turn against the LLM chat session (a user utterance, an event alert,
+a background task) goes through one `TurnExecutor`, which runs them one at
+a time on its own thread, so two conversations never interleave on the
+session.
+
+Scheduling rules:
+
+- Turns run by kind: user turns first (someone is waiting for the answer),
+  then alerts, then background tasks; in submission order within a kind.
+- A user turn or an alert preempts a running background turn: its
+  `preempted` event is set and the task is expected to stop at the next
+  convenient point.
+- Alerts with the same key are coalesced into one turn.
+- During a conversation, alerts are not spoken over the user: they are held
+  for at most `max_alert_delay` seconds. A user turn starting in the
+  meantime takes their notes and delivers them in its answer, otherwise
+  they run on their own when the delay expires or the conversation ends.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("AgentTurns")
+
+# Lower values run first
+TURN_USER = 0
+TURN_ALERT = 1
+TURN_BACKGROUND = 2
+
+TURN_NAMES = {TURN_USER: "user", TURN_ALERT: "alert", TURN_BACKGROUND: "background"}
+
+
+@dataclass
+class Turn:
+    """A unit of work against the chat session."""
+    kind: int
+    run: Callable[["Turn"], Any]
+    sequence: int
+    submitted_at: float
+    not_before: float = 0.0            # Held until this time
+    key: Optional[str] = None          # Turns with the same key are coalesced
+    note: Optional[str] = None         # What a user turn should mention instead of running this one
+    notes: List[str] = field(default_factory=list)  # Notes taken from the alerts folded into this turn
+    preempted: threading.Event = field(default_factory=threading.Event)
+    future: Future = field(default_factory=Future)
+    # Context of the submitter (e.g. its trace), the turn runs in it
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Wait for the turn to run and return its result (None for a folded alert)."""
+        return self.future.result(timeout)
+
+
+class TurnExecutor:
+    """
+    Runs agent turns one at a time, by priority.
+    """
+
+    def __init__(self, max_alert_delay: float = 10.0, clock: Callable[[], float] = time.monotonic,
+                 history: int = 200) -> None:
+        """
+        Args:
+            max_alert_delay: Longest time an alert is held during a conversation.
+            clock: Time source of the scheduling.
+            history: Number of waits kept per kind for `metrics`.
+        """
+        self.max_alert_delay = max_alert_delay
+        self.clock = clock
+        self._pending: List[Turn] = []
+        self._running: Optional[Turn] = None
+        self._sequence = 0
+        self._conversations = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # Seconds between submission and start, per kind
+        self.waits: Dict[int, Deque[float]] = {kind: deque(maxlen=history) for kind in TURN_NAMES}
+
+    def start(self) -> "TurnExecutor":
+        with self._condition:
+            if self._thread is None:
+                self._closed = False
+                self._thread = threading.Thread(target=self._work, name="agent-turns", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Cancel the pending turns and stop after the running one."""
+        with self._condition:
+            self._closed = True
+            pending, self._pending = self._pending, []
+            self._condition.notify_all()
+        for turn in pending:
+            turn.future.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def submit(self, kind: int, run: Callable[[Turn], Any], key: Optional[str] = None,
+               note: Optional[str] = None) -> Turn:
+        """
+        Queue a turn.
+
+        Args:
+            kind: TURN_USER, TURN_ALERT or TURN_BACKGROUND.
+            run: Called with the turn on the executor thread, its return
+                value is the result of the turn.
+            key: Coalescing key, a pending or running turn with the same key
+                is returned instead of queuing a new one.
+            note: For alerts, the note a user turn delivers instead of running
+                this turn (see `conversation`).
+
+        Returns:
+            The turn, wait on it with `result`.
+        """
+        self.start()
+        with self._condition:
+            if key is not None:
+                for turn in self._pending + ([self._running] if self._running else []):
+                    if turn.key == key:
+                        logger.debug(f"Coalesced {TURN_NAMES[kind]} turn '{key}'")
+                        return turn
+
+            now = self.clock()
+            self._sequence += 1
+            turn = Turn(kind, run, self._sequence, now, key=key, note=note)
+            if kind == TURN_ALERT and self._conversations:
+                turn.not_before = now + self.max_alert_delay
+            self._pending.append(turn)
+
+            running = self._running
+            if running is not None and running.kind == TURN_BACKGROUND and kind < running.kind:
+                logger.info(f"Preempting the background turn for a {TURN_NAMES[kind]} turn")
+                running.preempted.set()
+            self._condition.notify_all()
+        return turn
+
+    @contextmanager
+    def conversation(self) -> Iterator[None]:
+        """Hold the alerts while a conversation is going on (see the module docstring)."""
+        with self._condition:
+            self._conversations += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._conversations -= 1
+                if not self._conversations:
+                    # Nobody is talking anymore, deliver the held alerts now
+                    now = self.clock()
+                    for turn in self._pending:
+                        turn.not_before = min(turn.not_before, now)
+                self._condition.notify_all()
+
+    def _next(self) -> Optional[Turn]:
+        """The next turn to run, waiting for it. None once stopped."""
+        with self._condition:
+            while not self._closed:
+                now = self.clock()
+                ready = [turn for turn in self._pending if turn.not_before <= now]
+                if ready:
+                    turn = min(ready, key=lambda turn: (turn.kind, turn.sequence))
+                    self._pending.remove(turn)
+                    if turn.kind == TURN_USER:
+                        self._fold_alerts(turn)
+                    self._running = turn
+                    return turn
+                held = [turn.not_before for turn in self._pending]
+                self._condition.wait(min(held) - now if held else None)
+            return None
+
+    def _fold_alerts(self, user_turn: Turn) -> None:
+        """Hand the notes of the held alerts to a user turn."""
+        for turn in [turn for turn in self._pending if turn.kind == TURN_ALERT and turn.note is not None]:
+            self._pending.remove(turn)
+            if not turn.future.set_running_or_notify_cancel():
+                continue
+            user_turn.notes.append(turn.note)
+            self.waits[TURN_ALERT].append(self.clock() - turn.submitted_at)
+            turn.future.set_result(None)
+
+    def _work(self) -> None:
+        while True:
+            turn = self._next()
+            if turn is None:
+                return
+            try:
+                if not turn.future.set_running_or_notify_cancel():
+                    continue
+                self.waits[turn.kind].append(self.clock() - turn.submitted_at)
+                try:
+                    turn.future.set_result(turn.context.run(turn.run, turn))
+                except BaseException as e:
+                    logger.error(f"{TURN_NAMES[turn.kind].capitalize()} turn failed: {e}")
+                    turn.future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running = None
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Scheduling statistics.
+
+        Returns:
+            Pending turns, and the mean and max wait before a turn started
+            (or an alert was folded into a user turn), per kind.
+        """
+        with self._condition:
+            result: Dict[str, float] = {"pending": len(self._pending)}
+        for kind, waits in self.waits.items():
+            name = TURN_NAMES[kind]
+            result[f"{name}_wait_mean"] = sum(waits) / len(waits) if waits else 0.0
+            result[f"{name}_wait_max"] = max(waits, default=0.0)
+        return result
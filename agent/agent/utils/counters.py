@@ -0,0 +1,43 @@
+"""Always-on counters of the hot paths.
+
+The hot loops count their work in the process-wide `COUNTERS`:
+
+    COUNTERS.increment("stt.accept_waveform")
+
+An increment is a dictionary update under a lock, cheap enough for the
+audio loops, so the counters stay enabled in the field. They are read with
+`snapshot`, e.g. through the profiler's control socket.
+"""
+
+import threading
+from typing import Dict
+
+
+class Counters:
+    """
+    Named, monotonically increasing counters.
+    """
+
+    def __init__(self) -> None:
+        self._values: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name: str) -> int:
+        return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        """A copy of all the counters."""
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+# Shared by the whole process
+COUNTERS = Counters()
@@ -0,0 +1,227 @@
+"""Extraction of JSON objects from free-form LLM replies.
+
+LLM replies are supposed to be a single raw JSON object, but in practice they
+come wrapped in prose or code fences, contain more than one object, or carry
+small syntax slips (trailing commas, single quotes, a truncated tail). This
+module finds the top-level objects with a balanced-brace scanner and applies
+local repairs, so a malformed reply rarely costs another LLM round trip.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Characters the scanner has to look at, everything else is skipped in bulk
+_SPECIAL_CHARS = re.compile(r"[{}\[\]\"'\\]")
+_CODE_FENCE = re.compile(r"```[a-zA-Z]*[ \t]*\n?(.*?)```", flags=re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JsonObjectScanner:
+    """
+    Incremental balanced-brace scanner for top-level JSON objects.
+
+    Text can be fed in chunks (e.g. as it is streamed from the LLM). Quotes
+    are only tracked inside an object, so apostrophes in surrounding prose
+    do not confuse the scanner.
+    """
+
+    def __init__(self) -> None:
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._quote: Optional[str] = None
+        self._escape = False
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Scan the next chunk of text.
+
+        Returns:
+            The top-level objects completed by this chunk, as raw strings.
+        """
+        completed = []
+        start = 0 if self._depth else None
+        escaped_position = 0 if self._escape else -1
+        self._escape = False
+
+        for match in _SPECIAL_CHARS.finditer(text):
+            position = match.start()
+            if position == escaped_position:
+                continue
+            char = match.group()
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    start = position
+                continue
+
+            if self._quote:
+                if char == "\\":
+                    escaped_position = position + 1
+                    self._escape = escaped_position == len(text)
+                elif char == self._quote:
+                    self._quote = None
+                continue
+
+            if char in "\"'":
+                self._quote = char
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buffer.append(text[start:position + 1])
+                    completed.append("".join(self._buffer))
+                    self._buffer = []
+                    start = None
+
+        if self._depth and start is not None:
+            self._buffer.append(text[start:])
+        return completed
+
+    def pending(self) -> Optional[str]:
+        """Return the unterminated object at the end of the input, if any."""
+        if not self._depth:
+            return None
+        return "".join(self._buffer)
+
+
+def find_json_objects(text: str) -> List[str]:
+    """
+    Find the candidate JSON objects in a reply, in order of appearance.
+
+    Content of code fences is scanned first. An unterminated object at the end
+    of the reply is returned last, so it can still be repaired.
+    """
+    sections = _CODE_FENCE.findall(text) + [text]
+    candidates: List[str] = []
+    for section in sections:
+        scanner = JsonObjectScanner()
+        found = scanner.feed(section)
+        pending = scanner.pending()
+        if pending:
+            found.append(pending)
+        candidates.extend(c for c in found if c not in candidates)
+    return candidates
+
+
+def repair_json(candidate: str) -> str:
+    """
+    Apply local repairs to a raw JSON object.
+
+    Handles single-quoted strings, raw newlines inside strings, trailing
+    commas, and unterminated strings, arrays and objects.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    quote: Optional[str] = None
+    index = 0
+    length = len(candidate)
+
+    while index < length:
+        char = candidate[index]
+        if quote:
+            if char == "\\" and index + 1 < length:
+                following = candidate[index + 1]
+                # \' is not a valid JSON escape
+                out.append(following if following == "'" else char + following)
+                index += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote = None
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            elif char == "\\":
+                out.append("\\\\")
+            else:
+                out.append(char)
+        elif char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in "{[":
+            stack.append(char)
+            out.append(char)
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(char)
+        else:
+            out.append(char)
+        index += 1
+
+    if quote:
+        out.append('"')
+    _strip_trailing_comma(out)
+    if "".join(out).rstrip().endswith(":"):
+        out.append(" null")
+    for opener in reversed(stack):
+        _strip_trailing_comma(out)
+        out.append(_CLOSERS[opener])
+    return "".join(out)
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    """Remove a trailing comma (and the whitespace after it) from the output."""
+    tail = []
+    while out and out[-1].isspace():
+        tail.append(out.pop())
+    if out and out[-1] == ",":
+        out.pop()
+    else:
+        out.extend(reversed(tail))
+
+
+def extract_json(text: str, preferred_keys: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Extract a JSON object from an LLM reply, repairing it if needed.
+
+    Args:
+        text: The raw LLM reply.
+        preferred_keys: When several objects are found, the first one that has
+            any of these keys wins. Otherwise the first object wins.
+
+    Returns:
+        The parsed object.
+
+    Raises:
+        ValueError: If no object could be parsed, even after repair.
+    """
+    preferred_keys = tuple(preferred_keys)
+    parsed: List[Dict[str, Any]] = []
+    errors: List[str] = []
+
+    for candidate in find_json_objects(text):
+        result = _loads_object(candidate, errors)
+        if result is None:
+            repaired = repair_json(candidate)
+            result = _loads_object(repaired, errors)
+            if result is not None:
+                logger.debug("JSON object parsed after local repair")
+        if result is None:
+            continue
+        if not preferred_keys or any(key in result for key in preferred_keys):
+            return result
+        parsed.append(result)
+
+    if parsed:
+        return parsed[0]
+    if not errors:
+        raise ValueError("Could not find json data in LLM response")
+    raise ValueError(f"JSON parsing failed! invalid LLM response ({errors[-1]})")
+
+
+def _loads_object(candidate: str, errors: List[str]) -> Optional[Dict[str, Any]]:
+    try:
+        result = json.loads(candidate)
+    except json.JSONDecodeError as e:
+        errors.append(str(e))
+        return None
+    return result if isinstance(result, dict) else None
@@ -0,0 +1,256 @@
+"""Runtime-toggleable sampling profiler.
+
+`SamplingProfiler` samples the stacks of every thread (`sys._current_frames`)
+from a daemon thread, a few hundred times a second, and aggregates them as
+folded stacks, one line per distinct stack, the format flame graph tools
+read (flamegraph.pl, speedscope, inferno):
+
+    MainThread;main (main.py:60);run (runtime.py:157) 12
+
+Nothing runs while it is off, so it can stay installed on field devices and
+be switched on when the assistant feels sluggish:
+
+- `install_signal_toggle`: SIGUSR1 starts it, the next SIGUSR1 stops it and
+  writes the profile.
+- `ControlServer`: a unix socket taking one command per connection
+  (`start`, `stop`, `status`, `counters`), e.g.
+  `echo stop | socat - UNIX-CONNECT:/tmp/buddy-profiler.sock`.
+
+Both only see the process they run in. The control socket forwards its
+commands to the other processes it is given (the speech worker of
+`--multiprocess`, which runs Vosk), their profiles are written next to the
+main one and their counters are reported with their name as a prefix. The
+signal is not forwarded: send it to the worker's pid too.
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+from agent.utils.counters import COUNTERS, Counters
+
+logger = logging.getLogger("Profiler")
+
+COMMANDS = ("start", "stop", "status", "counters")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of all threads while enabled.
+    """
+
+    def __init__(self, interval: float = 0.005, output_dir: str = ".", max_depth: int = 64,
+                 name: str = "profile") -> None:
+        """
+        Args:
+            interval: Seconds between samples.
+            output_dir: Where `stop` writes the folded stacks.
+            max_depth: Innermost frames kept per stack.
+            name: Prefix of the written files.
+        """
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_depth = max_depth
+        self.name = name
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._labels: Dict[object, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> bool:
+        """Start sampling, with an empty profile. False if already running."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self.samples = Counter()
+            self.sample_count = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        logger.info(f"Profiling every {self.interval * 1000:.0f} ms")
+        return True
+
+    def stop(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Stop sampling and write the folded stacks.
+
+        Args:
+            path: Output file, by default a timestamped file in output_dir.
+
+        Returns:
+            The written file, None if the profiler was not running.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return None
+            self._stop.set()
+        thread.join()
+        path = path or os.path.join(self.output_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.folded())
+        logger.info(f"Wrote {self.sample_count} samples to {path}")
+        return path
+
+    def toggle(self) -> Optional[str]:
+        """Start, or stop and return the written file."""
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def folded(self) -> str:
+        """The profile as folded stacks, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def sample(self) -> None:
+        """Record the current stack of every other thread."""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    label = self._labels[code] = _frame_label(code)
+                labels.append(label)
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            self.samples[";".join(reversed(labels))] += 1
+        self.sample_count += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+
+def install_signal_toggle(profiler: SamplingProfiler, signum: int = signal.SIGUSR1) -> None:
+    """Toggle the profiler on a signal (main thread only)."""
+    def handle(received, frame) -> None:
+        # Writing the profile joins the sampler, not from the signal handler
+        threading.Thread(target=profiler.toggle, name="profiler-toggle", daemon=True).start()
+
+    signal.signal(signum, handle)
+
+
+def run_command(profiler: SamplingProfiler, counters: Counters, command: str) -> Tuple[bool, str]:
+    """Run a control command in this process, returns whether it succeeded and the reply."""
+    if command == "start":
+        started = profiler.start()
+        return started, "started" if started else "already running"
+    if command == "stop":
+        path = profiler.stop()
+        return path is not None, path or "not running"
+    if command == "status":
+        state = "running" if profiler.running else "stopped"
+        return True, f"{state}, {profiler.sample_count} samples"
+    if command == "counters":
+        return True, json.dumps(counters.snapshot(), sort_keys=True)
+    return False, f"unknown command '{command}' ({', '.join(COMMANDS)})"
+
+
+# Runs a command in another process: its (success, reply), None when unreachable
+RemoteControl = Callable[[str], Optional[Tuple[bool, str]]]
+
+
+class ControlServer:
+    """
+    Local control socket of the profiler, on a daemon thread.
+    """
+
+    def __init__(self, profiler: SamplingProfiler, path: str, counters: Counters = COUNTERS,
+                 remotes: Optional[Dict[str, RemoteControl]] = None, timeout: float = 2.0) -> None:
+        """
+        Args:
+            profiler: The profiler of this process.
+            path: Path of the unix socket.
+            counters: The counters of this process.
+            remotes: Other processes the commands are forwarded to, by name.
+            timeout: Seconds a client has to send its command.
+        """
+        self.profiler = profiler
+        self.path = path
+        self.counters = counters
+        self.remotes = remotes or {}
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ControlServer":
+        if self._socket is None:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.bind(self.path)
+            # Local users of the device only
+            os.chmod(self.path, 0o600)
+            self._socket.listen(4)
+            self._thread = threading.Thread(target=self._serve, args=(self._socket,), name="profiler-control",
+                                            daemon=True)
+            self._thread.start()
+            logger.info(f"Profiler control socket at {self.path}")
+        return self
+
+    def stop(self) -> None:
+        listener, self._socket = self._socket, None
+        if listener is None:
+            return
+        listener.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def handle(self, command: str) -> Tuple[bool, str]:
+        """Run a command here and in the remotes, returns whether it succeeded and the reply."""
+        if command not in COMMANDS:
+            return run_command(self.profiler, self.counters, command)
+        if command == "counters":
+            values = self.counters.snapshot()
+            for name, remote in self.remotes.items():
+                answer = remote(command)
+                if answer is not None and answer[0]:
+                    values.update({f"{name}.{counter}": value for counter, value in json.loads(answer[1]).items()})
+            return True, json.dumps(values, sort_keys=True)
+
+        ok, reply = run_command(self.profiler, self.counters, command)
+        for name, remote in self.remotes.items():
+            remote_ok, remote_reply = remote(command) or (False, "unreachable")
+            ok = ok or remote_ok
+            reply += f"; {name}: {remote_reply}"
+        return ok, reply
+
+    def _serve(self, listener: socket.socket) -> None:
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                # Closed by stop
+                return
+            with connection:
+                try:
+                    # A client that never sends its command does not block the others
+                    connection.settimeout(self.timeout)
+                    command = connection.recv(1024).decode("utf-8", errors="replace").strip()
+                    ok, reply = self.handle(command)
+                    connection.sendall(f"{'ok' if ok else 'error'}: {reply}\n".encode("utf-8"))
+                except OSError as e:
+                    logger.warning(f"Profiler control connection failed: {e}")
@@ -0,0 +1,206 @@
+"""Startup profiling and background initialization.
+
+`StartupProfiler` breaks the startup time down by import (through an import
+hook) and by named sections such as model loads. `BackgroundLoader` runs the
+heavy initialization steps in parallel threads, so the wake-word listener can
+start while the remaining models are still loading.
+"""
+
+import importlib.abc
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("Startup")
+
+
+@dataclass
+class Section:
+    """A timed startup step."""
+    name: str
+    start: float       # Seconds since the profiler was created
+    duration: float
+    thread: str
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder that times every module execution.
+
+    It does not find anything itself, it wraps the loader found by the
+    remaining finders and measures `exec_module`.
+    """
+
+    def __init__(self, profiler: "StartupProfiler") -> None:
+        self._profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self, fullname)
+        return spec
+
+    def _timed_exec(self, fullname: str, exec_module: Callable[[Any], None], module: Any) -> None:
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            exec_module(module)
+        finally:
+            self._local.depth = depth
+            self._profiler._record_import(fullname, time.perf_counter() - start, depth == 0)
+
+
+class _TimedLoader:
+    """Delegates to the real loader, timing `exec_module`."""
+
+    def __init__(self, loader: Any, timer: _ImportTimer, fullname: str) -> None:
+        self._loader = loader
+        self._timer = timer
+        self._fullname = fullname
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def exec_module(self, module: Any) -> None:
+        self._timer._timed_exec(self._fullname, self._loader.exec_module, module)
+
+
+class StartupProfiler:
+    """
+    Records where the startup time goes.
+    """
+
+    def __init__(self) -> None:
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._imports: Dict[str, float] = {}
+        self._sections: List[Section] = []
+        self._marks: Dict[str, float] = {}
+        self._import_timer: Optional[_ImportTimer] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def enable_import_timing(self) -> None:
+        """Time all the imports from now on."""
+        if self._import_timer is None:
+            self._import_timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._import_timer)
+
+    def disable_import_timing(self) -> None:
+        if self._import_timer is not None:
+            sys.meta_path.remove(self._import_timer)
+            self._import_timer = None
+
+    def _record_import(self, module_name: str, duration: float, outermost: bool) -> None:
+        # Only the outermost import is counted, it includes its dependencies
+        if outermost:
+            package = module_name.split(".")[0]
+            with self._lock:
+                self._imports[package] = self._imports.get(package, 0.0) + duration
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Time a block of startup work (e.g. a model load)."""
+        start = self.elapsed()
+        try:
+            yield
+        finally:
+            section = Section(name, start, self.elapsed() - start, threading.current_thread().name)
+            with self._lock:
+                self._sections.append(section)
+
+    def mark(self, name: str) -> float:
+        """Record a milestone (e.g. "listening") and return its time."""
+        elapsed = self.elapsed()
+        with self._lock:
+            self._marks.setdefault(name, elapsed)
+        return elapsed
+
+    def report(self, top: int = 15) -> str:
+        """Format the collected timings."""
+        with self._lock:
+            imports = sorted(self._imports.items(), key=lambda item: item[1], reverse=True)[:top]
+            sections = sorted(self._sections, key=lambda s: s.start)
+            marks = sorted(self._marks.items(), key=lambda item: item[1])
+
+        lines = ["===== Startup profile ====="]
+        lines.append("Imports (inclusive, by top-level package):")
+        lines.extend(f"  {name:<32} {duration * 1000:9.1f} ms" for name, duration in imports)
+        lines.append("Sections:")
+        lines.extend(
+            f"  {s.name:<32} {s.duration * 1000:9.1f} ms  (at {s.start:6.2f}s, {s.thread})"
+            for s in sections
+        )
+        lines.append("Milestones:")
+        lines.extend(f"  {name:<32} {at:9.2f} s" for name, at in marks)
+        uptime = _system_uptime()
+        if uptime is not None:
+            lines.append(f"System uptime now: {uptime:.1f} s")
+        return "\n".join(lines)
+
+
+def _system_uptime() -> Optional[float]:
+    """Seconds since power-on, where the OS exposes it."""
+    try:
+        with open("/proc/uptime", "r") as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class BackgroundLoader:
+    """
+    Runs initialization steps in parallel daemon threads.
+    """
+
+    def __init__(self, profiler: Optional[StartupProfiler] = None) -> None:
+        self.profiler = profiler or StartupProfiler()
+        self._futures: Dict[str, Future] = {}
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Start `fn` in a background thread, timed as a profiler section."""
+        future: Future = Future()
+
+        def run() -> None:
+            try:
+                with self.profiler.section(name):
+                    result = fn(*args, **kwargs)
+            except BaseException as e:
+                logger.error(f"Background initialization '{name}' failed: {e}")
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        self._futures[name] = future
+        threading.Thread(target=run, name=f"init-{name}", daemon=True).start()
+        return future
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Wait for a step and return its result."""
+        return self._futures[name].result(timeout)
+
+    def wait_all(self, timeout: Optional[float] = None) -> None:
+        for future in list(self._futures.values()):
+            future.exception(timeout)
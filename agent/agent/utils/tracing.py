@@ -0,0 +1,289 @@
+"""Turn latency tracing.
+
+Every interaction (a user turn, an alert) is recorded as a trace: a timeline
+of spans (timed stages: speech-to-text, each LLM call, each tool) and events
+(instants: wake word, first partial, end of speech, first LLM token, first
+TTS chunk, end of playback), in seconds since the trace started.
+
+The pipeline reports to the process-wide `TRACER`:
+
+    TRACER.start_trace("turn")
+    with TRACER.span("llm_call"):
+        ...
+    TRACER.event("llm_first_token")
+    TRACER.end_trace()
+
+The current trace is a context variable: each thread has its own, and work
+handed to another thread carries it along where the pipeline copies the
+context (the turns of the `TurnExecutor`, speculative LLM requests), so an
+alert or the event poller never reports into the user's trace.
+
+Finished traces go to a rotating JSONL file (`TracingSink`), and every stage
+keeps a window of recent values for p50/p95/p99, served in the Prometheus
+text format by `MetricsServer`. Derived stages measure what the user feels:
+`response_latency` is the time from the end of speech to the first audio.
+The components' own `metrics()` (the runtime, the turn executor, TTS, the
+endpointer, the presence camera) are served next to them as gauges.
+"""
+
+import json
+import logging
+import logging.handlers
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("Tracing")
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Derived stages: (name, from event, to event)
+DERIVED_STAGES = [
+    ("response_latency", "end_of_speech", "tts_first_chunk"),
+    ("time_to_first_token", "end_of_speech", "llm_first_token"),
+    ("wake_to_first_partial", "wake_word", "first_partial"),
+]
+
+
+@dataclass
+class Span:
+    """A timed stage of a trace."""
+    name: str
+    start: float                    # Seconds since the trace started
+    duration: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    """The timeline of one interaction."""
+    name: str
+    started_at: float               # Wall-clock time, for the logs
+    spans: List[Span] = field(default_factory=list)
+    events: Dict[str, float] = field(default_factory=dict)  # First occurrence, seconds since the start
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["_start"]
+        return data
+
+
+class TracingSink:
+    """
+    Rotating JSONL file of finished traces.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024, backups: int = 3) -> None:
+        self.path = path
+        self._handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                             encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def write(self, trace: Trace) -> None:
+        record = logging.LogRecord("Tracing.Sink", logging.INFO, self.path, 0,
+                                   json.dumps(trace.to_dict()), None, None)
+        self._handler.handle(record)
+
+    def close(self) -> None:
+        self._handler.close()
+
+
+class Tracer:
+    """
+    Records the traces of the interactions and per-stage latency statistics.
+    """
+
+    def __init__(self, window: int = 500) -> None:
+        """
+        Args:
+            window: Values kept per stage for the quantiles.
+        """
+        self.window = window
+        self._current: ContextVar[Optional[Trace]] = ContextVar(f"trace-{id(self)}", default=None)
+        self.sinks: List[TracingSink] = []
+        self._stages: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._sums: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, stage: str, value: float) -> None:
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+                self._sums[stage] = 0.0
+            self._stages[stage].append(value)
+            self._counts[stage] += 1
+            self._sums[stage] += value
+
+    @property
+    def current(self) -> Optional[Trace]:
+        """The trace of the calling context."""
+        return self._current.get()
+
+    def start_trace(self, name: str = "turn") -> Trace:
+        """Start a new trace, ending the current one."""
+        self.end_trace()
+        trace = Trace(name, time.time())
+        self._current.set(trace)
+        return trace
+
+    @contextmanager
+    def trace(self, name: str) -> Iterator[Trace]:
+        """
+        Record the block as a trace of its own, apart from the current one,
+        which is neither ended nor changed and is current again afterwards.
+        """
+        trace = Trace(name, time.time())
+        token = self._current.set(trace)
+        try:
+            yield trace
+        finally:
+            self.end_trace()
+            self._current.reset(token)
+
+    def ensure_trace(self, name: str = "turn") -> Trace:
+        """The current trace, or a new one."""
+        return self.current or self.start_trace(name)
+
+    def end_trace(self) -> Optional[Trace]:
+        """Finish the current trace: record its derived stages and write it to the sinks."""
+        trace = self._current.get()
+        self._current.set(None)
+        if trace is None:
+            return None
+        for stage, start, end in DERIVED_STAGES:
+            if start in trace.events and end in trace.events and trace.events[end] >= trace.events[start]:
+                self._record(stage, trace.events[end] - trace.events[start])
+        self._record(trace.name, trace.elapsed())
+        for sink in self.sinks:
+            try:
+                sink.write(trace)
+            except OSError as e:
+                logger.warning(f"Cannot write the trace: {e}")
+        return trace
+
+    def event(self, name: str) -> None:
+        """Mark an instant of the current trace (only its first occurrence is kept)."""
+        trace = self.current
+        if trace is not None and name not in trace.events:
+            trace.events[name] = trace.elapsed()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a stage. Yields its attributes, which can be extended inside the block.
+        """
+        trace = self.current
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            duration = time.perf_counter() - start
+            self._record(name, duration)
+            if trace is not None:
+                trace.spans.append(Span(name, start - trace._start, duration, attributes))
+
+    def quantiles(self) -> Dict[str, Tuple[Dict[float, float], int, float]]:
+        """Per stage: the quantiles of the recent values, the total count and sum."""
+        with self._lock:
+            stages = {stage: (sorted(values), self._counts[stage], self._sums[stage])
+                      for stage, values in self._stages.items()}
+        result = {}
+        for stage, (values, count, total) in stages.items():
+            quantiles = {q: values[min(len(values) - 1, int(q * len(values)))] for q in QUANTILES}
+            result[stage] = (quantiles, count, total)
+        return result
+
+    def prometheus(self, prefix: str = "buddy") -> str:
+        """The stage statistics in the Prometheus text exposition format."""
+        lines = [f"# HELP {prefix}_stage_seconds Latency of the interaction stages.",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        for stage, (quantiles, count, total) in sorted(self.quantiles().items()):
+            for quantile, value in quantiles.items():
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def prometheus_gauges(sources: Dict[str, Callable[[], Dict[str, float]]], prefix: str = "buddy") -> str:
+    """
+    The values of `metrics()` callables as Prometheus gauges, named
+    {prefix}_{source}_{metric}. A failing source is skipped.
+    """
+    lines = []
+    for source, metrics in sources.items():
+        try:
+            values = metrics()
+        except Exception as e:
+            logger.warning(f"Metrics of '{source}' unavailable: {e}")
+            continue
+        for metric, value in values.items():
+            name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{source}_{metric}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {float(value):.6g}")
+    return "".join(line + "\n" for line in lines)
+
+
+class MetricsServer:
+    """
+    Serves the tracer's statistics, and the metrics of the registered
+    components, at /metrics over HTTP, on a daemon thread.
+    """
+
+    def __init__(self, tracer: Tracer, port: int = 9464, host: str = "127.0.0.1") -> None:
+        # Name -> metrics() of a component, see add_source
+        self.sources: Dict[str, Callable[[], Dict[str, float]]] = {}
+        sources = self.sources
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = (tracer.prometheus() + prometheus_gauges(sources)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def add_source(self, name: str, metrics: Callable[[], Dict[str, float]]) -> "MetricsServer":
+        """Export the values returned by `metrics` (read on every scrape)."""
+        self.sources[name] = metrics
+        return self
+
+    def start(self) -> "MetricsServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+            self._thread.start()
+            logger.info(f"Serving metrics at http://{self.server.server_address[0]}:{self.port}/metrics")
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread = None
+        self.server.server_close()
+
+
+# Shared by the whole pipeline
+TRACER = Tracer()
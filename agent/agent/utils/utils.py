@@ -1,26 +1,15 @@
-import re
-import json
 import logging
 
+from agent.utils.json_extract import extract_json
+
 logger = logging.getLogger(__name__)
 
-JSON_REGEX = re.compile("\{.*\}", flags=re.DOTALL)
+# Keys that identify the agent protocol object when a reply holds several objects
+PROTOCOL_KEYS = ("thought", "response", "tool_calls")
 
 def parse_llm_response(message):
-    # Find json data in response
-    logger.debug("Finding json regex in llm response")
-    match = re.search(JSON_REGEX, message)
-    if not match:
-        raise ValueError("Could not find json data in LLM response")
-    json_data = match.group()
-
-    logger.debug(f"Found match of length {len(json_data)}")
-
-    # Parse json data
-    logger.debug("Parsing json data")
-    try:
-        result = json.loads(json_data)
-        logger.debug("Response parsed successfully!")
-        return result
-    except json.JSONDecodeError as e:
-        raise ValueError("JSON parsing failed! invalid LLM response")
+    # Find json data in response, repairing small format slips locally
+    logger.debug("Extracting json object from llm response")
+    result = extract_json(message, preferred_keys=PROTOCOL_KEYS)
+    logger.debug("Response parsed successfully!")
+    return result
@@ -0,0 +1,206 @@
+"""Multi-room capture.
+
+One microphone per room, each with its own capture thread, ring buffer and
+wake-word recognizer. The recognizers come from the one shared Vosk model
+(see `MODEL_REGISTRY`), so a room costs a capture thread, a ten-second
+buffer and a small grammar recognizer, not another copy of the stack.
+
+When several rooms hear the wake phrase, the detections arriving within a
+short arbitration window are compared and the room that heard it most
+clearly (loudest relative to its own noise floor) gets the conversation:
+the single `AgentFlow` listens to that room's capture.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from agent.agent.flow import AgentFlow
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.audio_source import AudioSource
+from agent.utils.tracing import TRACER
+from buddy.hey_buddy_detector import WakeWordEngine
+
+logger = logging.getLogger("CaptureManager")
+
+
+@dataclass
+class Room:
+    """A microphone and its wake-word detector."""
+    name: str
+    capture: AudioCaptureService
+    detector: WakeWordEngine
+
+
+@dataclass
+class Detection:
+    """The wake phrase heard in a room."""
+    room: Room
+    position: int        # Capture position right after the wake phrase
+    score: float         # How clearly it was heard
+    detected_at: float   # Monotonic time of the detection
+
+
+def parse_devices(value: str) -> List[Tuple[str, Optional[int]]]:
+    """
+    Parse a --devices value: comma-separated device indices, optionally named.
+
+    "1,3" gives rooms "room1" and "room3", "kitchen=1,bedroom=3" names them.
+    """
+    rooms = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, index = item.rpartition("=")
+        rooms.append((name or f"room{index}", int(index)))
+    return rooms
+
+
+class CaptureManager:
+    """
+    Runs a wake-word detector per room and hands the clearest one to the agent.
+    """
+
+    def __init__(self, model_path: str, wake_phrase: str,
+                 devices: Sequence[Tuple[str, Union[int, None, AudioSource]]],
+                 arbitration_window: float = 0.3, score_window: float = 1.0, stt_preroll: float = 0.3) -> None:
+        """
+        Args:
+            model_path: Vosk model shared by all rooms.
+            wake_phrase: The phrase to listen for.
+            devices: (room name, device index) pairs. An `AudioSource` can
+                replace the device index (e.g. recordings of the rooms).
+            arbitration_window: Seconds to wait for the other rooms after the
+                first detection.
+            score_window: Seconds of audio before the detection used to score it.
+            stt_preroll: Seconds before the end of the wake phrase handed to
+                speech-to-text.
+        """
+        self.arbitration_window = arbitration_window
+        self.score_window = score_window
+        self.stt_preroll = stt_preroll
+        self.rooms: List[Room] = []
+        for name, device in devices:
+            if isinstance(device, AudioSource):
+                capture = AudioCaptureService(sample_rate=device.sample_rate, source=device)
+            else:
+                capture = AudioCaptureService(device_index=device)
+            detector = WakeWordEngine(model_path=model_path, wake_phrase=wake_phrase, capture=capture)
+            self.rooms.append(Room(name, capture, detector))
+
+        self._detections: "queue.Queue[Optional[Detection]]" = queue.Queue()
+        self._busy = threading.Event()
+        # Set once every room is listening
+        self.listening = threading.Event()
+        self.stopped = threading.Event()
+
+    def start(self) -> "CaptureManager":
+        """Open all the microphones."""
+        for room in self.rooms:
+            room.capture.start()
+        return self
+
+    def stop(self) -> None:
+        for room in self.rooms:
+            room.capture.stop()
+
+    def stop_listening(self) -> None:
+        """End wait_for_activation and the rooms' wake-word loops."""
+        self.stopped.set()
+        for room in self.rooms:
+            room.detector.stop_listening()
+        # Wake up wait_for_activation
+        self._detections.put(None)
+
+    def score(self, room: Room, position: int) -> float:
+        """RMS of the audio before `position`, relative to the room's noise floor."""
+        capture = room.capture
+        start = max(capture.ring.oldest_position, position - capture.seconds_to_samples(self.score_window))
+        samples = capture.ring.view(start, position - start).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        return rms / max(room.detector.vad.noise_floor, 1.0)
+
+    def _wait_for_capture(self, room: Room, poll: float = 0.1) -> bool:
+        """Wait until the room's capture runs again (e.g. restarted by the watchdog). False when stopping."""
+        while not room.capture.is_running or room.capture.ring.closed:
+            if self.stopped.wait(poll):
+                return False
+        return True
+
+    def _listen(self, room: Room) -> None:
+        reader = room.capture.reader()
+        while not self.stopped.is_set():
+            position = room.detector.detect(reader)
+            if position is None:
+                # The capture stopped: keep the room listening once it is restarted
+                logger.info(f"Capture of room '{room.name}' ended.")
+                if not self._wait_for_capture(room):
+                    return
+                logger.info(f"Capture of room '{room.name}' restarted.")
+                reader = room.capture.reader()
+                continue
+            if self._busy.is_set():
+                # A conversation is running (maybe heard by this microphone too)
+                continue
+            detection = Detection(room, position, self.score(room, position), time.monotonic())
+            logger.info(f"Wake phrase heard in '{room.name}' (score {detection.score:.1f})")
+            self._detections.put(detection)
+
+    def arbitrate(self, first: Detection) -> Detection:
+        """Collect the detections of the other rooms within the window and keep the clearest."""
+        candidates = [first]
+        deadline = first.detected_at + self.arbitration_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                detection = self._detections.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if detection is None:
+                # Stopping, let wait_for_activation see it
+                self._detections.put(None)
+                break
+            candidates.append(detection)
+        return max(candidates, key=lambda detection: detection.score)
+
+    def wait_for_activation(self, agent_flow: AgentFlow) -> None:
+        """Listen in every room and run the conversations (blocks)."""
+        for room in self.rooms:
+            threading.Thread(target=self._listen, args=(room,), name=f"wake-{room.name}", daemon=True).start()
+        for room in self.rooms:
+            room.detector.listening.set()
+        self.listening.set()
+
+        while not self.stopped.is_set():
+            first = self._detections.get()
+            if first is None:
+                return
+            chosen = self.arbitrate(first)
+            TRACER.start_trace("turn")
+            TRACER.event("wake_word")
+            logger.info(f"Talking with room '{chosen.room.name}'")
+            self._busy.set()
+            # No room decodes during the conversation, detections would be dropped anyway
+            for room in self.rooms:
+                room.detector.pause()
+            try:
+                start_position = chosen.position - chosen.room.capture.seconds_to_samples(self.stt_preroll)
+                agent_flow.main_flow(start_position=start_position, capture=chosen.room.capture)
+            except Exception as e:
+                # A failed conversation (LLM, tool) does not stop the listening
+                logger.error(f"Conversation failed: {e}")
+            finally:
+                # Drop what was detected during the conversation
+                while not self._detections.empty():
+                    self._detections.get_nowait()
+                self._busy.clear()
+                for room in self.rooms:
+                    room.detector.resume()
@@ -6,15 +6,18 @@ from dataclasses import asdict
 from agent.agent.flow import AgentFlow
 from agent.config import EVENTS_FILE_PATH
 from agent.tools.event_tools.models import Event
+from agent.utils.counters import COUNTERS
 
 def check_and_alert_events(agent_flow: AgentFlow):
     """Goes over all events in EVENTS_FILE_PATH and alerts if an event needs to be notified."""
+    COUNTERS.increment("events.sweeps")
     if not os.path.exists(EVENTS_FILE_PATH):
         print("No events file found.")
         return
 
     with open(EVENTS_FILE_PATH, "r") as f:
         try:
+            COUNTERS.increment("json.file_loads")
             events = json.load(f)
             events = [Event(**event) for event in events]
         except json.JSONDecodeError:
@@ -22,6 +25,7 @@ def check_and_alert_events(agent_flow: AgentFlow):
             return
 
     current_time = datetime.now()
+    COUNTERS.increment("events.scanned", len(events))
 
     for event in events:
         event_time = datetime.fromisoformat(event.time)
@@ -31,20 +35,11 @@ def check_and_alert_events(agent_flow: AgentFlow):
         # Check if the event needs to be alerted
         if notification and current_time >= event_time and not event.has_passed:
             print(f"ALERT: Event '{description}' is happening now or has passed!")
-            if agent_flow.is_running:
-                agent_flow.add_note(f"You need to alert for the event: '{description}' at time {event.time}")
-            else:
-                agent_flow.basic_flow(f"system message: The user needs to be alerted for event '{description}' at time {event.time}. Do it now.")
-        
+            # Queued on the agent's turn executor, polling goes on while it is spoken
+            agent_flow.alert(f"The user needs to be alerted for event '{description}' at time {event.time}.",
+                             key=f"event:{description}:{event.time}")
+
             event.has_passed = True
     # Save updated events back to file
     with open(EVENTS_FILE_PATH, "w") as f:
         json.dump([asdict(event) for event in events], f, indent=2)
-
-
-def pool_events_handler(agent_flow: AgentFlow):
-    """Periodically checks for events to alert."""
-    import time
-    while True:
-        check_and_alert_events(agent_flow)
-        time.sleep(5)
\ No newline at end of file
@@ -1,10 +1,12 @@
 import os
-import json
 import sys
 import logging
-import pyaudio
+import threading
 from agent.agent.flow import AgentFlow
-from vosk import Model, KaldiRecognizer
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.stt_engine import STTEngine, VoskEngine, contains_phrase
+from agent.speech.vad import EnergyVAD, VADConfig, VADGate
+from agent.utils.tracing import TRACER
 
 # Configure logging to look nice and clean
 logging.basicConfig(
@@ -19,90 +21,178 @@ class WakeWordEngine:
     A dedicated engine for detecting specific wake phrases using Vosk.
     """
 
-    def __init__(self, model_path: str, wake_phrase: str, device_index: int = None):
+    def __init__(self, model_path: str, wake_phrase: str, device_index: int = None,
+                 capture: AudioCaptureService = None, stt_preroll: float = 0.3,
+                 vad_config: VADConfig = None, engine: STTEngine = None, on_speech=None):
         """
         Initialize the engine. Loads the model once to save time later.
+        The model is shared with speech-to-text through the model registry.
 
         Args:
             model_path (str): Path to the Vosk model folder.
             wake_phrase (str): The specific phrase to trigger on (e.g., "hey buddy").
             device_index (int): Optional microphone device index.
+            capture (AudioCaptureService): Shared microphone capture (created if not given).
+            stt_preroll (float): Seconds of audio before the end of the wake phrase
+                handed to speech-to-text, so words said right after it are not lost.
+            vad_config (VADConfig): Tuning of the voice activity gate. Audio only
+                reaches the recognizer around speech.
+            engine (STTEngine): Speech-to-text engine (a Vosk engine on model_path
+                by default, sharing its model with speech-to-text).
+            on_speech (callable): Called when the VAD hears speech in VAD-only
+                mode (e.g. to report presence, which can leave the mode).
         """
         self.wake_phrase = wake_phrase
         self.device_index = device_index
         self.sample_rate = 16000
+        self.chunk = 1600
+        self.vad = EnergyVAD(self.sample_rate, vad_config)
+        self.stt_preroll = stt_preroll
+        self.capture = capture or AudioCaptureService(device_index=device_index, sample_rate=self.sample_rate)
+        # Set once the microphone stream is open and the engine is listening
+        self.listening = threading.Event()
+        # Set by stop_listening, ends wait_for_activation
+        self.stopped = threading.Event()
+        # Cleared by pause: detect waits without reading or decoding
+        self._active = threading.Event()
+        self._active.set()
+        # VAD-only mode: speech is detected, but not decoded (nobody is around)
+        self.vad_only = False
+        self.on_speech = on_speech
         
         # 1. Validation
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(
-                f"Model not found at '{model_path}'. "
-                "Please download from https://alphacephei.com/vosk/models"
-            )
-
-        # 2. Load Model (The heavy operation)
-        logger.info(f"Loading model from '{model_path}'...")
+        if engine is None:
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(
+                    f"Model not found at '{model_path}'. "
+                    "Please download from https://alphacephei.com/vosk/models"
+                )
+            engine = VoskEngine(model_path, self.sample_rate)
+        self.engine = engine
+
+        # 2. Load Model (The heavy operation, done once per process)
+        logger.info(f"Loading {engine.name} model...")
         try:
-            self.model = Model(model_path)
+            self.engine.load()
         except Exception as e:
-            raise RuntimeError(f"Failed to load Vosk model: {e}")
+            raise RuntimeError(f"Failed to load the {engine.name} model: {e}")
 
-        # 3. Configure Recognizer with restricted vocabulary
+        # 3. Restricted vocabulary
         # The list ["phrase", "[unk]"] forces the AI to only care about the wake word
         # or noise, significantly improving accuracy.
-        vocab_list = f'["{self.wake_phrase}", "[unk]"]'
-        self.recognizer = KaldiRecognizer(self.model, self.sample_rate, vocab_list)
+        self.grammar = [self.wake_phrase, "[unk]"]
         
         logger.info(f"Engine ready. Wake phrase: '{self.wake_phrase}'")
     
     def wait_for_activation(self, agent_flow: AgentFlow):
-        while True:
-            self.wait_for_activation_once(agent_flow)
+        """
+        Run conversations until stopped, or until the capture ends or fails
+        (the supervisor restarts the loop with backoff instead of spinning on
+        a closed capture).
+        """
+        while not self.stopped.is_set():
+            if not self.wait_for_activation_once(agent_flow):
+                return
+
+    def stop_listening(self):
+        """End wait_for_activation once the capture stops delivering audio."""
+        self.stopped.set()
+        self._active.set()
+
+    def pause(self):
+        """Stop decoding (e.g. while another microphone has the conversation)."""
+        self._active.clear()
+
+    def resume(self):
+        """Decode again, from the audio captured from now on."""
+        self._active.set()
     
     def wait_for_activation_once(self, agent_flow: AgentFlow):
         """
         Blocks execution and listens to the microphone until the wake phrase is spoken.
         
         Returns:
-            bool: True when wake word is detected.
+            bool: True when the wake word was detected (even if the conversation
+                failed), False when the capture ended or failed.
         """
-        p = pyaudio.PyAudio()
-        stream = None
-
         try:
-            stream = p.open(format=pyaudio.paInt16,
-                            channels=1,
-                            rate=self.sample_rate,
-                            input=True,
-                            frames_per_buffer=8000,
-                            input_device_index=self.device_index)
-            
+            reader = self.capture.reader()
             logger.info("Listening... (Press Ctrl+C to stop)")
-            stream.start_stream()
-
-            while True:
-                data = stream.read(4000, exception_on_overflow=False)
-                
-                if len(data) == 0:
-                    break
-
-                if self.recognizer.AcceptWaveform(data):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get('text', '')
-
-                    if text == self.wake_phrase:
-                        logger.info(f"✅ Wake word detected: {text.upper()}")
-                        agent_flow.main_flow()
-                        return True
+            self.listening.set()
 
+            if self.detect(reader) is None:
+                return False
+            TRACER.start_trace("turn")
+            TRACER.event("wake_word")
+            start_position = reader.position - self.capture.seconds_to_samples(self.stt_preroll)
         except KeyboardInterrupt:
             logger.info("Stopping listener...")
             return False
         except Exception as e:
             logger.error(f"Audio stream error: {e}")
             return False
+
+        try:
+            agent_flow.main_flow(start_position=start_position)
+        except KeyboardInterrupt:
+            logger.info("Stopping listener...")
+            return False
+        except Exception as e:
+            # A failed conversation (LLM, tool) does not stop the listening
+            logger.error(f"Conversation failed: {e}")
+        return True
+
+    def detect(self, reader):
+        """
+        Read audio until the wake phrase is spoken.
+
+        Args:
+            reader (AudioReader): Where to read the audio from.
+
+        Returns:
+            int: The capture position right after the wake phrase was recognized,
+                or None when the audio ended (or the engine was stopped while paused).
+        """
+        stream = None
+        try:
+            stream = self.engine.open_stream(grammar=self.grammar)
+            gate = VADGate(self.vad, self.chunk)
+            while True:
+                if not self._active.is_set():
+                    self._active.wait()
+                    if self.stopped.is_set():
+                        return None
+                    # What was said while paused is not looked at
+                    stream.close()
+                    stream = self.engine.open_stream(grammar=self.grammar)
+                    gate = VADGate(self.vad, self.chunk)
+                    reader.seek(reader.capture.ring.write_position)
+
+                samples = reader.read(self.chunk)
+                
+                if samples is None:
+                    return None
+
+                # Only speech (plus a short pre-roll) reaches the recognizer
+                chunks = gate.process(samples)
+                if chunks and self.vad_only and self.on_speech is not None:
+                    self.on_speech()
+                if self.vad_only:
+                    continue
+
+                texts = []
+                for chunk in chunks:
+                    text = stream.accept(chunk)
+                    if text:
+                        texts.append(text)
+                if gate.closed_now:
+                    texts.append(stream.finish())
+
+                if any(contains_phrase(text, self.wake_phrase) for text in texts):
+                    logger.info(f"✅ Wake word detected: {self.wake_phrase.upper()}")
+                    logger.debug(f"VAD passed {gate.pass_ratio:.0%} of the audio to the recognizer")
+                    return reader.position
         finally:
             # Clean resource management
-            if stream:
-                stream.stop_stream()
+            if stream is not None:
                 stream.close()
-            p.terminate()
@@ -0,0 +1,375 @@
+"""Motion detection engine.
+
+A reusable version of the loop of `poc_examples/vmd_poc.py`, sized for an
+always-on Raspberry Pi:
+
+- `FrameGrabber` reads the camera on its own thread and keeps only the
+  latest frame, so a slow analysis never works on stale frames.
+- `DownscaledMOG2` runs the MOG2 background subtraction on a downscaled
+  grayscale copy of the frame, restricted to regions of interest, with the
+  morphology kernel and all the intermediate buffers allocated once.
+- `MotionEngine` analyzes every frame while something moves, and only one
+  frame in `idle_skip` once the scene has been still for `idle_after` seconds.
+
+Run `python -m buddy.motion_engine` to measure the throughput and CPU use on
+the camera, or `--synthetic` without one.
+"""
+
+import argparse
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("Motion")
+
+# (x, y, width, height) as fractions of the frame
+Region = Tuple[float, float, float, float]
+
+
+@dataclass
+class MotionConfig:
+    """Camera and motion detection tuning."""
+    camera_index: int = 0
+    width: int = 640
+    height: int = 480
+    fps: int = 30
+    scale: float = 0.25             # Frames are analyzed at this fraction of their size
+    regions: List[Region] = field(default_factory=list)  # Analyzed regions, the whole frame if empty
+    min_area: int = 2500            # Smallest moving blob that counts (pixels of the full frame)
+    history: int = 500              # Frames of background learning
+    var_threshold: float = 400      # Higher ignores subtle lighting changes
+    idle_after: float = 2.0         # Seconds without motion before the scene is idle
+    idle_skip: int = 5              # While idle, analyze one frame in this many
+
+
+class FrameGrabber:
+    """
+    Reads frames on a background thread, keeping only the latest one.
+    """
+
+    def __init__(self, capture: Any = None, config: Optional[MotionConfig] = None) -> None:
+        """
+        Args:
+            capture: Anything with `read() -> (ok, frame)` and `release()`,
+                like `cv2.VideoCapture`. The camera of `config` if not given.
+            config: Camera settings.
+        """
+        self.config = config or MotionConfig()
+        self.capture = capture
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self._frame: Optional[np.ndarray] = None
+        self._sequence = 0
+        self._consumed = 0
+        self._ended = False
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ended(self) -> bool:
+        """Whether the camera stopped delivering frames."""
+        return self._ended
+
+    def _open_camera(self) -> Any:
+        import cv2
+
+        config = self.config
+        capture = cv2.VideoCapture(config.camera_index, cv2.CAP_V4L2)
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, config.width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height)
+        capture.set(cv2.CAP_PROP_FPS, config.fps)
+        # Do not let the driver queue frames either
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not capture.isOpened():
+            raise RuntimeError(f"Could not open camera {config.camera_index}")
+        return capture
+
+    def start(self) -> "FrameGrabber":
+        if self._thread is None:
+            if self.capture is None:
+                self.capture = self._open_camera()
+            self._running = True
+            self._ended = False
+            self._thread = threading.Thread(target=self._grab_loop, name="frame-grabber", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self.capture is not None:
+            self.capture.release()
+
+    def _grab_loop(self) -> None:
+        try:
+            while self._running:
+                ok, frame = self.capture.read()
+                if not ok:
+                    logger.warning("Camera stopped delivering frames.")
+                    break
+                with self._condition:
+                    if self._sequence > self._consumed:
+                        # Nobody took the previous frame, it is stale now
+                        self.frames_dropped += 1
+                    self._frame = frame
+                    self._sequence += 1
+                    self.frames_captured += 1
+                    self._condition.notify_all()
+        finally:
+            with self._condition:
+                self._ended = True
+                self._condition.notify_all()
+
+    def read(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        The newest frame not read yet, waiting for it.
+
+        Returns:
+            The frame, or None when the camera ended or the timeout passed.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._sequence > self._consumed or self._ended, timeout):
+                return None
+            if self._sequence == self._consumed:
+                return None
+            self._consumed = self._sequence
+            return self._frame
+
+
+class DownscaledMOG2:
+    """
+    MOG2 background subtraction on downscaled grayscale frames.
+
+    Callable on a BGR or grayscale frame, returns the number of moving blobs.
+    """
+
+    def __init__(self, config: MotionConfig) -> None:
+        import cv2
+
+        self.cv2 = cv2
+        self.config = config
+        self.size = (max(1, int(config.width * config.scale)), max(1, int(config.height * config.scale)))
+        # The blob area shrinks with the square of the scale
+        self.min_area = config.min_area * config.scale * config.scale
+        # detectShadows marks shadows gray, so they can be told apart from objects
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(history=config.history,
+                                                             varThreshold=config.var_threshold,
+                                                             detectShadows=True)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+
+        width, height = self.size
+        self._gray = np.empty((config.height, config.width), dtype=np.uint8)
+        self._small = np.empty((height, width), dtype=np.uint8)
+        self._mask = np.empty((height, width), dtype=np.uint8)
+        self._cleaned = np.empty((height, width), dtype=np.uint8)
+        self._regions = self.region_mask(config.regions) if config.regions else None
+
+    def region_mask(self, regions: Iterable[Region]) -> np.ndarray:
+        """Mask of the analyzed regions at the processing size."""
+        width, height = self.size
+        mask = np.zeros((height, width), dtype=np.uint8)
+        for x, y, w, h in regions:
+            mask[int(y * height):int((y + h) * height), int(x * width):int((x + w) * width)] = 255
+        return mask
+
+    def __call__(self, frame: np.ndarray) -> int:
+        cv2 = self.cv2
+        if frame.ndim == 3:
+            if frame.shape[:2] != self._gray.shape:
+                self._gray = np.empty(frame.shape[:2], dtype=np.uint8)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            frame = self._gray
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+
+        mask = self._mask
+        self.subtractor.apply(self._small, mask)
+        # Keep pure white only, shadows are gray (127)
+        cv2.threshold(mask, 250, 255, cv2.THRESH_BINARY, dst=mask)
+        if self._regions is not None:
+            cv2.bitwise_and(mask, self._regions, dst=mask)
+        # Erode the speckles, dilate to fill the gaps of the remaining blobs
+        cv2.erode(mask, self.kernel, dst=self._cleaned, iterations=1)
+        cv2.dilate(self._cleaned, self.kernel, dst=mask, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return sum(1 for contour in contours if cv2.contourArea(contour) >= self.min_area)
+
+
+class MotionEngine:
+    """
+    Analyzes the frames of a grabber, skipping frames while the scene is idle.
+    """
+
+    def __init__(self, config: Optional[MotionConfig] = None, grabber: Optional[FrameGrabber] = None,
+                 detector: Optional[Callable[[np.ndarray], int]] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            config: Camera and detection tuning.
+            grabber: Frame source (the camera of `config` by default).
+            detector: Frame analysis returning the number of moving blobs
+                (`DownscaledMOG2` by default).
+            clock: Time source of the idle detection.
+        """
+        self.config = config or MotionConfig()
+        self.grabber = grabber or FrameGrabber(config=self.config)
+        self.detector = detector
+        self.clock = clock
+        self.last_motion = clock()
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self.processing_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self._frame_index = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def idle(self) -> bool:
+        return self.clock() - self.last_motion > self.config.idle_after
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def process(self, frame: np.ndarray) -> Optional[int]:
+        """
+        Analyze a frame.
+
+        Returns:
+            The number of moving blobs, or None when the frame was skipped.
+        """
+        if self.detector is None:
+            self.detector = DownscaledMOG2(self.config)
+        self._frame_index += 1
+        if self.idle and self._frame_index % self.config.idle_skip:
+            self.frames_skipped += 1
+            return None
+
+        started, cpu = time.perf_counter(), time.thread_time()
+        count = self.detector(frame)
+        self.processing_seconds += time.perf_counter() - started
+        self.cpu_seconds += time.thread_time() - cpu
+        self.frames_processed += 1
+        if count:
+            self.last_motion = self.clock()
+        return count
+
+    def start(self, on_motion: Callable[[int], None]) -> "MotionEngine":
+        """
+        Analyze the camera on a background thread.
+
+        Args:
+            on_motion: Called with the number of moving blobs of each frame with motion.
+        """
+        if self._thread is None:
+            if self.detector is None:
+                self.detector = DownscaledMOG2(self.config)
+            self.grabber.start()
+            self._running = True
+            self._thread = threading.Thread(target=self._run, args=(on_motion,), name="motion", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.grabber.stop()
+
+    def _run(self, on_motion: Callable[[int], None]) -> None:
+        while self._running:
+            frame = self.grabber.read(timeout=1.0)
+            if frame is None:
+                if self.grabber.ended:
+                    return
+                continue
+            count = self.process(frame)
+            if count:
+                on_motion(count)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Throughput statistics.
+
+        Returns:
+            frames captured, processed, skipped (idle) and dropped (stale),
+            mean processing time per analyzed frame and CPU seconds per
+            analyzed frame.
+        """
+        processed = self.frames_processed
+        return {
+            "frames_captured": self.grabber.frames_captured,
+            "frames_processed": processed,
+            "frames_skipped": self.frames_skipped,
+            "frames_dropped": self.grabber.frames_dropped,
+            "ms_per_frame": 1000 * self.processing_seconds / processed if processed else 0.0,
+            "cpu_ms_per_frame": 1000 * self.cpu_seconds / processed if processed else 0.0,
+        }
+
+
+def synthetic_frames(count: int, width: int = 640, height: int = 480, moving: bool = True,
+                     seed: int = 0) -> Iterable[np.ndarray]:
+    """Noisy BGR frames, with a bright square crossing the scene if `moving`."""
+    random = np.random.default_rng(seed)
+    background = random.integers(40, 60, (height, width, 3), dtype=np.uint8)
+    size = height // 4
+    for index in range(count):
+        frame = background.copy()
+        if moving:
+            x = (index * 8) % (width - size)
+            frame[height // 3:height // 3 + size, x:x + size] = 220
+        yield frame
+
+
+def benchmark(engine: MotionEngine, frames: Iterable[np.ndarray]) -> Dict[str, float]:
+    """
+    Run the engine on frames as fast as possible.
+
+    Returns:
+        The engine metrics, plus frames per second and the share of a core used.
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    count = 0
+    for frame in frames:
+        engine.process(frame)
+        count += 1
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    return dict(engine.metrics(), frames=count, fps=count / wall if wall else 0.0,
+                cores=cpu / wall if wall else 0.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Motion engine benchmark")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of the camera run.")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="FRAMES",
+                        help="Analyze this many synthetic frames as fast as possible instead of the camera.")
+    parser.add_argument("--scale", type=float, default=MotionConfig.scale)
+    args = parser.parse_args()
+
+    config = MotionConfig(scale=args.scale)
+    if args.synthetic:
+        engine = MotionEngine(config, grabber=FrameGrabber(capture=object(), config=config))
+        results = benchmark(engine, synthetic_frames(args.synthetic, config.width, config.height))
+    else:
+        engine = MotionEngine(config)
+        cpu = time.process_time()
+        engine.start(on_motion=lambda count: None)
+        time.sleep(args.seconds)
+        engine.stop()
+        results = dict(engine.metrics(), fps=engine.grabber.frames_captured / args.seconds,
+                       cores=(time.process_time() - cpu) / args.seconds)
+    for name, value in results.items():
+        print(f"{name:>20}: {value:.2f}")
+
+
+if __name__ == "__main__":
+    main()
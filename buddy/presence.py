@@ -0,0 +1,188 @@
+"""Presence detection and speech-stack scaling.
+
+`PresenceService` turns the camera motion detection of `MotionEngine` into
+a presence signal: someone is present while motion (or, optionally, speech)
+was seen within `absence_timeout`, or while a conversation runs. Listeners
+are told when presence changes.
+
+`SpeechStackScaler` is the listener that scales the speech stack: when the
+house is empty, the wake-word engines drop to VAD-only mode and the TTS
+voices and STT models are unloaded; on motion they are warmed up again in the
+background, before anyone says the wake word.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from buddy.motion_engine import MotionConfig, MotionEngine
+
+logger = logging.getLogger("Presence")
+
+
+@dataclass
+class PresenceConfig:
+    """Presence tuning."""
+    motion: MotionConfig = field(default_factory=MotionConfig)
+    absence_timeout: float = 600.0  # Seconds without motion before nobody is present
+    voice_counts: bool = True       # Speech heard by the VAD also means someone is present
+    check_interval: float = 1.0     # Seconds between absence checks
+
+
+class PresenceService:
+    """
+    Tracks whether someone is around from camera motion and notifies listeners.
+    """
+
+    def __init__(self, config: Optional[PresenceConfig] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 busy: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Args:
+            config: Presence tuning.
+            clock: Monotonic time source.
+            busy: True while a conversation runs. The user may talk without
+                moving (and the wake word is not decoded meanwhile), a
+                conversation counts as presence.
+        """
+        self.config = config or PresenceConfig()
+        self.clock = clock
+        self.busy = busy
+        self.present = True
+        self.last_seen = clock()
+        self._listeners: List[Callable[[bool], None]] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._engine: Optional[MotionEngine] = None
+
+    def add_listener(self, listener: Callable[[bool], None]) -> None:
+        """Call `listener(present)` whenever presence changes."""
+        self._listeners.append(listener)
+
+    def report_activity(self, source: str = "motion") -> None:
+        """Someone was seen (or heard) just now."""
+        if source == "voice" and not self.config.voice_counts:
+            return
+        with self._lock:
+            self.last_seen = self.clock()
+            changed = not self.present
+            self.present = True
+        if changed:
+            logger.info(f"Presence detected ({source}).")
+            self._notify(True)
+
+    def check(self) -> bool:
+        """Update the presence after the absence timeout. Returns the presence."""
+        busy = self.busy is not None and self.busy()
+        with self._lock:
+            if busy:
+                # The absence timeout starts when the conversation ends
+                self.last_seen = self.clock()
+            changed = self.present and self.clock() - self.last_seen > self.config.absence_timeout
+            if changed:
+                self.present = False
+        if changed:
+            logger.info(f"Nobody seen for {self.config.absence_timeout:.0f}s.")
+            self._notify(False)
+        return self.present
+
+    def _notify(self, present: bool) -> None:
+        for listener in self._listeners:
+            try:
+                listener(present)
+            except Exception as e:
+                logger.error(f"Presence listener failed: {e}")
+
+    def metrics(self) -> Dict[str, float]:
+        """Presence, and the camera's throughput (see MotionEngine.metrics) while it runs."""
+        engine = self._engine
+        result = dict(engine.metrics()) if engine is not None else {}
+        result["present"] = float(self.present)
+        return result
+
+    def start(self) -> "PresenceService":
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="presence", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            engine = MotionEngine(self.config.motion)
+            engine.start(on_motion=lambda count: self.report_activity("motion"))
+        except Exception as e:
+            # Without a camera everything stays loaded
+            logger.warning(f"Presence detection unavailable: {e}")
+            return
+
+        logger.info("Presence detection started.")
+        self._engine = engine
+        try:
+            while self._running and engine.running:
+                self.check()
+                time.sleep(self.config.check_interval)
+        finally:
+            self._engine = None
+            engine.stop()
+            # Nobody can be seen anymore, do not stay scaled down
+            self.report_activity("camera_stopped")
+
+
+class SpeechStackScaler:
+    """
+    Presence listener scaling the speech stack down when nobody is around.
+    """
+
+    def __init__(self, wake_engines: Sequence, stt=None, tts=None) -> None:
+        """
+        Args:
+            wake_engines: WakeWordEngines switched to VAD-only mode while absent.
+            stt: The SpeechToText whose model is unloaded while absent.
+            tts: The tts module, whose voices are unloaded while absent.
+        """
+        self.wake_engines = list(wake_engines)
+        self.stt = stt
+        self.tts = tts
+        self._warm_up: Optional[threading.Thread] = None
+
+    def __call__(self, present: bool) -> None:
+        if present:
+            self.scale_up()
+        else:
+            self.scale_down()
+
+    def scale_down(self) -> None:
+        logger.info("Scaling the speech stack down.")
+        for engine in self.wake_engines:
+            engine.vad_only = True
+        if self.stt is not None:
+            self.stt.unload_model()
+        if self.tts is not None:
+            self.tts.stop_service()
+
+    def scale_up(self) -> None:
+        logger.info("Scaling the speech stack up.")
+        # Decoding resumes right away, the wake-word model stays loaded
+        for engine in self.wake_engines:
+            engine.vad_only = False
+        self._warm_up = threading.Thread(target=self._load, name="speech-warm-up", daemon=True)
+        self._warm_up.start()
+
+    def _load(self) -> None:
+        try:
+            if self.stt is not None:
+                self.stt.load_model()
+            if self.tts is not None:
+                self.tts.start_service()
+        except Exception as e:
+            logger.error(f"Warming up the speech stack failed: {e}")
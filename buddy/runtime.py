@@ -0,0 +1,287 @@
+"""asyncio runtime of the assistant.
+
+`Runtime` owns the long-lived components and their lifecycle on one event
+loop:
+
+- Services (the audio capture, the presence camera) are started in an executor
+  and stopped at shutdown. A watchdog restarts a service whose heartbeat
+  stalls, e.g. a microphone that stopped delivering audio.
+- Loops (the wake-word listener) are blocking functions on dedicated daemon
+  threads, supervised: one that crashes or returns is restarted with backoff.
+- Periodic jobs (the event alerts) and native tasks run on the loop itself.
+- Blocking work (service start/stop, file I/O) goes to named thread pools,
+  never to the loop. Inference is not routed here: it runs on the threads of
+  the conversation (the wake-word loop and the agent's `TurnExecutor`).
+
+SIGINT and SIGTERM start a graceful shutdown: the tasks are cancelled, the
+loops and services stopped in reverse order, then the executors shut down.
+A lag monitor measures how late the event loop wakes up, and `metrics` are
+logged every `report_interval`.
+"""
+
+import asyncio
+import logging
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger("Runtime")
+
+# Default executors and their worker counts
+EXECUTORS = {"io": 4}
+
+
+@dataclass
+class RuntimeConfig:
+    """Supervision and monitoring tuning."""
+    watchdog_interval: float = 1.0     # Seconds between heartbeat checks
+    restart_backoff: float = 1.0       # First delay before restarting a component
+    max_restart_backoff: float = 30.0  # The delay doubles up to this
+    lag_interval: float = 0.5          # Seconds between event-loop lag samples
+    report_interval: float = 300.0     # Seconds between the metrics logs (0: never)
+    stop_timeout: float = 5.0          # Seconds allowed to each stop hook at shutdown
+
+
+@dataclass
+class _Service:
+    name: str
+    start: Callable[[], Any]
+    stop: Optional[Callable[[], Any]]
+    heartbeat: Optional[Callable[[], float]]
+    stall_timeout: Optional[float]
+    executor: str
+
+
+class Runtime:
+    """
+    Supervises the components of the assistant on an asyncio event loop.
+    """
+
+    def __init__(self, config: Optional[RuntimeConfig] = None,
+                 executors: Optional[Dict[str, int]] = None) -> None:
+        """
+        Args:
+            config: Supervision and monitoring tuning.
+            executors: Name and worker count of the thread pools.
+        """
+        self.config = config or RuntimeConfig()
+        self.executors = {name: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+                          for name, workers in (executors or EXECUTORS).items()}
+        self._services: List[_Service] = []
+        self._tasks: List[Callable[[], Awaitable[None]]] = []
+        # Called at shutdown in reverse order
+        self._stops: List[Callable[[], Any]] = []
+        self._running: List[asyncio.Task] = []
+        self._shutdown: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.lag: Deque[float] = deque(maxlen=600)
+        self.restarts: Dict[str, int] = {}
+
+    # Registration
+
+    def add_service(self, name: str, start: Callable[[], Any], stop: Optional[Callable[[], Any]] = None,
+                    heartbeat: Optional[Callable[[], float]] = None, stall_timeout: Optional[float] = None,
+                    executor: str = "io") -> None:
+        """
+        Register a service started with the runtime.
+
+        Args:
+            name: Name in the logs and metrics.
+            start: Starts the service, called in `executor`.
+            stop: Stops it, at shutdown and before a restart.
+            heartbeat: Monotonic time of the service's last progress.
+            stall_timeout: Restart the service when the heartbeat is older.
+            executor: Pool the start and stop calls run in.
+        """
+        service = _Service(name, start, stop, heartbeat, stall_timeout, executor)
+        self._services.append(service)
+        if stop is not None:
+            self._stops.append(stop)
+
+    def add_loop(self, name: str, target: Callable[..., Any], *args: Any,
+                 stop: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Register a blocking loop, run on its own daemon thread and restarted
+        when it crashes or returns.
+
+        Args:
+            name: Name of the thread, in the logs and metrics.
+            target: The loop, called with `args`.
+            stop: Makes the loop return, at shutdown.
+        """
+        async def supervise() -> None:
+            await self._supervise(name, lambda: self._thread(name, target, *args))
+
+        self._tasks.append(supervise)
+        if stop is not None:
+            self._stops.append(stop)
+
+    def every(self, name: str, interval: float, job: Callable[..., Any], *args: Any,
+              executor: str = "io") -> None:
+        """Run a blocking job every `interval` seconds in `executor`."""
+        async def periodic() -> None:
+            while True:
+                try:
+                    await self.run_in(executor, job, *args)
+                except Exception as e:
+                    logger.error(f"Periodic job '{name}' failed: {e}")
+                await asyncio.sleep(interval)
+
+        self._tasks.append(periodic)
+
+    def add_task(self, name: str, factory: Callable[[], Awaitable[None]], supervised: bool = True) -> None:
+        """
+        Register a coroutine run on the event loop.
+
+        Args:
+            name: Name in the logs and metrics.
+            factory: Creates the coroutine (again, on a restart).
+            supervised: Restart it when it crashes or returns.
+        """
+        if supervised:
+            self._tasks.append(lambda: self._supervise(name, factory))
+        else:
+            self._tasks.append(factory)
+
+    def on_shutdown(self, stop: Callable[[], Any]) -> None:
+        """Call `stop` at shutdown, before the hooks registered earlier."""
+        self._stops.append(stop)
+
+    # Execution
+
+    async def run_in(self, executor: str, function: Callable[..., Any], *args: Any) -> Any:
+        """Run blocking work in a named executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executors[executor], function, *args)
+
+    def run(self) -> None:
+        """Run until SIGINT or SIGTERM (blocks)."""
+        asyncio.run(self.main())
+
+    def shutdown(self) -> None:
+        """Start the graceful shutdown, from any thread."""
+        if self._loop is not None and self._shutdown is not None:
+            self._loop.call_soon_threadsafe(self._shutdown.set)
+
+    async def main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._shutdown = asyncio.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                self._loop.add_signal_handler(signum, self._shutdown.set)
+
+        try:
+            await asyncio.gather(*(self.run_in(service.executor, service.start) for service in self._services))
+            self._running = [asyncio.create_task(factory()) for factory in self._tasks]
+            self._running.append(asyncio.create_task(self._watchdog()))
+            self._running.append(asyncio.create_task(self._monitor_lag()))
+            if self.config.report_interval > 0:
+                self._running.append(asyncio.create_task(self._report()))
+            logger.info("Runtime started.")
+            await self._shutdown.wait()
+        finally:
+            await self._stop()
+
+    async def _stop(self) -> None:
+        logger.info("Shutting down...")
+        for task in self._running:
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._running = []
+
+        for stop in reversed(self._stops):
+            try:
+                await asyncio.wait_for(self.run_in("io", stop), self.config.stop_timeout)
+            except Exception as e:
+                logger.error(f"Stopping {getattr(stop, '__qualname__', stop)} failed: {e!r}")
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Runtime stopped.")
+
+    async def _thread(self, name: str, target: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking function on a new daemon thread and wait for it."""
+        future: Future = Future()
+        # A running future cannot be cancelled, the thread always completes it
+        future.set_running_or_notify_cancel()
+
+        def run() -> None:
+            try:
+                future.set_result(target(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=name, daemon=True).start()
+        return await asyncio.wrap_future(future)
+
+    async def _supervise(self, name: str, factory: Callable[[], Awaitable[Any]]) -> None:
+        """Run a component, restarting it with backoff when it ends."""
+        backoff = self.config.restart_backoff
+        while True:
+            started = time.monotonic()
+            try:
+                await factory()
+                logger.warning(f"'{name}' returned, restarting it in {backoff:.0f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"'{name}' crashed ({e!r}), restarting it in {backoff:.0f}s")
+            self.restarts[name] = self.restarts.get(name, 0) + 1
+            await asyncio.sleep(backoff)
+            # A component that ran for a while gets the short backoff again
+            if time.monotonic() - started > self.config.max_restart_backoff:
+                backoff = self.config.restart_backoff
+            else:
+                backoff = min(2 * backoff, self.config.max_restart_backoff)
+
+    async def _watchdog(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.watchdog_interval)
+            now = time.monotonic()
+            for service in self._services:
+                if service.heartbeat is None or service.stall_timeout is None:
+                    continue
+                stalled = now - service.heartbeat()
+                if stalled > service.stall_timeout:
+                    logger.warning(f"'{service.name}' stalled for {stalled:.1f}s, restarting it")
+                    self.restarts[service.name] = self.restarts.get(service.name, 0) + 1
+                    try:
+                        if service.stop is not None:
+                            await self.run_in(service.executor, service.stop)
+                        await self.run_in(service.executor, service.start)
+                    except Exception as e:
+                        logger.error(f"Restarting '{service.name}' failed: {e!r}")
+
+    async def _monitor_lag(self) -> None:
+        interval = self.config.lag_interval
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            self.lag.append(max(0.0, time.monotonic() - expected))
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.report_interval)
+            metrics = self.metrics()
+            logger.info("Runtime metrics: " + ", ".join(
+                f"{name} {value * 1000:.1f} ms" if name.startswith("loop_lag") else f"{name} {value}"
+                for name, value in metrics.items()))
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Runtime statistics.
+
+        Returns:
+            p50/p99/max event-loop lag in seconds, and the restarts per component.
+        """
+        lag = sorted(self.lag)
+
+        def percentile(fraction: float) -> float:
+            return lag[min(len(lag) - 1, int(fraction * len(lag)))] if lag else 0.0
+
+        result = {"loop_lag_p50": percentile(0.5), "loop_lag_p99": percentile(0.99),
+                  "loop_lag_max": lag[-1] if lag else 0.0}
+        result.update({f"restarts_{name}": count for name, count in self.restarts.items()})
+        return result
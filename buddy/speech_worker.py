@@ -0,0 +1,342 @@
+"""Out-of-process speech front end.
+
+With `--multiprocess`, the microphone capture, wake-word detection and
+speech-to-text run in a worker process, so Vosk decoding does not compete
+with the agent (LLM calls, JSON handling, playback) for the GIL. The audio
+is captured into a `SharedRingBuffer` the agent process reads directly (for
+barge-in), and only small control messages cross the pipe:
+
+    worker -> agent: ("ready",) ("wake", position) ("partial", text)
+                     ("text", text) ("speech",) ("profiler", (ok, reply))
+    agent -> worker: ("listen", start_position, partials, user) ("idle",)
+                     ("vad_only", flag) ("load_stt",) ("unload_stt",)
+                     ("profiler", command) ("stop",)
+
+`SpeechWorker` is the agent side. It stands in for the wake-word engine
+(`wait_for_activation`, `listening`, `stop_listening`, `vad_only`,
+`on_speech`), and its `stt` for `SpeechToText`. Its `control` runs the
+profiler's control commands in the worker (see `ControlServer`), where the
+Vosk decoding and its counters are.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+from agent.speech.audio_source import AudioSource
+from agent.speech.shm_ring import SharedCapture, SharedRingBuffer
+from agent.utils.tracing import TRACER
+
+logger = logging.getLogger("SpeechWorker")
+
+
+@dataclass
+class SpeechWorkerConfig:
+    """What the worker process runs."""
+    model_path: str
+    wake_phrase: str = "hey buddy"
+    device_index: Optional[int] = None
+    sample_rate: int = 16000
+    buffer_seconds: float = 10.0
+    stt_engine: str = "vosk"
+    stt_preroll: float = 0.3
+    source: Optional[AudioSource] = None  # Audio source instead of the microphone
+    profiles_path: str = "."              # Where the worker's profiles are written
+
+
+def _speech_process(connection, ring_name: str, config: SpeechWorkerConfig) -> None:
+    """Worker process: capture, wake word and speech-to-text."""
+    from agent.speech.audio_capture import AudioCaptureService
+    from agent.speech.stt import SpeechToText
+    from agent.speech.stt_engine import create_engine
+    from agent.utils.counters import COUNTERS
+    from agent.utils.profiler import SamplingProfiler, run_command
+    from buddy.hey_buddy_detector import WakeWordEngine
+
+    send_lock = threading.Lock()
+
+    def send(message) -> None:
+        with send_lock:
+            connection.send(message)
+
+    ring = SharedRingBuffer.attach(ring_name)
+    ring.reopen()
+    capture = AudioCaptureService(device_index=config.device_index, sample_rate=config.sample_rate,
+                                  source=config.source, ring=ring)
+    detector = WakeWordEngine(model_path=config.model_path, wake_phrase=config.wake_phrase, capture=capture,
+                              stt_preroll=config.stt_preroll, on_speech=lambda: send(("speech",)))
+    engine = None if config.stt_engine == "vosk" else create_engine(config.stt_engine, config.model_path)
+    stt = SpeechToText(model_path=config.model_path, capture=capture, engine=engine)
+    stt.load_model()
+    profiler = SamplingProfiler(output_dir=config.profiles_path, name="profile-speech-worker")
+    capture.start()
+
+    # Conversation commands, for the main loop
+    commands: "queue.Queue[tuple]" = queue.Queue()
+
+    def receive() -> None:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                message = ("stop",)
+            kind = message[0]
+            if kind == "vad_only":
+                detector.vad_only = message[1]
+            elif kind == "load_stt":
+                stt.load_model()
+            elif kind == "unload_stt":
+                stt.unload_model()
+            elif kind == "profiler":
+                send(("profiler", run_command(profiler, COUNTERS, message[1])))
+            else:
+                commands.put(message)
+            if kind == "stop":
+                # Ends the wake-word detection
+                capture.stop()
+                return
+
+    threading.Thread(target=receive, name="speech-commands", daemon=True).start()
+    send(("ready",))
+    try:
+        while True:
+            position = detector.detect(capture.reader())
+            if position is None:
+                return
+            send(("wake", position - capture.seconds_to_samples(config.stt_preroll)))
+            while True:
+                command = commands.get()
+                if command[0] == "listen":
+                    _, start_position, partials, user = command
+                    on_partial = (lambda text: send(("partial", text))) if partials else None
+                    send(("text", stt.listen_once(on_stable_partial=on_partial, start_position=start_position,
+                                                  user=user)))
+                elif command[0] == "idle":
+                    break
+                else:
+                    return
+    finally:
+        # A profile still running is written
+        profiler.stop()
+        capture.stop()
+        ring.release()
+
+
+class RemoteSpeechToText:
+    """
+    `SpeechToText` of the worker process, driven over the pipe.
+    """
+
+    def __init__(self, worker: "SpeechWorker") -> None:
+        self.worker = worker
+        self.capture = worker.capture
+
+    def load_model(self) -> None:
+        self.worker.send(("load_stt",))
+
+    def unload_model(self) -> None:
+        self.worker.send(("unload_stt",))
+
+    def listen_once(self, on_stable_partial: Optional[Callable[[str], None]] = None,
+                    start_position: Optional[int] = None, user: str = "default") -> str:
+        """See `SpeechToText.listen_once`."""
+        # The worker always reports its partials, they time the first partial of the trace
+        if not self.worker.request_text(("listen", start_position, True, user)):
+            return ""
+        while True:
+            kind, text = self.worker.results.get()
+            if kind == "text":
+                self.worker.text_received()
+                TRACER.event("end_of_speech")
+                return text
+            TRACER.event("first_partial")
+            if on_stable_partial is not None:
+                on_stable_partial(text)
+
+
+class SpeechWorker:
+    """
+    The agent side of the speech worker process.
+    """
+
+    def __init__(self, config: SpeechWorkerConfig) -> None:
+        self.config = config
+        # Created here, so the capture can be handed out before the worker starts
+        self.ring = SharedRingBuffer.create(int(config.buffer_seconds * config.sample_rate))
+        self.capture = SharedCapture(self.ring, config.sample_rate)
+        self.stt = RemoteSpeechToText(self)
+        # Set once the worker is listening for the wake word
+        self.listening = threading.Event()
+        self.stopped = threading.Event()
+        self.on_speech: Optional[Callable[[], None]] = None
+        self.results: "queue.Queue[tuple]" = queue.Queue()
+        self._wakes: "queue.Queue[Optional[int]]" = queue.Queue()
+        self._vad_only = False
+        self._send_lock = threading.Lock()
+        # Whether the worker is connected, and a transcript is awaited from it
+        self._results_lock = threading.Lock()
+        self._connected = False
+        self._text_pending = False
+        self._connection = None
+        self._process: Any = None
+        # Replies of the worker to the profiler commands
+        self._control_replies: "queue.Queue[Tuple[bool, str]]" = queue.Queue()
+        self._control_lock = threading.Lock()
+
+    @property
+    def vad_only(self) -> bool:
+        return self._vad_only
+
+    @vad_only.setter
+    def vad_only(self, value: bool) -> None:
+        self._vad_only = value
+        self.send(("vad_only", value))
+
+    def _launch(self, connection) -> Any:
+        context = multiprocessing.get_context("spawn")
+        process = context.Process(target=_speech_process, name="speech-worker", daemon=True,
+                                  args=(connection, self.ring.name, self.config))
+        process.start()
+        return process
+
+    def start(self) -> "SpeechWorker":
+        """Start the worker process and wait until it listens."""
+        if self._process is None:
+            self.listening.clear()
+            ready = threading.Event()
+            connection, child = multiprocessing.Pipe()
+            with self._results_lock:
+                # Nothing of the previous worker is for the next conversation,
+                # except the end of one still waiting for its transcript
+                while not self.results.empty():
+                    self.results.get_nowait()
+                if self._text_pending:
+                    self.results.put(("text", ""))
+                self._text_pending = False
+                self._connected = True
+                self._connection = connection
+            self._process = self._launch(child)
+            threading.Thread(target=self._receive, args=(self._connection, ready), name="speech-worker-events",
+                             daemon=True).start()
+            ready.wait()
+            if self._vad_only:
+                self.send(("vad_only", True))
+            self.listening.set()
+        return self
+
+    def stop(self) -> None:
+        """Stop the worker process (start runs a new one)."""
+        if self._process is None:
+            return
+        self.send(("stop",))
+        with self._results_lock:
+            # Nothing is asked of the stopping worker anymore
+            self._connected = False
+        self._process.join(timeout=5.0)
+        if getattr(self._process, "is_alive", lambda: False)():
+            self._process.terminate()
+        self._process = None
+        self.listening.clear()
+
+    def close(self) -> None:
+        """Stop the worker and free the shared memory."""
+        self.stop()
+        self.ring.unlink()
+
+    def send(self, message: tuple) -> None:
+        with self._send_lock:
+            if self._connection is None:
+                return
+            try:
+                self._connection.send(message)
+            except OSError as e:
+                logger.warning(f"Speech worker unreachable: {e}")
+
+    def control(self, command: str, timeout: float = 2.0) -> Optional[Tuple[bool, str]]:
+        """
+        Run a profiler control command in the worker (a `RemoteControl` of
+        the `ControlServer`).
+
+        Returns:
+            Whether it succeeded and the reply, None when the worker does not answer.
+        """
+        with self._control_lock:
+            with self._results_lock:
+                if not self._connected:
+                    return None
+            while not self._control_replies.empty():
+                self._control_replies.get_nowait()
+            self.send(("profiler", command))
+            try:
+                return self._control_replies.get(timeout=timeout)
+            except queue.Empty:
+                logger.warning(f"Speech worker did not answer '{command}'")
+                return None
+
+    def request_text(self, message: tuple) -> bool:
+        """Send a command answered with a transcript. False when the worker is gone."""
+        with self._results_lock:
+            if not self._connected:
+                return False
+            self._text_pending = True
+        self.send(message)
+        return True
+
+    def text_received(self) -> None:
+        with self._results_lock:
+            self._text_pending = False
+
+    def _receive(self, connection, ready: threading.Event) -> None:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == "ready":
+                ready.set()
+            elif kind == "wake":
+                self._wakes.put(message[1])
+            elif kind == "speech":
+                if self.on_speech is not None:
+                    self.on_speech()
+            elif kind == "profiler":
+                self._control_replies.put(message[1])
+            else:
+                self.results.put(message)
+        logger.info("Speech worker ended.")
+        ready.set()
+        with self._results_lock:
+            if connection is not self._connection:
+                # A new worker already runs
+                return
+            self._connected = False
+            # Unblock a conversation waiting for its transcript and the wake-word loop, the runtime restarts them
+            if self._text_pending:
+                self._text_pending = False
+                self.results.put(("text", ""))
+        self._wakes.put(None)
+
+    def wait_for_activation(self, agent_flow) -> None:
+        """Run the conversations started by the wake word (blocks)."""
+        while not self.stopped.is_set():
+            position = self._wakes.get()
+            if position is None:
+                return
+            TRACER.start_trace("turn")
+            TRACER.event("wake_word")
+            try:
+                agent_flow.main_flow(start_position=position)
+            except Exception as e:
+                # A failed conversation (LLM, tool) does not stop the listening
+                logger.error(f"Conversation failed: {e}")
+            finally:
+                self.send(("idle",))
+
+    def stop_listening(self) -> None:
+        """End wait_for_activation."""
+        self.stopped.set()
+        self._wakes.put(None)
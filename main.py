@@ -1,27 +1,208 @@
-from agent.agent.parser import AgentParser, Config
-from agent.agent.config import GOOGLE_API_KEY, VOSK_MODEL_PATH
-from agent.agent.flow import AgentFlow
-from agent.agent.llm.gemini_client import GeminiClient, GeminiConfig
-from threading import Thread
-from buddy.events_handler import pool_events_handler
-from buddy.hey_buddy_detector import WakeWordEngine
+import argparse
+import asyncio
+
+from agent.agent.utils.startup import BackgroundLoader, StartupProfiler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI Buddies")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print a breakdown of the startup time (imports and model loads) once listening.")
+    parser.add_argument("--stt-engine", choices=["vosk", "whisper", "auto"], default=None,
+                        help="Speech-to-text engine of the dictation (default: STT_ENGINE of the config). "
+                             "'auto' uses Whisper when its measured real-time factor is low enough.")
+    parser.add_argument("--devices", default=None,
+                        help="Microphones of the rooms, comma-separated device indices, optionally named "
+                             "(e.g. 'kitchen=1,bedroom=3'). The room that hears the wake word most clearly "
+                             "gets the conversation.")
+    parser.add_argument("--multiprocess", action="store_true",
+                        help="Run the capture, wake word and speech-to-text in a worker process and the TTS voice "
+                             "in another, so decoding and synthesis do not compete with the agent for the GIL. "
+                             "Audio moves through shared memory.")
+    parser.add_argument("--presence", action="store_true",
+                        help="Watch the camera for motion. When nobody has been seen for a while, the wake word "
+                             "drops to VAD-only mode and the speech models are unloaded until motion or speech.")
+    parser.add_argument("--absence-timeout", type=float, default=600.0,
+                        help="Seconds without motion before nobody is considered present (default: 600).")
+    parser.add_argument("--trace", action="store_true",
+                        help="Record the latency timeline of every turn (wake word, speech-to-text, LLM, tools, "
+                             "TTS) to TRACES_PATH, and serve the p50/p95/p99 of each stage in the Prometheus "
+                             "format at http://127.0.0.1:METRICS_PORT/metrics.")
+    args = parser.parse_args()
+    if args.multiprocess and args.devices:
+        parser.error("--multiprocess does not support --devices")
+    return args
+
+
+def calibration_audio(tts, sample_rate=16000):
+    """A few seconds of synthesized speech, to measure the real-time factor of the STT engines."""
+    import numpy as np
+
+    speech = np.concatenate(list(tts.synthesize(
+        "Remind me to call my sister tomorrow at five, and add milk to the shopping list.")))
+    # Resample to the rate of the recognizers
+    times = np.arange(int(len(speech) * sample_rate / tts.SAMPLE_RATE)) / sample_rate
+    return np.interp(times, np.arange(len(speech)) / tts.SAMPLE_RATE, speech).astype(np.int16)
+
+
+def create_stt_engine(name, tts):
+    """The dictation engine, None for the default Vosk one."""
+    from agent.agent.config import VOSK_MODEL_PATH, WHISPER_MAX_RTF, WHISPER_MODEL
+    from agent.agent.speech.stt_engine import VoskEngine, WhisperEngine, select_engine
+
+    if name == "whisper":
+        return WhisperEngine(model_size=WHISPER_MODEL)
+    if name == "auto":
+        candidates = [WhisperEngine(model_size=WHISPER_MODEL), VoskEngine(VOSK_MODEL_PATH)]
+        return select_engine(candidates, calibration_audio(tts), max_rtf=WHISPER_MAX_RTF)
+    return None
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    profiler = StartupProfiler()
+    if args.profile_startup:
+        profiler.enable_import_timing()
+
+    with profiler.section("imports"):
+        from agent.agent.parser import AgentParser, Config
+        from agent.agent.config import (METRICS_PORT, PROFILER_SOCKET, PROFILES_PATH, STT_ENGINE, TRACES_PATH,
+                                        VOSK_MODEL_PATH, get_google_api_key)
+        from agent.agent.flow import AgentFlow
+        from agent.agent.llm.gemini_client import GeminiClient, GeminiConfig
+        # The names the agent flow imports them under, so they are the same modules
+        from agent.speech import tts
+        from agent.utils.tracing import TRACER, MetricsServer, TracingSink
+        from agent.utils.profiler import ControlServer, SamplingProfiler, install_signal_toggle
+        from agent.agent.speech.audio_capture import AudioCaptureService
+        from agent.agent.speech.barge_in import BargeInMonitor
+        from buddy.events_handler import check_and_alert_events
+        from buddy.capture_manager import CaptureManager, parse_devices
+        from buddy.hey_buddy_detector import WakeWordEngine
+        from buddy.presence import PresenceConfig, PresenceService, SpeechStackScaler
+        from buddy.runtime import Runtime
+        from buddy.speech_worker import SpeechWorker, SpeechWorkerConfig
+
     # Initialize configuration and parser
     config = Config()
     parser = AgentParser(config)
 
     # Initialize GeminiClient
     gemini_config = GeminiConfig(
-        api_key = GOOGLE_API_KEY,
+        api_key = get_google_api_key(),
         chat_mode=True
     )
-    
+
     llm_client = GeminiClient(gemini_config)
 
-    engine = WakeWordEngine(model_path=VOSK_MODEL_PATH, wake_phrase="hey buddy")
-    
-    # Create and run the agent flow
-    agent_flow = AgentFlow(parser, llm_client)
-    Thread(target=engine.wait_for_activation, args=(agent_flow,)).start()
-    Thread(target=pool_events_handler, args=(agent_flow,)).start()
\ No newline at end of file
+    # One microphone capture shared by the wake word and speech-to-text,
+    # or one per room sharing the model, or one in the speech worker process
+    manager = None
+    speech_worker = None
+    if args.multiprocess:
+        tts.use_worker_processes()
+        # Whisper is only picked by measuring it against the TTS voice in this process
+        stt_engine = "whisper" if (args.stt_engine or STT_ENGINE) == "whisper" else "vosk"
+        speech_worker = SpeechWorker(SpeechWorkerConfig(VOSK_MODEL_PATH, "hey buddy", stt_engine=stt_engine,
+                                                        profiles_path=PROFILES_PATH))
+        capture = speech_worker.capture
+    elif args.devices:
+        with profiler.section("wake_word_model"):
+            manager = CaptureManager(VOSK_MODEL_PATH, "hey buddy", parse_devices(args.devices))
+        capture = manager.rooms[0].capture
+    else:
+        capture = AudioCaptureService()
+
+    # Talking over the answer interrupts it
+    barge_in = BargeInMonitor(capture, tts.get_player())
+
+    # Create the agent flow, its heavy parts load in the background
+    agent_flow = AgentFlow(parser, llm_client, speculative=True, capture=capture, barge_in=barge_in,
+                           stt=speech_worker.stt if speech_worker else None)
+    loader = BackgroundLoader(profiler)
+
+    def load_stt():
+        engine = create_stt_engine(args.stt_engine or STT_ENGINE, tts)
+        if engine is not None:
+            agent_flow.stt.engine = engine
+        return agent_flow.stt.load_model()
+
+    if speech_worker is None:
+        loader.submit("stt_model", load_stt)
+    loader.submit("tts_voice", tts.start_service)
+    loader.submit("gemini", llm_client.warm_up)
+
+    if speech_worker is not None:
+        listener = speech_worker
+    elif manager is None:
+        with profiler.section("wake_word_model"):
+            listener = WakeWordEngine(model_path=VOSK_MODEL_PATH, wake_phrase="hey buddy", capture=capture)
+    else:
+        listener = manager
+
+    # The runtime owns the components: started together, supervised, stopped on SIGINT/SIGTERM
+    runtime = Runtime()
+    if speech_worker is not None:
+        # Freed last, after the worker stopped
+        runtime.on_shutdown(speech_worker.close)
+        runtime.add_service("speech_worker", start=speech_worker.start, stop=speech_worker.stop,
+                            heartbeat=lambda: capture.last_block_at, stall_timeout=5.0)
+    else:
+        captures = [room.capture for room in manager.rooms] if manager else [capture]
+        runtime.add_service("audio_capture", start=manager.start if manager else capture.start,
+                            stop=manager.stop if manager else capture.stop,
+                            heartbeat=lambda: min(room_capture.last_block_at for room_capture in captures),
+                            stall_timeout=3.0)
+    runtime.on_shutdown(tts.stop_service)
+    runtime.on_shutdown(agent_flow.turns.stop)
+
+    if args.presence:
+        wake_engines = [room.detector for room in manager.rooms] if manager else [listener]
+        presence = PresenceService(PresenceConfig(absence_timeout=args.absence_timeout),
+                                   busy=lambda: agent_flow.is_running)
+        presence.add_listener(SpeechStackScaler(wake_engines, stt=agent_flow.stt, tts=tts))
+        for engine in wake_engines:
+            # Someone talking in the dark is present too
+            engine.on_speech = lambda: presence.report_activity("voice")
+        runtime.add_service("presence", start=presence.start, stop=presence.stop)
+
+    if args.trace:
+        sink = TracingSink(TRACES_PATH)
+        TRACER.sinks.append(sink)
+        metrics_server = MetricsServer(TRACER, port=METRICS_PORT)
+        metrics_server.add_source("runtime", runtime.metrics)
+        metrics_server.add_source("turns", agent_flow.turns.metrics)
+        metrics_server.add_source("tts", tts.metrics)
+        if speech_worker is None:
+            # In the worker process otherwise
+            metrics_server.add_source("endpointer", agent_flow.stt.endpointer.metrics)
+        if args.presence:
+            metrics_server.add_source("presence", presence.metrics)
+        runtime.on_shutdown(sink.close)
+        runtime.add_service("metrics", start=metrics_server.start, stop=metrics_server.stop)
+
+    # Off until toggled: SIGUSR1, or 'start'/'stop' on the control socket
+    sampling_profiler = SamplingProfiler(output_dir=PROFILES_PATH)
+    install_signal_toggle(sampling_profiler)
+    # The speech worker decodes Vosk in its own process, the commands reach it too
+    control = ControlServer(sampling_profiler, PROFILER_SOCKET,
+                            remotes={"speech_worker": speech_worker.control} if speech_worker else None)
+    runtime.add_service("profiler_control", start=control.start, stop=control.stop)
+    # A profile still running is written at shutdown
+    runtime.on_shutdown(sampling_profiler.stop)
+
+    runtime.add_loop("wake_word", listener.wait_for_activation, agent_flow, stop=listener.stop_listening)
+    runtime.every("event_alerts", 5.0, check_and_alert_events, agent_flow)
+
+    async def report_startup():
+        while not listener.listening.is_set():
+            await asyncio.sleep(0.05)
+        profiler.mark("listening")
+        if args.profile_startup:
+            await runtime.run_in("io", loader.wait_all)
+            profiler.mark("all_models_loaded")
+            profiler.disable_import_timing()
+            print(profiler.report())
+
+    runtime.add_task("startup_report", report_startup, supervised=False)
+    runtime.run()
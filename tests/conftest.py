@@ -0,0 +1,53 @@
+"""Fakes shared by the tests."""
+
+import sys
+import types
+
+import pytest
+
+
+class WakeRecognizer:
+    """Vosk recognizer hearing the wake phrase in every utterance."""
+
+    def __init__(self, model, sample_rate, grammar=None):
+        self.model = model
+        self.grammar = grammar
+        self.resets = 0
+
+    def AcceptWaveform(self, data):
+        return False
+
+    def PartialResult(self):
+        return '{"partial": "hey buddy"}'
+
+    def FinalResult(self):
+        return '{"text": "hey buddy"}'
+
+    def Reset(self):
+        self.resets += 1
+
+
+@pytest.fixture
+def fake_vosk(monkeypatch):
+    """Replaces the vosk module. Returns the paths of the models loaded."""
+    loads = []
+    module = types.ModuleType("vosk")
+    module.Model = lambda path: loads.append(path) or object()
+    module.KaldiRecognizer = WakeRecognizer
+    monkeypatch.setitem(sys.modules, "vosk", module)
+    return loads
+
+
+class Clock:
+    """Time source moved by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
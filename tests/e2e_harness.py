@@ -0,0 +1,285 @@
+"""Offline harness of the end-to-end latency benchmarks.
+
+Drives `AgentFlow` through scripted multi-turn conversations without a
+microphone, a network or a sound card: utterances are text (or WAV
+recordings, transcribed by Vosk) in place of the microphone, the LLM is a
+`ReplayLLMClient` with a configurable latency, and the answers are spoken by
+a silent voice into a `NullAudioSink`. Every turn is traced (see
+agent.utils.tracing); the report gives per-stage timings, LLM calls per turn
+and the regressions against a stored baseline.
+
+Environment:
+    BUDDIES_E2E_TIMINGS: Set to also compare the timings with the baseline
+        (by default only the deterministic LLM calls per turn are compared,
+        wall-clock latencies vary too much between machines).
+    BUDDIES_E2E_UPDATE_BASELINE: Set to store the results as the new baseline.
+    BUDDIES_BENCH_REALTIME: Set to play the answers at real time.
+    BUDDIES_BENCH_OUTPUT: Directory the results are written to, as e2e.json.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from agent.flow import AgentFlow
+from agent.llm import ReplayLLMClient
+from agent.parser import AgentParser, Config
+from agent.speech import tts
+from agent.speech.playback import NullAudioSink
+from agent.utils.tracing import TRACER, Trace
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "e2e_benchmark.json")
+
+# Stages reported, besides the tool spans
+STAGES = ["turn", "stt", "agent_turn", "llm_call", "tts_talk", "response_latency", "time_to_first_token"]
+
+
+@dataclass
+class Latencies:
+    """Simulated latencies of the external components, in seconds."""
+    llm: float = 0.05
+    llm_first_token: float = 0.02
+    synthesis: float = 0.01         # Per sentence
+    endpoint: float = 0.05          # Silence after the last word, before the end of speech is detected
+
+
+@dataclass
+class Step:
+    """One user utterance and the LLM responses of its turn."""
+    say: str                        # Transcript, or the path of a WAV recording
+    responses: List[Union[str, Dict[str, Any]]]
+    alert: Optional[str] = None     # Alert queued while the user speaks
+
+
+@dataclass
+class Scenario:
+    name: str
+    steps: List[Step]
+    speculative: bool = True
+    latencies: Latencies = field(default_factory=Latencies)
+
+
+def answer(text: str, end: bool = False) -> Dict[str, Any]:
+    """An LLM response speaking `text`."""
+    response = {"thought": "Answering.", "response": text}
+    if end:
+        response["end"] = 1
+    return response
+
+
+def tool_call(tool_name: str, **arguments: Any) -> Dict[str, Any]:
+    """An LLM response calling a tool."""
+    return {"thought": f"Calling {tool_name}.", "tool_calls": [{"tool_name": tool_name, "arguments": arguments}]}
+
+
+class SilentSynthesizer:
+    """Stands in for a Piper voice: silence as long as the text would take to say."""
+
+    def __init__(self, config, delay: float) -> None:
+        self.sample_rate = config.sample_rate
+        self.delay = delay
+
+    def synthesize(self, text: str) -> np.ndarray:
+        time.sleep(self.delay)
+        return np.zeros(int(0.3 * len(text.split()) * self.sample_rate), dtype=np.int16)
+
+    def close(self) -> None:
+        pass
+
+
+def transcribe_wav(path: str) -> str:
+    """Transcript of a recording by the dictation engine, as the microphone would deliver it."""
+    from agent.config import VOSK_MODEL_PATH
+    from agent.speech.audio_source import read_wav
+    from agent.speech.stt import SpeechToText
+    from speech_harness import RATE, capture_of
+
+    stt = SpeechToText(model_path=VOSK_MODEL_PATH, capture=capture_of(read_wav(path, RATE)))
+    return stt.listen_once(start_position=0)
+
+
+class ScriptedSpeechToText:
+    """
+    `SpeechToText` replaying the utterances of a script.
+    """
+
+    def __init__(self, steps: List[Step], endpoint: float, before: Callable[[Step], None]) -> None:
+        self.steps = list(steps)
+        self.endpoint = endpoint
+        self.before = before
+        self.capture = None
+
+    def load_model(self) -> None:
+        pass
+
+    def unload_model(self) -> None:
+        pass
+
+    def listen_once(self, on_stable_partial: Optional[Callable[[str], None]] = None,
+                    start_position: Optional[int] = None, user: str = "default") -> str:
+        if not self.steps:
+            raise RuntimeError("The conversation went on after the end of the script.")
+        step = self.steps.pop(0)
+        self.before(step)
+        text = transcribe_wav(step.say) if step.say.endswith(".wav") else step.say
+        TRACER.event("first_partial")
+        if on_stable_partial is not None:
+            on_stable_partial(text)
+        # The endpointer waits for the silence after the last word
+        time.sleep(self.endpoint)
+        TRACER.event("end_of_speech")
+        return text
+
+
+class _Collector:
+    """Tracing sink keeping the traces in memory."""
+
+    def __init__(self) -> None:
+        self.traces: List[Trace] = []
+
+    def write(self, trace: Trace) -> None:
+        self.traces.append(trace)
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass
+class TurnResult:
+    stages: Dict[str, float]        # Seconds per stage, summed over the spans of the turn
+    llm_calls: int
+    speculative_calls: int
+
+
+def _turn_result(trace: Trace) -> TurnResult:
+    # From the start of the trace to its last span or event
+    stages = {"turn": max([span.start + span.duration for span in trace.spans] + list(trace.events.values()),
+                          default=0.0)}
+    for span in trace.spans:
+        stages[span.name] = stages.get(span.name, 0.0) + span.duration
+    events = trace.events
+    if "end_of_speech" in events and "tts_first_chunk" in events:
+        stages["response_latency"] = events["tts_first_chunk"] - events["end_of_speech"]
+    if "end_of_speech" in events and "llm_first_token" in events:
+        stages["time_to_first_token"] = events["llm_first_token"] - events["end_of_speech"]
+    return TurnResult(stages, sum(span.name == "llm_call" for span in trace.spans),
+                      sum(span.name == "llm_speculative" for span in trace.spans))
+
+
+def run_scenario(scenario: Scenario) -> List[TurnResult]:
+    """
+    Run a conversation from the wake word to its end, in the current directory
+    (the tools write their files there).
+
+    Returns:
+        The results of the turns, in order.
+    """
+    latencies = scenario.latencies
+    responses = [response if isinstance(response, str) else json.dumps(response)
+                 for step in scenario.steps for response in step.responses]
+    llm = ReplayLLMClient({"responses": responses, "latency": latencies.llm,
+                           "first_token_latency": latencies.llm_first_token})
+    sink = NullAudioSink(speed=1.0 if os.environ.get("BUDDIES_BENCH_REALTIME") else 0.0)
+    tts.use_output(sink, lambda config: SilentSynthesizer(config, latencies.synthesis), cache_directory="tts_cache")
+
+    flow: Optional[AgentFlow] = None
+
+    def before(step: Step) -> None:
+        if step.alert is not None:
+            flow.alert(step.alert)
+
+    stt = ScriptedSpeechToText(scenario.steps, latencies.endpoint, before)
+    flow = AgentFlow(AgentParser(Config()), llm, speculative=scenario.speculative, stt=stt)
+    collector = _Collector()
+    # Ends a trace left open by someone else before collecting
+    TRACER.start_trace("turn")
+    TRACER.event("wake_word")
+    TRACER.sinks.append(collector)
+    try:
+        flow.main_flow()
+    finally:
+        TRACER.sinks.remove(collector)
+        flow.turns.stop()
+        tts.use_output()
+        sink.close()
+    if stt.steps or llm.remaining:
+        raise AssertionError(f"'{scenario.name}' ended with {len(stt.steps)} utterances and "
+                             f"{llm.remaining} responses left")
+    return [_turn_result(trace) for trace in collector.traces]
+
+
+def summarize(turns: List[TurnResult]) -> Dict[str, float]:
+    """Median of every stage over the turns, and the LLM calls per turn."""
+    summary = {"turns": float(len(turns)),
+               "llm_calls_per_turn": sum(turn.llm_calls for turn in turns) / len(turns),
+               "speculative_calls_per_turn": sum(turn.speculative_calls for turn in turns) / len(turns)}
+    stages = sorted({stage for turn in turns for stage in turn.stages},
+                    key=lambda stage: (stage not in STAGES, STAGES.index(stage) if stage in STAGES else 0, stage))
+    for stage in stages:
+        values = [turn.stages[stage] for turn in turns if stage in turn.stages]
+        summary[f"{stage}_p50"] = float(np.median(values))
+    return summary
+
+
+def load_baseline() -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as file:
+        return json.load(file)
+
+
+def compare_timings() -> bool:
+    return bool(os.environ.get("BUDDIES_E2E_TIMINGS"))
+
+
+def regressions(name: str, summary: Dict[str, float], baseline: Dict[str, Dict[str, float]],
+                timings: bool = True, tolerance: float = 1.0, slack: float = 0.05) -> List[str]:
+    """
+    Compare a scenario with its baseline.
+
+    The LLM calls are deterministic and may not grow at all. With `timings`,
+    the timings regress when they exceed the baseline by `tolerance`
+    (relative) plus `slack` seconds.
+    """
+    reference = baseline.get(name)
+    if reference is None:
+        return []
+    found = []
+    for metric, value in summary.items():
+        if metric not in reference:
+            continue
+        if metric.endswith("calls_per_turn"):
+            if value > reference[metric] + 1e-9:
+                found.append(f"{name}: {metric} {value:.2f} > {reference[metric]:.2f}")
+        elif timings and metric.endswith("_p50") and value > reference[metric] * (1 + tolerance) + slack:
+            found.append(f"{name}: {metric} {value * 1000:.0f} ms > baseline {reference[metric] * 1000:.0f} ms")
+    return found
+
+
+def report(summaries: Dict[str, Dict[str, float]]) -> str:
+    """
+    Format the results as a table, write them to BUDDIES_BENCH_OUTPUT if set,
+    and store them as the baseline if BUDDIES_E2E_UPDATE_BASELINE is set.
+    """
+    output = os.environ.get("BUDDIES_BENCH_OUTPUT")
+    if output:
+        os.makedirs(output, exist_ok=True)
+        with open(os.path.join(output, "e2e.json"), "w") as file:
+            json.dump(summaries, file, indent=2)
+    if os.environ.get("BUDDIES_E2E_UPDATE_BASELINE"):
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as file:
+            json.dump(summaries, file, indent=2, sort_keys=True)
+            file.write("\n")
+
+    lines = []
+    for name, summary in summaries.items():
+        lines.append(name)
+        for metric, value in summary.items():
+            shown = f"{value * 1000:10.1f} ms" if metric.endswith("_p50") else f"{value:10.2f}"
+            lines.append(f"  {metric:<32}{shown}")
+    return "\n".join(lines)
@@ -0,0 +1,167 @@
+"""Offline harness of the speech-stack benchmarks.
+
+Runs `WakeWordEngine` and `SpeechToText` on recorded or synthetic audio fed
+through `AudioCaptureService`, without a microphone.
+
+Environment:
+    BUDDIES_VOSK_MODELS: Vosk model directories to compare, separated by
+        os.pathsep (default: VOSK_MODEL_PATH).
+    BUDDIES_SPEECH_FIXTURES: Directory of recordings (16-bit PCM WAV):
+        wake/*.wav with a sidecar *.json {"wake_end": seconds} marking the
+        end of the wake phrase, commands/*.wav with a sidecar *.txt
+        transcript, background/*.wav without the wake phrase.
+    BUDDIES_BENCH_REALTIME: Set to feed the audio at real time.
+    BUDDIES_BENCH_OUTPUT: Directory the results are written to, as speech.json.
+"""
+
+import glob
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from agent.config import VOSK_MODEL_PATH
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.audio_source import ArraySource, read_wav
+
+RATE = 16000
+WAKE_PHRASE = "hey buddy"
+
+
+def model_paths() -> List[str]:
+    paths = os.environ.get("BUDDIES_VOSK_MODELS", VOSK_MODEL_PATH).split(os.pathsep)
+    return [path for path in paths if os.path.isdir(path)]
+
+
+def fixtures(kind: str) -> List[Tuple[str, np.ndarray, Optional[str]]]:
+    """(path, samples, sidecar content) of the recordings of a kind."""
+    root = os.environ.get("BUDDIES_SPEECH_FIXTURES")
+    if not root:
+        return []
+    recordings = []
+    for path in sorted(glob.glob(os.path.join(root, kind, "*.wav"))):
+        sidecar = None
+        for extension in (".json", ".txt"):
+            if os.path.exists(path[:-4] + extension):
+                with open(path[:-4] + extension) as file:
+                    sidecar = file.read()
+        recordings.append((path, read_wav(path, RATE), sidecar))
+    return recordings
+
+
+def realtime() -> bool:
+    return bool(os.environ.get("BUDDIES_BENCH_REALTIME"))
+
+
+def capture_of(samples: np.ndarray) -> AudioCaptureService:
+    """A started capture service playing `samples`."""
+    return AudioCaptureService(sample_rate=RATE, source=ArraySource(samples, RATE, realtime=realtime())).start()
+
+
+@dataclass
+class SpeechBenchmark:
+    """Measurements of one model."""
+    model: str
+    audio_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    wake_latencies: List[float] = field(default_factory=list)
+    wake_misses: int = 0
+    endpoint_delays: List[float] = field(default_factory=list)
+    exact_transcripts: int = 0
+    commands: int = 0
+    false_triggers: int = 0
+    background_seconds: float = 0.0
+
+    @contextmanager
+    def timed(self, samples: np.ndarray) -> Iterator[None]:
+        """Add the wall and CPU time of a block processing `samples`."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.wall_seconds += time.perf_counter() - wall
+            self.cpu_seconds += time.process_time() - cpu
+            self.audio_seconds += len(samples) / RATE
+
+    def summary(self) -> Dict[str, float]:
+        def median(values):
+            return float(np.median(values)) if values else float("nan")
+
+        return {
+            "real_time_factor": self.wall_seconds / self.audio_seconds if self.audio_seconds else float("nan"),
+            "cpu_per_audio_second": self.cpu_seconds / self.audio_seconds if self.audio_seconds else float("nan"),
+            "wake_latency_p50": median(self.wake_latencies),
+            "wake_miss_rate": self.wake_misses / (len(self.wake_latencies) + self.wake_misses)
+            if self.wake_latencies or self.wake_misses else float("nan"),
+            "endpoint_delay_p50": median(self.endpoint_delays),
+            "transcript_exact_rate": self.exact_transcripts / self.commands if self.commands else float("nan"),
+            "false_triggers_per_hour": self.false_triggers / (self.background_seconds / 3600)
+            if self.background_seconds else float("nan"),
+        }
+
+
+def wake_detector(model_path: str, capture: AudioCaptureService):
+    from buddy.hey_buddy_detector import WakeWordEngine
+
+    return WakeWordEngine(model_path=model_path, wake_phrase=WAKE_PHRASE, capture=capture)
+
+
+def run_wake(benchmark: SpeechBenchmark, samples: np.ndarray, wake_end: float) -> None:
+    """Detect the wake phrase in a recording, recording the latency after its end."""
+    capture = capture_of(samples)
+    detector = wake_detector(benchmark.model, capture)
+    with benchmark.timed(samples):
+        position = detector.detect(capture.reader(position=0))
+    if position is None:
+        benchmark.wake_misses += 1
+    else:
+        benchmark.wake_latencies.append(position / RATE - wake_end)
+
+
+def run_background(benchmark: SpeechBenchmark, samples: np.ndarray) -> None:
+    """Count the wake phrase detections in audio without it."""
+    capture = capture_of(samples)
+    detector = wake_detector(benchmark.model, capture)
+    reader = capture.reader(position=0)
+    with benchmark.timed(samples):
+        while detector.detect(reader) is not None:
+            benchmark.false_triggers += 1
+    benchmark.background_seconds += len(samples) / RATE
+
+
+def run_command(benchmark: SpeechBenchmark, samples: np.ndarray, transcript: Optional[str]) -> None:
+    """Transcribe a command, recording the endpointing delay."""
+    from agent.speech.stt import SpeechToText
+
+    capture = capture_of(samples)
+    stt = SpeechToText(model_path=benchmark.model, capture=capture)
+    stt.load_model()
+    with benchmark.timed(samples):
+        text = stt.listen_once(start_position=0)
+    if stt.endpointer.records:
+        benchmark.endpoint_delays.append(stt.endpointer.records[-1].silence_seconds)
+    benchmark.commands += 1
+    if transcript is not None and " ".join(text.split()) == " ".join(transcript.lower().split()):
+        benchmark.exact_transcripts += 1
+
+
+def report(benchmarks: List[SpeechBenchmark]) -> str:
+    """Format the results as a table, and write them to BUDDIES_BENCH_OUTPUT if set."""
+    rows = [(os.path.basename(os.path.normpath(benchmark.model)), benchmark.summary()) for benchmark in benchmarks]
+    output = os.environ.get("BUDDIES_BENCH_OUTPUT")
+    if output:
+        os.makedirs(output, exist_ok=True)
+        with open(os.path.join(output, "speech.json"), "w") as file:
+            json.dump([dict(asdict(benchmark), **summary) for benchmark, (_, summary) in zip(benchmarks, rows)],
+                      file, indent=2)
+
+    columns = list(rows[0][1]) if rows else []
+    lines = ["model".ljust(24) + "".join(column.rjust(26) for column in columns)]
+    for name, summary in rows:
+        lines.append(name.ljust(24) + "".join(f"{summary[column]:26.3f}" for column in columns))
+    return "\n".join(lines)
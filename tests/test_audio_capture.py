@@ -0,0 +1,45 @@
+import numpy as np
+
+from agent.speech.audio_capture import AudioCaptureService, AudioRingBuffer
+
+
+def test_ring_buffer_views_are_contiguous_across_wrap():
+    ring = AudioRingBuffer(capacity=10)
+    ring.write(np.arange(8, dtype=np.int16))
+    ring.write(np.arange(8, 14, dtype=np.int16))
+
+    view = ring.view(6, 8)
+    assert list(view) == list(range(6, 14))
+    assert view.base is not None  # A view, not a copy
+    assert ring.oldest_position == 4
+
+
+def test_ring_buffer_keeps_only_capacity():
+    ring = AudioRingBuffer(capacity=4)
+    ring.write(np.arange(10, dtype=np.int16))
+    assert ring.write_position == 10
+    assert list(ring.view(6, 4)) == [6, 7, 8, 9]
+
+
+def test_readers_have_independent_positions():
+    capture = AudioCaptureService(buffer_seconds=1.0, sample_rate=100)
+    capture.ring.write(np.arange(50, dtype=np.int16))
+
+    first = capture_reader(capture, position=0)
+    second = capture_reader(capture, position=40)
+    assert list(first.read(5)) == [0, 1, 2, 3, 4]
+    assert list(second.read(5)) == [40, 41, 42, 43, 44]
+    assert second.read(20, timeout=0.01) is None
+
+
+def test_reader_behind_the_buffer_skips_ahead():
+    capture = AudioCaptureService(buffer_seconds=0.1, sample_rate=100)
+    reader = capture_reader(capture, position=0)
+    capture.ring.write(np.arange(30, dtype=np.int16))
+    assert list(reader.read(5)) == [20, 21, 22, 23, 24]
+
+
+def capture_reader(capture, position):
+    # Readers without opening a microphone
+    from agent.speech.audio_capture import AudioReader
+    return AudioReader(capture, position)
@@ -0,0 +1,52 @@
+import time
+import wave
+
+import numpy as np
+
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.audio_source import ArraySource, RawPCMSource, WavFileSource, synthetic_audio
+from agent.speech.vad import EnergyVAD
+
+
+def write_wav(path, samples, rate, channels=1):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(channels)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(samples.astype("<i2").tobytes())
+
+
+def test_capture_plays_a_file_source_to_the_end(tmp_path):
+    samples = np.arange(16000 * 12, dtype=np.int64).astype(np.int16)
+    samples.astype("<i2").tofile(tmp_path / "audio.pcm")
+
+    capture = AudioCaptureService(source=RawPCMSource(str(tmp_path / "audio.pcm"))).start()
+    reader = capture.reader(position=0)
+    # The buffer holds the whole file (more than the default 10 s)
+    read = [reader.read(4000) for _ in range(48)]
+    assert np.array_equal(np.concatenate(read), samples)
+    assert reader.read(4000) is None
+
+
+def test_wav_source_converts_to_mono_at_the_capture_rate(tmp_path):
+    stereo = np.repeat(np.full(8000, 1000, dtype=np.int16), 2)
+    write_wav(tmp_path / "stereo.wav", stereo, rate=8000, channels=2)
+
+    source = WavFileSource(str(tmp_path / "stereo.wav"), sample_rate=16000)
+    assert source.length == 16000
+    assert np.all(source.samples == 1000)
+
+
+def test_realtime_source_is_paced():
+    source = ArraySource(np.zeros(1600, dtype=np.int16), 16000, realtime=True)
+    source.open()
+    started = time.perf_counter()
+    while source.read(400) is not None:
+        pass
+    assert time.perf_counter() - started >= 0.09
+
+
+def test_synthetic_voice_passes_the_vad_and_noise_does_not():
+    vad = EnergyVAD(16000)
+    assert not vad.is_speech(synthetic_audio([("noise", 0.2)]))
+    assert vad.is_speech(synthetic_audio([("voice", 0.2)]))
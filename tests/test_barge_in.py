@@ -0,0 +1,74 @@
+import threading
+import time
+
+import numpy as np
+
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.barge_in import BargeInMonitor
+from agent.speech.playback import AudioPlayer
+
+RATE = 16000
+
+
+def voice(amplitude, seconds=0.04):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+
+
+def make_monitor():
+    capture = AudioCaptureService(sample_rate=RATE)
+    capture.start = lambda: capture  # No microphone in tests
+    return BargeInMonitor(capture, AudioPlayer()), capture
+
+
+def test_echo_of_the_playback_is_not_user_speech():
+    monitor, _ = make_monitor()
+    monitor.player.levels.append((time.monotonic(), 8000.0))
+
+    assert not monitor.is_user_speech(voice(3000))  # Below the echo margin
+    assert monitor.is_user_speech(voice(20000))
+
+
+def test_speech_interrupts_and_reports_where_it_started():
+    monitor, capture = make_monitor()
+    capture.ring.write(np.zeros(RATE, dtype=np.int16))
+    interrupted = threading.Event()
+
+    with monitor.watch(on_barge_in=interrupted.set):
+        capture.ring.write(np.zeros(monitor.chunk, dtype=np.int16))
+        for _ in range(monitor.config.trigger_chunks):
+            capture.ring.write(voice(10000))
+        assert interrupted.wait(1.0)
+
+    speech_start = RATE + monitor.chunk
+    preroll = capture.seconds_to_samples(monitor.config.preroll_ms / 1000)
+    assert monitor.triggered.is_set()
+    assert monitor.position == speech_start - preroll
+
+
+def test_player_stop_drops_queued_audio_and_releases_play():
+    player = AudioPlayer(blocksize=4)
+    player.start = lambda: player
+    done = player.play([np.ones(100, dtype=np.int16)], blocking=False)
+
+    player.stop()
+    out = np.zeros((4, 1), dtype=np.int16)
+    player._callback(out, 4, None, None)
+    assert done.is_set()
+    assert list(out[:, 0]) == [0, 0, 0, 0]
+
+
+def test_player_stop_keeps_the_message_queued_after_it():
+    player = AudioPlayer(blocksize=4)
+    player.start = lambda: player
+    interrupted = player.play([np.ones(100, dtype=np.int16)], blocking=False)
+
+    # Barge-in races the next answer: both happen before the next callback
+    player.stop()
+    answered = player.play([np.full(4, 7, dtype=np.int16)], blocking=False)
+    out = np.zeros((4, 1), dtype=np.int16)
+    player._callback(out, 4, None, None)
+    assert interrupted.is_set()
+    assert list(out[:, 0]) == [7, 7, 7, 7]
+    player._callback(out, 4, None, None)
+    assert answered.is_set()
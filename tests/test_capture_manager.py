@@ -0,0 +1,98 @@
+import sys
+import threading
+
+from agent.speech.audio_source import ArraySource, synthetic_audio
+from conftest import WakeRecognizer
+
+
+class FakeFlow:
+    def __init__(self):
+        self.called = threading.Event()
+        self.capture = None
+
+    def main_flow(self, start_position=None, capture=None):
+        self.capture = capture
+        self.called.set()
+
+
+def test_parse_devices():
+    from buddy.capture_manager import parse_devices
+
+    assert parse_devices("1, 3") == [("room1", 1), ("room3", 3)]
+    assert parse_devices("kitchen=1,bedroom=3") == [("kitchen", 1), ("bedroom", 3)]
+
+
+def test_room_that_heard_the_wake_word_loudest_is_chosen(fake_vosk, tmp_path):
+    from buddy.capture_manager import CaptureManager
+
+    # The same utterance, heard from near the kitchen microphone
+    segments = [("noise", 0.5), ("voice", 0.6), ("noise", 0.8)]
+    near = synthetic_audio(segments)
+    far = (synthetic_audio(segments, seed=1) * 0.3).astype(near.dtype)
+    manager = CaptureManager(str(tmp_path), "hey buddy",
+                             [("bedroom", ArraySource(far, realtime=True)),
+                              ("kitchen", ArraySource(near, realtime=True))],
+                             arbitration_window=0.5)
+    flow = FakeFlow()
+
+    threading.Thread(target=manager.wait_for_activation, args=(flow,), daemon=True).start()
+    assert flow.called.wait(5.0)
+    assert flow.capture is manager.rooms[1].capture
+
+
+def test_rooms_listen_again_after_a_restart(fake_vosk, tmp_path):
+    from buddy.capture_manager import CaptureManager
+
+    audio = synthetic_audio([("noise", 0.5), ("voice", 0.6), ("noise", 0.8)])
+    manager = CaptureManager(str(tmp_path), "hey buddy", [("kitchen", ArraySource(audio, realtime=True))])
+    flow = FakeFlow()
+
+    threading.Thread(target=manager.wait_for_activation, args=(flow,), daemon=True).start()
+    try:
+        assert flow.called.wait(5.0)
+        flow.called.clear()
+        # As the watchdog does with a stalled microphone
+        manager.stop()
+        manager.start()
+        assert flow.called.wait(5.0)
+    finally:
+        manager.stop_listening()
+        manager.stop()
+
+
+def test_rooms_do_not_decode_during_a_conversation(fake_vosk, tmp_path):
+    from buddy.capture_manager import CaptureManager
+
+    decoded = []
+
+    class CountingRecognizer(WakeRecognizer):
+        def AcceptWaveform(self, data):
+            decoded.append(len(data))
+            return False
+
+    sys.modules["vosk"].KaldiRecognizer = CountingRecognizer
+    # The wake phrase, then more speech while the conversation runs
+    audio = synthetic_audio([("noise", 0.5), ("voice", 0.6), ("noise", 0.8), ("voice", 2.0), ("noise", 0.5)])
+    manager = CaptureManager(str(tmp_path), "hey buddy",
+                             [("kitchen", ArraySource(audio, realtime=True)),
+                              ("bedroom", ArraySource(audio.copy(), realtime=True))])
+    talking = threading.Event()
+    release = threading.Event()
+
+    class BlockingFlow:
+        def main_flow(self, start_position=None, capture=None):
+            talking.set()
+            release.wait(5.0)
+
+    threading.Thread(target=manager.wait_for_activation, args=(BlockingFlow(),), daemon=True).start()
+    try:
+        assert talking.wait(5.0)
+        # The chunk being decoded when the conversation started is finished
+        threading.Event().wait(0.3)
+        before = len(decoded)
+        threading.Event().wait(0.8)
+        assert len(decoded) == before
+    finally:
+        release.set()
+        manager.stop_listening()
+        manager.stop()
@@ -0,0 +1,130 @@
+"""End-to-end latency benchmarks of scripted conversations (see e2e_harness)."""
+
+import json
+import os
+
+import pytest
+
+from agent.llm import ReplayLLMClient
+from e2e_harness import (Scenario, Step, answer, compare_timings, load_baseline, regressions, report, run_scenario,
+                         summarize, tool_call)
+
+SCENARIOS = [
+    Scenario("grocery_session", [
+        Step("add milk to the groceries", [tool_call("add_to_list", item="milk", list_name="groceries"),
+                                           answer("I added milk.")]),
+        Step("and eggs", [tool_call("add_to_list", item="eggs", list_name="groceries"),
+                          answer("Eggs are on the list.")]),
+        Step("what is on my grocery list", [tool_call("get_list_by_name", list_name="groceries"),
+                                            answer("Milk and eggs.")]),
+        Step("thanks that's all", [answer("Bye!", end=True)]),
+    ]),
+    Scenario("reminders", [
+        Step("remind me to call my sister on the first of june at five", [
+            tool_call("add_event", time="01/06/2030 17:00", notification=True, importance=3,
+                      description="Call my sister"),
+            answer("I will remind you on June first at five.")]),
+        Step("what do I have on that day", [tool_call("get_events", start_date="2030-06-01",
+                                                      end_date="2030-06-02"),
+                                            answer("You need to call your sister at five.")]),
+        Step("cancel it", [tool_call("remove_event", description="Call my sister"),
+                           answer("Done, it is cancelled.", end=True)]),
+    ]),
+    Scenario("alert_during_conversation", [
+        Step("add bread to the groceries", [tool_call("add_to_list", item="bread", list_name="groceries"),
+                                            answer("Bread is on the list.")]),
+        Step("anything else I should know", [answer("Your doctor appointment is now, and nothing else.", end=True)],
+             alert="The user needs to be alerted for event 'Doctor appointment'."),
+    ]),
+    Scenario("grocery_session_without_speculation", [
+        Step("add apples to the groceries", [tool_call("add_to_list", item="apples", list_name="groceries"),
+                                             answer("Apples are on the list.")]),
+        Step("goodbye", [answer("Bye!", end=True)]),
+    ], speculative=False),
+]
+
+
+@pytest.fixture(scope="module")
+def summaries():
+    results = {}
+    yield results
+    print("\n" + report(results))
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=[scenario.name for scenario in SCENARIOS])
+def test_scripted_conversation(scenario, summaries, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    turns = run_scenario(scenario)
+    summary = summaries[scenario.name] = summarize(turns)
+
+    assert len(turns) == len(scenario.steps)
+    for turn in turns:
+        assert turn.stages["response_latency"] > 0
+        assert "agent_turn" in turn.stages and "tts_talk" in turn.stages
+    assert summary["llm_calls_per_turn"] + summary["speculative_calls_per_turn"] >= 1.0
+    assert not regressions(scenario.name, summary, load_baseline(), timings=compare_timings())
+
+
+def test_speculation_saves_the_first_llm_call(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    [speculative] = run_scenario(Scenario("speculative", [Step("goodbye", [answer("Bye!", end=True)])]))
+    [plain] = run_scenario(Scenario("plain", [Step("goodbye", [answer("Bye!", end=True)])], speculative=False))
+
+    assert (speculative.llm_calls, speculative.speculative_calls) == (0, 1)
+    assert (plain.llm_calls, plain.speculative_calls) == (1, 0)
+    if compare_timings():
+        assert speculative.stages["response_latency"] < plain.stages["response_latency"]
+
+
+def test_alert_is_folded_into_the_next_answer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scenario = SCENARIOS[2]
+    turns = run_scenario(scenario)
+    # The alert is mentioned in the answer, not spoken on its own
+    assert [turn.llm_calls for turn in turns] == [1, 1]
+    with open("lists.json") as file:
+        assert "bread" in json.load(file)["groceries"]
+
+
+def test_regressions_against_a_baseline():
+    baseline = {"grocery_session": {"llm_calls_per_turn": 1.5, "response_latency_p50": 0.1}}
+    assert regressions("grocery_session", {"llm_calls_per_turn": 1.5, "response_latency_p50": 0.2},
+                       baseline) == []
+    found = regressions("grocery_session", {"llm_calls_per_turn": 1.75, "response_latency_p50": 0.3}, baseline)
+    assert len(found) == 2 and "llm_calls_per_turn" in found[0]
+    assert regressions("unknown", {"llm_calls_per_turn": 9.0}, baseline) == []
+    # Without the timings, only the LLM calls
+    assert regressions("grocery_session", {"llm_calls_per_turn": 1.5, "response_latency_p50": 0.3}, baseline,
+                       timings=False) == []
+
+
+def test_replay_client_does_not_cycle():
+    client = ReplayLLMClient({"responses": ["first", "second"]})
+    response, commit = client.call_readonly("system", "hello")
+    assert response == "first" and client.remaining == 2
+    commit()
+    assert client.call("system", "again") == "second"
+    with pytest.raises(RuntimeError):
+        client.call("system", "one more")
+    assert [message for _, message in client.calls] == ["hello", "again", "one more"]
+
+
+def test_replay_commit_fails_once_the_replay_advanced():
+    client = ReplayLLMClient({"responses": ["first", "second"]})
+    response, commit = client.call_readonly("system", "hello")
+    assert client.call("system", "alert") == response == "first"
+    with pytest.raises(RuntimeError):
+        commit()
+    assert client.remaining == 1
+
+
+def test_wav_commands(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fixtures = pytest.importorskip("speech_harness").fixtures
+    pytest.importorskip("vosk")
+    recordings = fixtures("commands")
+    if not recordings:
+        pytest.skip("No command recordings (set BUDDIES_SPEECH_FIXTURES)")
+    for path, _, transcript in recordings:
+        [turn] = run_scenario(Scenario(os.path.basename(path), [Step(path, [answer("Okay.", end=True)])]))
+        assert turn.stages["stt"] > 0
@@ -0,0 +1,60 @@
+from agent.speech.endpointing import Endpointer, EndpointerConfig, looks_complete
+
+CHUNK = 0.1
+
+
+def run(endpointer, timeline, start=0.0):
+    """Feed (speech, transcript) steps of CHUNK seconds, return the end time or None."""
+    endpointer.start(start)
+    now = start
+    for speech, transcript in timeline:
+        now += CHUNK
+        if endpointer.update(now, speech, transcript):
+            return round(now - start, 1)
+    return None
+
+
+def speak(words, chunks_per_word=3):
+    steps, text = [], []
+    for word in words:
+        text.append(word)
+        steps += [(True, " ".join(text))] * chunks_per_word
+    return steps, " ".join(text)
+
+
+def test_complete_command_ends_quickly():
+    steps, text = speak(["turn", "off", "the", "lights"])
+    ended = run(Endpointer(), steps + [(False, text)] * 30)
+    # 1.2 s of speech, then about 400 ms of silence
+    assert ended is not None and 1.5 <= ended <= 1.7
+
+
+def test_unfinished_sentence_waits_longer():
+    steps, text = speak(["remind", "me", "to"])
+    ended = run(Endpointer(), steps + [(False, text)] * 30)
+    assert ended is not None and ended - 0.9 >= 0.8
+
+
+def test_hesitant_speaker_gets_more_time():
+    endpointer = Endpointer()
+    steps, text = speak(["call", "my", "sister"])
+    hesitant = steps[:3] + [(False, "call")] * 3 + steps[3:6] + [(False, "call my")] * 3 + steps[6:]
+    for _ in range(10):
+        assert run(endpointer, hesitant + [(False, text)] * 30) > 2.0
+
+    assert endpointer.typical_pause > 0.35
+    assert endpointer.threshold(text) > 0.5
+    assert endpointer.metrics()["utterances"] == 10
+    # Other users keep the default
+    endpointer.start(0.0, user="guest")
+    assert endpointer.threshold(text) < 0.4
+
+
+def test_silence_without_transcript_never_ends_a_streaming_utterance():
+    assert run(Endpointer(EndpointerConfig(max_silence=0.5)), [(True, "")] * 3 + [(False, "")] * 30) is None
+
+
+def test_looks_complete():
+    assert looks_complete("what time is it")
+    assert not looks_complete("add milk and")
+    assert not looks_complete("")
@@ -1,4 +1,3 @@
-import json
 from agent.tools.event_tools.get_events_tool import GetEventsTool, GetEventsToolConfig
 
 def test_get_events_tool():
@@ -7,7 +6,7 @@ def test_get_events_tool():
     tool = GetEventsTool(config)
 
     # Define test input
-    test_input = json.dumps({
+    test_input = tool.validator({
         "start_date": "2024-05-20",
         "end_date": "2024-05-20"
     })
@@ -20,4 +19,4 @@ def test_get_events_tool():
 
 # Run the test
 if __name__ == "__main__":
-    test_get_events_tool()
\ No newline at end of file
+    test_get_events_tool()
@@ -0,0 +1,126 @@
+import json
+import random
+import re
+import time
+
+import pytest
+
+from agent.utils.json_extract import JsonObjectScanner, extract_json, repair_json
+
+PROTOCOL_KEYS = ("thought", "response", "tool_calls")
+
+REPLY = {
+    "thought": "The user wants milk, I'll add it.",
+    "response": "Added milk to your \"groceries\" list {as asked}.",
+    "tool_calls": [
+        {"tool_name": "add_to_list", "arguments": {"list_name": "groceries", "item": "milk"}}
+    ],
+}
+
+
+@pytest.mark.parametrize("message", [
+    json.dumps(REPLY),
+    "Sure! Here's the JSON you asked for:\n" + json.dumps(REPLY) + "\nLet me know if you need more.",
+    "```json\n" + json.dumps(REPLY, indent=2) + "\n```",
+    '{"note": "ignore me"} and then ' + json.dumps(REPLY),
+    json.dumps(REPLY) + ' {"second": "object"}',
+])
+def test_extract_json_finds_protocol_object(message):
+    assert extract_json(message, PROTOCOL_KEYS) == REPLY
+
+
+@pytest.mark.parametrize("message, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ("{'a': 'it\\'s', 'b': 'say \"hi\"'}", {"a": "it's", "b": 'say "hi"'}),
+    ('{"response": "line one\nline two"}', {"response": "line one\nline two"}),
+    ('{"response": "cut off', {"response": "cut off"}),
+    ('{"tool_calls": [{"tool_name": "x", "arguments": {"item": "milk"', {"tool_calls": [{"tool_name": "x", "arguments": {"item": "milk"}}]}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+])
+def test_extract_json_repairs_locally(message, expected):
+    assert extract_json(message) == expected
+
+
+@pytest.mark.parametrize("message", ["", "no json here", "[1, 2, 3]", "{{{{::::}"])
+def test_extract_json_raises_value_error(message):
+    with pytest.raises(ValueError):
+        extract_json(message)
+
+
+def test_scanner_is_incremental():
+    text = "prose " + json.dumps(REPLY) + " more prose " + json.dumps({"b": "\\\\"})
+    scanner = JsonObjectScanner()
+    found = []
+    for i in range(0, len(text), 7):
+        found.extend(scanner.feed(text[i:i + 7]))
+    assert [json.loads(f) for f in found] == [REPLY, {"b": "\\\\"}]
+    assert scanner.pending() is None
+
+
+def test_repair_json_keeps_valid_json():
+    valid = json.dumps(REPLY)
+    assert json.loads(repair_json(valid)) == REPLY
+
+
+def _mutate(rng: random.Random, payload: dict) -> str:
+    text = json.dumps(payload, indent=rng.choice([None, 2]))
+    mutation = rng.randrange(5)
+    if mutation == 0:
+        text = re.sub(r"([}\]])", r",\1", text, count=rng.randint(1, 3))
+    elif mutation == 1:
+        text = text.replace('"', "'")
+    elif mutation == 2:
+        text = f"```json\n{text}\n```"
+    prose = rng.choice(["", "Here you go: ", "Sure, I can do that.\n"])
+    if mutation == 3:
+        # A truncated reply has nothing after the cut
+        return prose + text.rstrip("}]\n ")
+    return prose + text + rng.choice(["", " Hope that helps!", "\n"])
+
+
+def test_fuzz_extract_json_recovers_mutated_replies():
+    rng = random.Random(1234)
+    for _ in range(500):
+        payload = {
+            "thought": "".join(rng.choice("abc xyz") for _ in range(rng.randint(0, 20))),
+            "response": "".join(rng.choice("hello world") for _ in range(rng.randint(1, 20))),
+            "tool_calls": [{"tool_name": "t", "arguments": {"n": rng.randint(0, 9)}}] * rng.randint(0, 2),
+        }
+        message = _mutate(rng, payload)
+        result = extract_json(message, PROTOCOL_KEYS)
+        assert result["response"] == payload["response"], message
+
+
+def test_fuzz_extract_json_never_crashes():
+    rng = random.Random(99)
+    alphabet = '{}[]"\':,\\ \nabc123'
+    for _ in range(2000):
+        message = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        try:
+            assert isinstance(extract_json(message), dict)
+        except ValueError:
+            pass
+
+
+def test_benchmark_extract_json():
+    message = "Sure! " + json.dumps({**REPLY, "thought": "x" * 5000}) + " Thanks."
+    iterations = 200
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = extract_json(message, PROTOCOL_KEYS)
+    clean = (time.perf_counter() - start) / iterations
+    assert result == {**REPLY, "thought": "x" * 5000}
+
+    broken = message.replace('"', "'").removesuffix(" Thanks.").rstrip("}]")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = extract_json(broken, PROTOCOL_KEYS)
+    repaired = (time.perf_counter() - start) / iterations
+    # The single quotes of the response are kept, the rest is recovered
+    assert set(result) == set(PROTOCOL_KEYS)
+    assert result["thought"] == "x" * 5000
+    assert result["tool_calls"] == REPLY["tool_calls"]
+
+    # Loose bounds (about 20x the measured times), only a complexity regression trips them
+    assert clean < 2e-3 and repaired < 30e-3
@@ -0,0 +1,80 @@
+import threading
+
+import numpy as np
+import pytest
+
+from buddy.motion_engine import FrameGrabber, MotionConfig, MotionEngine, benchmark, synthetic_frames
+
+
+class FakeCamera:
+    """Numbered frames, as fast as they are read."""
+
+    def __init__(self, count):
+        self.count = count
+        self.index = 0
+        self.released = False
+        self.done = threading.Event()
+
+    def read(self):
+        if self.index >= self.count:
+            self.done.set()
+            return False, None
+        self.index += 1
+        return True, np.full((4, 4), self.index, dtype=np.uint16)
+
+    def release(self):
+        self.released = True
+
+
+def test_grabber_keeps_only_the_latest_frame():
+    camera = FakeCamera(1000)
+    grabber = FrameGrabber(capture=camera).start()
+    assert camera.done.wait(5.0)
+
+    frame = grabber.read(timeout=1.0)
+    assert frame[0, 0] == 1000
+    assert grabber.frames_dropped == 999
+    # Nothing newer, and the camera ended
+    assert grabber.read(timeout=1.0) is None
+    grabber.stop()
+    assert camera.released
+
+
+def test_idle_scene_skips_frames(clock):
+    counts = iter([1] + [0] * 100)
+    engine = MotionEngine(MotionConfig(idle_after=2.0, idle_skip=5), grabber=FrameGrabber(capture=object()),
+                          detector=lambda frame: next(counts), clock=clock)
+    frame = np.zeros((4, 4), dtype=np.uint8)
+
+    assert engine.process(frame) == 1
+    results = [engine.process(frame) for _ in range(9)]
+    assert None not in results
+
+    clock.now = 3.0
+    results = [engine.process(frame) for _ in range(10)]
+    assert results.count(None) == 8
+    assert engine.frames_skipped == 8
+
+
+def test_motion_ends_idle_mode(clock):
+    counts = iter([0, 2, 0])
+    engine = MotionEngine(MotionConfig(idle_after=2.0, idle_skip=1), grabber=FrameGrabber(capture=object()),
+                          detector=lambda frame: next(counts), clock=clock)
+    frame = np.zeros((4, 4), dtype=np.uint8)
+    clock.now = 3.0
+
+    engine.process(frame)
+    assert engine.idle
+    engine.process(frame)
+    assert not engine.idle
+
+
+def test_benchmark_detects_a_moving_object():
+    pytest.importorskip("cv2")
+    config = MotionConfig(history=50)
+    engine = MotionEngine(config, grabber=FrameGrabber(capture=object(), config=config))
+    started = engine.last_motion
+
+    results = benchmark(engine, synthetic_frames(120, config.width, config.height))
+    assert results["frames"] == 120
+    assert engine.last_motion > started
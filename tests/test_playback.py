@@ -0,0 +1,30 @@
+import numpy as np
+
+from agent.speech.playback import AudioPlayer
+
+
+def test_callback_streams_queued_chunks_without_gaps():
+    player = AudioPlayer(blocksize=4)
+    player.enqueue(np.array([1, 2, 3], dtype=np.int16))
+    player.enqueue(np.array([4, 5, 6, 7, 8], dtype=np.int16))
+
+    out = np.zeros((4, 1), dtype=np.int16)
+    player._callback(out, 4, None, None)
+    assert list(out[:, 0]) == [1, 2, 3, 4]
+    player._callback(out, 4, None, None)
+    assert list(out[:, 0]) == [5, 6, 7, 8]
+    player._callback(out, 4, None, None)
+    assert list(out[:, 0]) == [0, 0, 0, 0]
+
+
+def test_end_of_stream_is_signalled_after_last_chunk():
+    player = AudioPlayer(blocksize=4)
+    player.start = lambda: player  # No output device in tests
+    done = player.play([np.array([1, 2, 3, 4, 5], dtype=np.int16)], blocking=False)
+
+    out = np.zeros((4, 1), dtype=np.int16)
+    player._callback(out, 4, None, None)
+    assert not done.is_set()
+    player._callback(out, 4, None, None)
+    assert done.is_set()
+    assert list(out[:, 0]) == [5, 0, 0, 0]
@@ -0,0 +1,140 @@
+import threading
+import types
+
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.audio_source import ArraySource, synthetic_audio
+from buddy.presence import PresenceConfig, PresenceService, SpeechStackScaler
+
+
+class FakeSTT:
+    def __init__(self):
+        self.loaded = True
+
+    def load_model(self):
+        self.loaded = True
+
+    def unload_model(self):
+        self.loaded = False
+
+
+class FakeTTS:
+    def __init__(self):
+        self.started = True
+
+    def start_service(self):
+        self.started = True
+
+    def stop_service(self):
+        self.started = False
+
+
+def test_absence_after_timeout_and_presence_on_motion(clock):
+    service = PresenceService(PresenceConfig(absence_timeout=60), clock=clock)
+    changes = []
+    service.add_listener(changes.append)
+
+    clock.now = 59
+    assert service.check()
+    clock.now = 61
+    assert not service.check()
+    clock.now = 100
+    service.report_activity("motion")
+    assert service.present
+    assert changes == [False, True]
+
+
+def test_voice_only_counts_when_configured(clock):
+    service = PresenceService(PresenceConfig(absence_timeout=60, voice_counts=False), clock=clock)
+    clock.now = 61
+    service.check()
+
+    service.report_activity("voice")
+    assert not service.present
+
+
+def test_no_absence_during_a_conversation(clock):
+    conversation = types.SimpleNamespace(is_running=True)
+    service = PresenceService(PresenceConfig(absence_timeout=60, voice_counts=False), clock=clock,
+                              busy=lambda: conversation.is_running)
+    stt, tts = FakeSTT(), FakeTTS()
+    service.add_listener(SpeechStackScaler([], stt=stt, tts=tts))
+
+    # Talking without moving for longer than the timeout
+    clock.now = 100
+    assert service.check()
+    assert stt.loaded and tts.started
+
+    # The timeout counts from the end of the conversation
+    conversation.is_running = False
+    clock.now = 159
+    assert service.check()
+    clock.now = 161
+    assert not service.check()
+    assert not stt.loaded and not tts.started
+
+
+def test_scaler_unloads_while_absent_and_warms_up_on_presence():
+    engine = types.SimpleNamespace(vad_only=False)
+    stt, tts = FakeSTT(), FakeTTS()
+    scaler = SpeechStackScaler([engine], stt=stt, tts=tts)
+
+    scaler(False)
+    assert engine.vad_only and not stt.loaded and not tts.started
+
+    scaler(True)
+    scaler._warm_up.join(2.0)
+    assert not engine.vad_only and stt.loaded and tts.started
+
+
+def test_vad_only_wake_engine_does_not_decode(fake_vosk, tmp_path):
+    from buddy.hey_buddy_detector import WakeWordEngine
+
+    samples = synthetic_audio([("noise", 0.5), ("voice", 0.6), ("noise", 0.8)])
+    capture = AudioCaptureService(source=ArraySource(samples)).start()
+    detector = WakeWordEngine(model_path=str(tmp_path), wake_phrase="hey buddy", capture=capture)
+    detector.vad_only = True
+
+    assert detector.detect(capture.reader(position=0)) is None
+
+
+def test_speech_in_vad_only_mode_resumes_decoding(fake_vosk, tmp_path):
+    from buddy.hey_buddy_detector import WakeWordEngine
+
+    samples = synthetic_audio([("noise", 0.5), ("voice", 0.6), ("noise", 0.8)])
+    capture = AudioCaptureService(source=ArraySource(samples)).start()
+    detector = WakeWordEngine(model_path=str(tmp_path), wake_phrase="hey buddy", capture=capture)
+    detector.vad_only = True
+    # Like a presence service scaling the stack up on speech
+    detector.on_speech = lambda: setattr(detector, "vad_only", False)
+
+    assert detector.detect(capture.reader(position=0)) is not None
+
+
+def test_wake_loop_returns_when_the_capture_ends(fake_vosk, tmp_path):
+    from buddy.hey_buddy_detector import WakeWordEngine
+
+    capture = AudioCaptureService(source=ArraySource(synthetic_audio([("noise", 0.5)]))).start()
+    detector = WakeWordEngine(model_path=str(tmp_path), wake_phrase="hey buddy", capture=capture)
+
+    # No wake phrase, then a closed capture: left to the supervisor's backoff
+    thread = threading.Thread(target=detector.wait_for_activation, args=(None,), daemon=True)
+    thread.start()
+    thread.join(5.0)
+    assert not thread.is_alive()
+
+
+def test_failed_conversation_keeps_the_wake_loop_listening(fake_vosk, tmp_path):
+    from buddy.hey_buddy_detector import WakeWordEngine
+
+    samples = synthetic_audio([("noise", 0.5), ("voice", 0.6), ("noise", 1.0)])
+    # Real time, the wake loop reads from the position it starts at
+    capture = AudioCaptureService(source=ArraySource(samples, realtime=True)).start()
+    detector = WakeWordEngine(model_path=str(tmp_path), wake_phrase="hey buddy", capture=capture)
+
+    class FailingFlow:
+        def main_flow(self, start_position=None):
+            raise RuntimeError("LLM unavailable")
+
+    # Not a capture failure, the supervisor's backoff is not needed
+    assert detector.wait_for_activation_once(FailingFlow()) is True
+    capture.stop()
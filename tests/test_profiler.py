@@ -0,0 +1,105 @@
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from agent.utils.counters import Counters
+from agent.utils.profiler import ControlServer, SamplingProfiler
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profiler_writes_folded_stacks(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001, output_dir=str(tmp_path))
+    try:
+        assert profiler.start()
+        assert not profiler.start()
+        time.sleep(0.2)
+        path = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profiler.stop() is None
+    lines = open(path).read().splitlines()
+    assert profiler.sample_count > 0
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and "_busy_loop (test_profiler.py:" in busy[0]
+    # The sampler does not sample itself
+    assert not any(line.startswith("sampling-profiler;") for line in lines)
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="unix sockets")
+def test_control_socket_toggles_the_profiler(tmp_path):
+    counters = Counters()
+    counters.increment("events.sweeps")
+    counters.increment("stt.accept_waveform", 3)
+    profiler = SamplingProfiler(interval=0.001, output_dir=str(tmp_path))
+    server = ControlServer(profiler, str(tmp_path / "control.sock"), counters=counters).start()
+
+    def send(command: str) -> str:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(server.path)
+            client.sendall(command.encode("utf-8"))
+            return client.recv(4096).decode("utf-8").strip()
+
+    try:
+        assert send("start") == "ok: started"
+        time.sleep(0.05)
+        assert send("status").startswith("ok: running")
+        reply = send("stop")
+        assert reply.startswith("ok: ") and os.path.exists(reply[4:])
+        assert send("stop") == "error: not running"
+        assert send("counters") == 'ok: {"events.sweeps": 1, "stt.accept_waveform": 3}'
+        assert send("flush").startswith("error: unknown command")
+    finally:
+        server.stop()
+    assert not os.path.exists(server.path)
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="unix sockets")
+def test_silent_client_does_not_block_the_control_socket(tmp_path):
+    profiler = SamplingProfiler(output_dir=str(tmp_path))
+    server = ControlServer(profiler, str(tmp_path / "control.sock"), counters=Counters(), timeout=0.1).start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+            silent.connect(server.path)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(2.0)
+                client.connect(server.path)
+                client.sendall(b"status")
+                assert client.recv(4096).decode("utf-8").startswith("ok: stopped")
+    finally:
+        server.stop()
+
+
+def test_commands_are_forwarded_to_the_remotes(tmp_path):
+    counters = Counters()
+    counters.increment("json.file_loads")
+    commands = []
+
+    def worker(command):
+        commands.append(command)
+        if command == "counters":
+            return True, '{"stt.accept_waveform": 7}'
+        return True, "started"
+
+    server = ControlServer(SamplingProfiler(output_dir=str(tmp_path)), str(tmp_path / "control.sock"),
+                           counters=counters, remotes={"speech_worker": worker, "gone": lambda command: None})
+
+    assert server.handle("counters") == (True, '{"json.file_loads": 1, "speech_worker.stt.accept_waveform": 7}')
+    ok, reply = server.handle("start")
+    server.profiler.stop()
+    assert ok and reply == "started; speech_worker: started; gone: unreachable"
+    assert server.handle("flush")[0] is False
+    assert commands == ["counters", "start"]
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+
+from buddy.runtime import Runtime, RuntimeConfig
+
+
+def run_in_background(runtime):
+    thread = threading.Thread(target=runtime.run, daemon=True)
+    thread.start()
+    return thread
+
+
+def fast_config():
+    return RuntimeConfig(watchdog_interval=0.05, restart_backoff=0.05, lag_interval=0.02, stop_timeout=1.0)
+
+
+def test_crashed_loop_is_restarted_and_shutdown_stops_in_reverse_order():
+    runtime = Runtime(fast_config())
+    events = []
+    stopped = threading.Event()
+    calls = []
+
+    def loop():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        stopped.wait()
+
+    runtime.add_service("capture", start=lambda: events.append("start capture"),
+                        stop=lambda: events.append("stop capture"))
+    runtime.add_loop("wake", loop, stop=lambda: (events.append("stop wake"), stopped.set()))
+    thread = run_in_background(runtime)
+
+    deadline = time.monotonic() + 2.0
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    runtime.shutdown()
+    thread.join(2.0)
+
+    assert not thread.is_alive()
+    assert len(calls) == 2
+    assert runtime.restarts["wake"] == 1
+    assert events == ["start capture", "stop wake", "stop capture"]
+
+
+def test_watchdog_restarts_a_stalled_service():
+    runtime = Runtime(fast_config())
+    heartbeat = [time.monotonic()]
+    starts = []
+
+    def start():
+        starts.append(1)
+        heartbeat[0] = time.monotonic() + 10.0 if len(starts) > 1 else time.monotonic() - 10.0
+
+    runtime.add_service("capture", start=start, stop=lambda: None, heartbeat=lambda: heartbeat[0],
+                        stall_timeout=1.0)
+    thread = run_in_background(runtime)
+    deadline = time.monotonic() + 2.0
+    while len(starts) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    runtime.shutdown()
+    thread.join(2.0)
+
+    assert len(starts) == 2
+    assert runtime.restarts["capture"] == 1
+
+
+def test_periodic_jobs_and_loop_lag(caplog):
+    config = fast_config()
+    config.report_interval = 0.1
+    caplog.set_level(logging.INFO, logger="Runtime")
+    runtime = Runtime(config)
+    ticks = []
+    runtime.every("alerts", 0.02, ticks.append, 1)
+    thread = run_in_background(runtime)
+    time.sleep(0.3)
+    runtime.shutdown()
+    thread.join(2.0)
+
+    assert len(ticks) >= 3
+    metrics = runtime.metrics()
+    assert 0.0 <= metrics["loop_lag_p50"] <= metrics["loop_lag_max"]
+    assert any(record.getMessage().startswith("Runtime metrics: loop_lag_p50") for record in caplog.records)
@@ -0,0 +1,54 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.audio_source import ArraySource, synthetic_audio
+from agent.speech.shm_ring import SharedCapture, SharedRingBuffer
+
+
+def write_ramp(name, count):
+    ring = SharedRingBuffer.attach(name)
+    for start in range(0, count, 100):
+        ring.write(np.arange(start, start + 100, dtype=np.int16))
+    ring.release()
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRingBuffer.create(1000)
+    yield ring
+    ring.unlink()
+
+
+def test_wrapped_window_is_contiguous(ring):
+    ring.write(np.arange(900, dtype=np.int16))
+    ring.write(np.arange(900, 1200, dtype=np.int16))
+
+    assert ring.oldest_position == 200
+    assert np.array_equal(ring.view(850, 200), np.arange(850, 1050))
+    with pytest.raises(IndexError):
+        ring.view(100, 10)
+
+
+def test_another_process_writes_the_audio(ring):
+    process = multiprocessing.get_context("spawn").Process(target=write_ramp, args=(ring.name, 800))
+    process.start()
+    process.join(30)
+
+    assert ring.wait_for(800, timeout=1.0)
+    assert np.array_equal(ring.view(0, 800), np.arange(800))
+
+
+def test_shared_capture_reads_a_capture_service(ring):
+    samples = synthetic_audio([("voice", 0.05)])
+    capture = AudioCaptureService(source=ArraySource(samples), ring=ring, buffer_seconds=0.05).start()
+    attached = SharedRingBuffer.attach(ring.name)
+    reader = SharedCapture(attached).reader(position=0)
+
+    assert np.array_equal(reader.read(len(samples), timeout=1.0), samples)
+    capture.stop()
+    # The writer closed the ring, the reader gives up
+    assert reader.read(100, timeout=1.0) is None
+    attached.release()
@@ -0,0 +1,102 @@
+import pytest
+
+from agent import flow
+from agent.llm.gemini_client import GeminiClient, GeminiConfig
+from agent.parser import AgentParser, Config
+
+
+class FakeResponse:
+    """A Gemini response, whole or iterated as its streamed chunks."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def __iter__(self):
+        return iter([self])
+
+
+class FakeChat:
+    """Gemini chat session: the history grows with every message sent."""
+
+    def __init__(self, model, history):
+        self.model = model
+        self.history = history
+
+    def send_message(self, message, stream=False):
+        self.history += [message, f"answer to {message}"]
+        return FakeResponse(f"answer to {message}")
+
+
+class FakeModel:
+    def start_chat(self, history):
+        return FakeChat(self, history)
+
+
+@pytest.fixture
+def client():
+    client = GeminiClient(GeminiConfig(api_key="key", chat_mode=True))
+    client._create_model = lambda system_instruction: FakeModel()
+    return client
+
+
+@pytest.fixture
+def agent_flow(client, monkeypatch):
+    # No microphone in tests
+    monkeypatch.setattr(flow, "SpeechToText", lambda **kwargs: None)
+    agent_flow = flow.AgentFlow(AgentParser(Config()), client, speculative=True)
+    yield agent_flow
+    agent_flow._executor.shutdown()
+
+
+def test_readonly_call_forks_the_chat_session(client):
+    client.call("system", "hello")
+    session = client.chat_session
+
+    text, commit = client.call_readonly("system", "add milk")
+    assert text == "answer to add milk"
+    assert client.chat_session is session
+    assert session.history == ["hello", "answer to hello"]
+
+    commit()
+    assert client.chat_session is not session
+    assert client.chat_session.history == ["hello", "answer to hello", "add milk", "answer to add milk"]
+
+
+def test_commit_fails_once_the_session_advanced(client):
+    client.call("system", "hello")
+    _, commit = client.call_readonly("system", "add milk")
+    client.call("system", "add eggs")
+
+    with pytest.raises(RuntimeError):
+        commit()
+    assert client.chat_session.history[-2:] == ["add eggs", "answer to add eggs"]
+
+
+def test_claim_falls_back_when_the_session_advanced(agent_flow, client):
+    client.call("system", "hello")
+    agent_flow._speculate("add milk")
+    agent_flow._speculation._future.result(5.0)
+    # E.g. an alert answered while the user was speaking
+    client.call("system", "alert")
+
+    assert agent_flow._claim_speculation("add milk") is None
+    assert "add milk" not in client.chat_session.history
+
+
+def test_speculation_is_discarded_when_a_note_was_added(agent_flow, client):
+    agent_flow._speculate("add milk")
+    speculation = agent_flow._speculation
+    speculation._future.result(5.0)
+    agent_flow.add_note("The oven timer is done.")
+
+    assert agent_flow._claim_speculation("add milk") is None
+    assert speculation.cancelled
+    assert client.chat_session is None
+
+
+def test_matching_speculation_is_committed(agent_flow, client):
+    agent_flow._speculate("Add milk")
+    agent_flow._speculation._future.result(5.0)
+
+    assert agent_flow._claim_speculation("add  milk") == "answer to Add milk"
+    assert client.chat_session.history == ["Add milk", "answer to Add milk"]
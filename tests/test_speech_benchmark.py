@@ -0,0 +1,59 @@
+"""Speech-stack benchmarks on recorded and synthetic audio (see speech_harness)."""
+
+import json
+
+import pytest
+
+pytest.importorskip("vosk")
+
+from agent.speech.audio_source import synthetic_audio
+from speech_harness import (SpeechBenchmark, fixtures, model_paths, report, run_background, run_command,
+                            run_wake)
+
+MODELS = model_paths()
+pytestmark = pytest.mark.skipif(not MODELS, reason="No Vosk model found (set BUDDIES_VOSK_MODELS)")
+
+
+@pytest.fixture(scope="module")
+def benchmarks():
+    results = [SpeechBenchmark(model) for model in MODELS]
+    yield results
+    print("\n" + report(results))
+
+
+def test_false_triggers_on_synthetic_audio(benchmarks):
+    # Hiss, silence and voice-like tones, none of which is the wake phrase
+    samples = synthetic_audio([("noise", 5), ("voice", 1.5), ("silence", 1), ("voice", 0.5), ("noise", 5)] * 4)
+    for benchmark in benchmarks:
+        run_background(benchmark, samples)
+        assert benchmark.false_triggers == 0
+        assert benchmark.summary()["real_time_factor"] < 1.0
+
+
+def test_false_triggers_on_background_recordings(benchmarks):
+    recordings = fixtures("background")
+    if not recordings:
+        pytest.skip("No background recordings (set BUDDIES_SPEECH_FIXTURES)")
+    for benchmark in benchmarks:
+        for _, samples, _ in recordings:
+            run_background(benchmark, samples)
+
+
+def test_wake_word_latency(benchmarks):
+    recordings = fixtures("wake")
+    if not recordings:
+        pytest.skip("No wake phrase recordings (set BUDDIES_SPEECH_FIXTURES)")
+    for benchmark in benchmarks:
+        for _, samples, sidecar in recordings:
+            run_wake(benchmark, samples, json.loads(sidecar)["wake_end"])
+        assert benchmark.summary()["wake_miss_rate"] < 0.5
+
+
+def test_endpoint_latency_and_transcripts(benchmarks):
+    recordings = fixtures("commands")
+    if not recordings:
+        pytest.skip("No command recordings (set BUDDIES_SPEECH_FIXTURES)")
+    for benchmark in benchmarks:
+        for _, samples, transcript in recordings:
+            run_command(benchmark, samples, transcript)
+        assert benchmark.summary()["endpoint_delay_p50"] < 1.0
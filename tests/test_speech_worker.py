@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+
+from agent.speech.audio_source import ArraySource, synthetic_audio
+from buddy.speech_worker import SpeechWorker, SpeechWorkerConfig, _speech_process
+
+
+class ThreadWorker(SpeechWorker):
+    """Runs the worker in a thread, where the fake Vosk is visible."""
+
+    def _launch(self, connection):
+        thread = threading.Thread(target=_speech_process, args=(connection, self.ring.name, self.config),
+                                  daemon=True)
+        thread.start()
+        return thread
+
+
+class FakeFlow:
+    def __init__(self, worker):
+        self.worker = worker
+        self.texts = []
+        self.done = threading.Event()
+
+    def main_flow(self, start_position=None):
+        self.texts.append(self.worker.stt.listen_once(start_position=start_position))
+        self.done.set()
+
+
+def test_wake_word_and_transcript_come_from_the_worker(fake_vosk, tmp_path):
+    samples = synthetic_audio([("noise", 0.5), ("voice", 0.6), ("noise", 0.4), ("voice", 0.5), ("noise", 3.0)])
+    config = SpeechWorkerConfig(model_path=str(tmp_path), source=ArraySource(samples, realtime=True))
+    worker = ThreadWorker(config).start()
+    flow = FakeFlow(worker)
+
+    threading.Thread(target=worker.wait_for_activation, args=(flow,), daemon=True).start()
+    assert flow.done.wait(10.0)
+    assert flow.texts == ["hey buddy"]
+    # The agent process sees the captured audio
+    assert worker.capture.ring.write_position > 0
+
+    worker.stop_listening()
+    worker.close()
+
+
+def test_restart_while_idle_does_not_shift_the_transcripts(fake_vosk, tmp_path):
+    samples = synthetic_audio([("noise", 0.5), ("voice", 0.6), ("noise", 0.4), ("voice", 0.5), ("noise", 3.0)])
+    config = SpeechWorkerConfig(model_path=str(tmp_path), source=ArraySource(samples, realtime=True))
+    worker = ThreadWorker(config).start()
+    # Restarted (e.g. by the watchdog) with no conversation running
+    worker.stop()
+    worker.start()
+    flow = FakeFlow(worker)
+
+    flow.main_flow()
+    assert flow.texts == ["hey buddy"]
+
+    worker.stop_listening()
+    worker.close()
+
+
+def test_profiler_commands_run_in_the_worker(fake_vosk, tmp_path):
+    samples = synthetic_audio([("noise", 1.0)])
+    config = SpeechWorkerConfig(model_path=str(tmp_path), source=ArraySource(samples, realtime=True),
+                                profiles_path=str(tmp_path))
+    worker = ThreadWorker(config).start()
+    try:
+        ok, reply = worker.control("counters")
+        assert ok and isinstance(json.loads(reply), dict)
+        assert worker.control("start") == (True, "started")
+        ok, path = worker.control("stop")
+        assert ok and os.path.basename(path).startswith("profile-speech-worker-")
+    finally:
+        worker.close()
+    assert worker.control("status") is None
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from agent.speech.audio_capture import AudioCaptureService
+from agent.speech.stt import SpeechToText
+from agent.speech.stt_engine import RecognitionStream, STTEngine, contains_phrase, select_engine
+
+RATE = 16000
+
+
+class BatchStream(RecognitionStream):
+    """Transcribes the whole utterance on finish, like Whisper."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.samples = 0
+
+    def accept(self, samples):
+        self.samples += len(samples)
+        return None
+
+    def partial(self):
+        return ""
+
+    def finish(self):
+        self.engine.finished_with = self.samples
+        return "turn on the lights"
+
+    def close(self):
+        self.engine.open_streams -= 1
+
+
+class BatchEngine(STTEngine):
+    name = "batch"
+    streaming = False
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.loads = 0
+        self.unloads = 0
+        self.open_streams = 0
+
+    def load(self):
+        self.loads += 1
+
+    def unload(self):
+        self.unloads += 1
+
+    def open_stream(self, grammar=None):
+        self.open_streams += 1
+        return BatchStream(self)
+
+    def transcribe(self, samples, grammar=None):
+        import time
+        time.sleep(self.delay * len(samples) / RATE)
+        return ""
+
+
+def test_contains_phrase_ignores_case_and_punctuation():
+    assert contains_phrase("Hey, Buddy! What time is it?", "hey buddy")
+    assert not contains_phrase("they buddy", "hey buddy")
+
+
+def test_non_streaming_engine_ends_the_utterance_on_silence():
+    capture = AudioCaptureService(sample_rate=RATE)
+    capture.start = lambda: capture  # No microphone in tests
+    engine = BatchEngine()
+    stt = SpeechToText(capture=capture, engine=engine, silence_limit=0.5)
+
+    t = np.arange(RATE) / RATE
+    capture.ring.write((10000 * np.sin(2 * np.pi * 200 * t)).astype(np.int16))
+    capture.ring.write(np.zeros(RATE, dtype=np.int16))
+
+    assert stt.listen_once(start_position=0) == "turn on the lights"
+    assert engine.loads == 1
+    assert RATE < engine.finished_with < 2 * RATE
+    assert engine.open_streams == 0
+
+
+def test_listen_closes_the_stream_when_the_audio_is_unavailable():
+    capture = AudioCaptureService(sample_rate=RATE)
+    capture.start = lambda: capture  # No microphone in tests
+    engine = BatchEngine()
+    stt = SpeechToText(capture=capture, engine=engine)
+
+    def reader(position=None):
+        raise ValueError("position no longer buffered")
+
+    capture.reader = reader
+    with pytest.raises(ValueError):
+        stt.listen_once(start_position=0)
+    assert engine.open_streams == 0
+
+
+def test_select_engine_prefers_the_first_fast_enough():
+    accurate, fast = BatchEngine(delay=0.5), BatchEngine(delay=0.0)
+    samples = np.zeros(RATE // 10, dtype=np.int16)
+    assert select_engine([accurate, fast], samples, max_rtf=0.3) is fast
+    assert select_engine([accurate, fast], samples, max_rtf=1.0) is accurate
+
+
+def test_select_engine_unloads_the_other_candidates():
+    accurate, fast, unused = BatchEngine(delay=0.5), BatchEngine(delay=0.0), BatchEngine(delay=0.0)
+    samples = np.zeros(RATE // 10, dtype=np.int16)
+    assert select_engine([accurate, fast, unused], samples, max_rtf=0.3) is fast
+    assert (accurate.unloads, fast.unloads, unused.unloads) == (1, 0, 1)
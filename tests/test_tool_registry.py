@@ -0,0 +1,39 @@
+import sys
+
+from agent.tools import AVAILABLE_TOOLS, TOOLS_CONFIG, ToolManifest, ToolRegistry, build_registry
+from agent.tools.registry import load_object
+
+
+def test_tool_classes_take_their_metadata_from_the_manifests():
+    for manifest in AVAILABLE_TOOLS:
+        tool_class = load_object(manifest.target)
+        assert tool_class.NAME == manifest.name
+        assert tool_class.DESCRIPTION == manifest.description
+        assert tool_class.INPUT_FORMAT == manifest.input_format
+
+
+def test_tools_are_built_on_first_call(tmp_path):
+    registry = build_registry(discover=False)
+    config = {**TOOLS_CONFIG, "get_lists_headers": {"list_file_path": str(tmp_path / "lists.json")}}
+    tools = registry.create_tools(config)
+
+    tool = tools["get_lists_headers"]
+    assert not tool.is_loaded
+    assert tool.NAME == "get_lists_headers"
+
+    assert tool.execute(tool.validator({})) == []
+    assert tool.is_loaded
+
+
+def test_registered_module_is_not_imported_until_used():
+    registry = ToolRegistry()
+    registry.register(ToolManifest(
+        name="heavy",
+        description="A tool with a heavy module.",
+        input_format="{}",
+        target="json.tool:main",
+    ))
+    sys.modules.pop("json.tool", None)
+    tools = registry.create_tools()
+    assert "json.tool" not in sys.modules
+    assert not tools["heavy"].is_loaded
@@ -0,0 +1,52 @@
+"""Scale benchmarks of the tool layer over synthetic stores (see tool_scale_harness)."""
+
+import json
+
+import pytest
+
+from tool_scale_harness import ITEMS_PER_LIST, compare_timings, report, run, sizes, write_events, write_lists
+
+
+@pytest.fixture(scope="module")
+def curves(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(tmp_path_factory.mktemp("stores"))
+        results = run(sizes())
+    print("\n" + report(results))
+    return results
+
+
+def test_synthetic_stores(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_events(250)
+    write_lists(250)
+    with open("events.json") as file:
+        events = json.load(file)
+    with open("lists.json") as file:
+        lists = json.load(file)
+    assert len(events) == 250 and len({event["description"] for event in events}) == 250
+    assert len(lists) == 250 // ITEMS_PER_LIST
+    assert all(len(items) == ITEMS_PER_LIST for items in lists.values())
+
+
+def test_every_operation_is_measured_at_every_size(curves):
+    for curve in curves.values():
+        assert curve.sizes == sizes()
+        assert all(seconds > 0 for seconds in curve.seconds)
+        assert all(peak > 0 for peak in curve.peak_bytes)
+
+
+@pytest.mark.skipif(not compare_timings(), reason="Timings not compared (set BUDDIES_TOOL_SCALE_TIMINGS)")
+def test_no_operation_scales_worse_than_linearly(curves):
+    # The file-based stores are O(n) per call; a storage engine should bring
+    # the slopes down, anything steeper than linear is a regression
+    for curve in curves.values():
+        assert curve.slope() < 1.5, f"{curve.name} scales as O(n^{curve.slope():.2f})"
+
+
+def test_whole_store_tools_grow_with_the_store(curves):
+    # Reading the whole file is the cost being tracked: the peak memory of a
+    # call grows with the store
+    for name in ("get_events", "check_and_alert_events", "get_list_by_name"):
+        peaks = curves[name].peak_bytes
+        assert peaks[-1] > peaks[0]
@@ -0,0 +1,41 @@
+import pytest
+
+from agent.tools.event_tools.add_event_tool import AddEventTool
+from agent.tools.event_tools.models import NewEvent
+from agent.tools.list_tools.list_add_item_tool import ListAddTool
+from agent.tools.schema import ArgumentValidationError, compile_schema
+
+
+def test_validator_coerces_llm_values():
+    validator = compile_schema(NewEvent)
+    event = validator({"time": "00:10:00", "notification": "true", "importance": "3", "description": 42})
+    assert event == NewEvent(time="00:10:00", notification=True, importance=3, description="42")
+
+
+def test_validator_reports_every_problem():
+    validator = compile_schema(NewEvent)
+    with pytest.raises(ArgumentValidationError) as error:
+        validator({"time": "00:10:00", "importance": "high", "colour": "red"})
+    assert error.value.errors == [
+        "unexpected argument 'colour'",
+        "missing required argument 'notification'",
+        "'importance' expected an integer, got str 'high'",
+        "missing required argument 'description'",
+    ]
+
+
+def test_internal_event_fields_are_not_arguments():
+    with pytest.raises(ArgumentValidationError) as error:
+        AddEventTool.validator({"time": "00:10:00", "notification": True, "importance": 3,
+                                "description": "call mum", "has_passed": True})
+    assert error.value.errors == ["unexpected argument 'has_passed'"]
+
+
+def test_validator_rejects_non_object_arguments():
+    with pytest.raises(ArgumentValidationError):
+        ListAddTool.validator(["milk"])
+
+
+def test_tool_validator_compiled_from_schema():
+    item = ListAddTool.validator({"item": "milk"})
+    assert item.item == "milk" and item.list_name is None
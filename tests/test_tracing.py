@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+import urllib.request
+
+from agent.turns import TURN_ALERT, TURN_USER, TurnExecutor
+from agent.utils.tracing import MetricsServer, Tracer, TracingSink
+
+
+def test_trace_records_spans_and_first_events():
+    tracer = Tracer()
+    tracer.start_trace("turn")
+    tracer.event("wake_word")
+    with tracer.span("llm_call", model="test") as attributes:
+        attributes["retries"] = 0
+        time.sleep(0.01)
+    tracer.event("wake_word")
+    trace = tracer.end_trace()
+
+    assert list(trace.events) == ["wake_word"]
+    [span] = trace.spans
+    assert span.name == "llm_call"
+    assert span.duration >= 0.01
+    assert span.attributes == {"model": "test", "retries": 0}
+    assert tracer.current is None
+
+
+def test_derived_stages_and_quantiles():
+    tracer = Tracer()
+    for _ in range(3):
+        trace = tracer.start_trace("turn")
+        trace.events.update({"end_of_speech": 1.0, "llm_first_token": 1.5, "tts_first_chunk": 2.25})
+        tracer.end_trace()
+    # Spans outside a trace still count
+    with tracer.span("alert_turn"):
+        pass
+
+    quantiles = tracer.quantiles()
+    values, count, total = quantiles["response_latency"]
+    assert values[0.5] == 1.25 and count == 3 and total == 3.75
+    assert quantiles["time_to_first_token"][0][0.99] == 0.5
+    assert quantiles["turn"][1] == 3
+    assert quantiles["alert_turn"][1] == 1
+    assert "wake_to_first_partial" not in quantiles
+
+
+def test_turns_report_to_the_trace_of_their_submitter():
+    tracer = Tracer()
+    turns = TurnExecutor()
+    conversation = tracer.start_trace("turn")
+
+    def user(turn):
+        with tracer.span("agent_turn"):
+            pass
+
+    def alert(turn):
+        with tracer.trace("alert"), tracer.span("alert_turn"):
+            tracer.event("tts_first_chunk")
+
+    def poller():
+        # Another thread (e.g. the event poller) has no trace
+        assert tracer.current is None
+        with tracer.span("sweep"):
+            turns.submit(TURN_ALERT, alert).result(2.0)
+
+    try:
+        turns.submit(TURN_USER, user).result(2.0)
+        thread = threading.Thread(target=poller)
+        thread.start()
+        thread.join(2.0)
+        # Raised during the conversation, the alert is still traced on its own
+        turns.submit(TURN_ALERT, alert).result(2.0)
+    finally:
+        turns.stop()
+
+    assert tracer.current is conversation
+    assert [span.name for span in conversation.spans] == ["agent_turn"]
+    assert conversation.events == {}
+    assert tracer.quantiles()["alert"][1] == 2
+
+
+def test_sink_writes_jsonl_and_rotates(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer()
+    sink = TracingSink(str(path), max_bytes=400, backups=2)
+    tracer.sinks.append(sink)
+    for index in range(10):
+        tracer.start_trace("turn")
+        with tracer.span(f"tool:step{index}"):
+            pass
+        tracer.end_trace()
+    sink.close()
+
+    lines = path.read_text().splitlines()
+    record = json.loads(lines[-1])
+    assert record["name"] == "turn"
+    assert record["spans"][0]["name"] == "tool:step9"
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert not (tmp_path / "traces.jsonl.3").exists()
+
+
+def test_metrics_server_serves_prometheus_text():
+    tracer = Tracer()
+    with tracer.span("stt"):
+        pass
+    server = MetricsServer(tracer, port=0).start()
+    server.add_source("turns", lambda: {"pending": 2, "user_wait_max": 0.25})
+    server.add_source("broken", lambda: 1 / 0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=2.0) as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.stop()
+
+    assert "# TYPE buddy_stage_seconds summary" in body
+    assert 'buddy_stage_seconds{stage="stt",quantile="0.95"}' in body
+    assert 'buddy_stage_seconds_count{stage="stt"} 1' in body
+    assert "# TYPE buddy_turns_pending gauge\nbuddy_turns_pending 2\n" in body
+    assert "buddy_turns_user_wait_max 0.25" in body
+    assert "broken" not in body
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+from agent.speech.tts_cache import TTSCache
+
+
+def test_key_depends_on_text_voice_and_rate():
+    key = TTSCache.key("You have an event now", "lessac", 24000)
+    assert key == TTSCache.key("  You have  an event now ", "lessac", 24000)
+    assert key != TTSCache.key("You have an event now", "amy", 24000)
+    assert key != TTSCache.key("You have an event now", "lessac", 22050)
+
+
+def test_disk_tier_is_memory_mapped(tmp_path):
+    samples = np.arange(1000, dtype=np.int16)
+    TTSCache(str(tmp_path)).put("a", samples)
+
+    # A new cache (e.g. after a restart) only has the disk tier
+    cache = TTSCache(str(tmp_path))
+    cached = cache.get("a")
+    assert isinstance(cached, np.memmap)
+    assert np.array_equal(cached, samples)
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_memory_and_disk_tiers_evict_least_recently_used(tmp_path):
+    chunk = np.zeros(500, dtype=np.int16)  # 1000 bytes
+    cache = TTSCache(str(tmp_path), memory_bytes=2000, disk_bytes=2000)
+    cache.put("a", chunk)
+    os.utime(tmp_path / "a.pcm", (1, 1))
+    cache.put("b", chunk)
+    os.utime(tmp_path / "b.pcm", (2, 2))
+    cache.get("a")  # Refreshes a in both tiers
+    cache.put("c", chunk)
+
+    assert list(cache._memory) == ["a", "c"]
+    assert sorted(os.listdir(tmp_path)) == ["a.pcm", "c.pcm"]
@@ -0,0 +1,71 @@
+import threading
+
+import numpy as np
+
+from agent.speech.tts_service import (PRIORITY_ALERT, PRIORITY_RESPONSE, TTSService, TTSServiceConfig,
+                                      split_sentences)
+
+
+class FakeSynthesizer:
+    """Records the synthesized sentences, blocks while `gate` is clear."""
+
+    def __init__(self, config):
+        self.spoken = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def synthesize(self, text):
+        self.gate.wait()
+        self.spoken.append(text)
+        return np.full(len(text), 1, dtype=np.int16)
+
+    def close(self):
+        pass
+
+
+def test_split_sentences():
+    assert split_sentences(" Hi there. How are you? Fine!") == ["Hi there.", "How are you?", "Fine!"]
+
+
+def test_job_yields_sentences_in_order_after_warm_up():
+    synthesizers = []
+    service = TTSService(TTSServiceConfig(model_path="voice.onnx", warm_up_text="Warm."),
+                         synthesizer_factory=lambda config: synthesizers.append(FakeSynthesizer(config)) or synthesizers[-1])
+
+    audio = list(service.submit("One. Two two."))
+
+    assert [len(samples) for samples in audio] == [4, 8]
+    assert synthesizers[0].spoken == ["Warm.", "One.", "Two two."]
+    metrics = service.metrics()
+    assert metrics["sentences"] == 2
+    assert metrics["first_audio_p50"] > 0
+    service.stop()
+
+
+def test_alert_preempts_the_rest_of_a_response():
+    synthesizer = FakeSynthesizer(None)
+    service = TTSService(TTSServiceConfig(model_path="voice.onnx"), synthesizer_factory=lambda config: synthesizer)
+    service.start()
+
+    synthesizer.gate.clear()
+    response = service.submit("First. Second. Third.", PRIORITY_RESPONSE)
+    while service.metrics()["queued"] > 2:  # The worker took the first sentence
+        pass
+    alert = service.submit("You have an event now.", PRIORITY_ALERT)
+    synthesizer.gate.set()
+
+    list(response), list(alert)
+    assert synthesizer.spoken[1:] == ["First.", "You have an event now.", "Second.", "Third."]
+    service.stop()
+
+
+def test_cancelled_job_stops_yielding():
+    synthesizer = FakeSynthesizer(None)
+    service = TTSService(TTSServiceConfig(model_path="voice.onnx"), synthesizer_factory=lambda config: synthesizer)
+    service.start()
+    synthesizer.gate.clear()
+    job = service.submit("First. Second.")
+    job.cancel()
+    synthesizer.gate.set()
+    assert list(job) == []
+    service.stop()
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from agent.turns import TURN_ALERT, TURN_BACKGROUND, TURN_USER, TurnExecutor
+
+
+def test_turns_run_one_at_a_time_by_kind():
+    executor = TurnExecutor()
+    release = threading.Event()
+    order = []
+    blocker = executor.submit(TURN_BACKGROUND, lambda turn: release.wait(2.0))
+    time.sleep(0.05)
+
+    turns = [executor.submit(kind, lambda turn, name=name: order.append(name))
+             for kind, name in [(TURN_BACKGROUND, "background"), (TURN_ALERT, "alert"), (TURN_USER, "user")]]
+    assert blocker.preempted.is_set()
+    release.set()
+    for turn in turns:
+        turn.result(2.0)
+    assert order == ["user", "alert", "background"]
+    executor.stop()
+
+
+def test_alerts_with_the_same_key_are_coalesced():
+    executor = TurnExecutor()
+    release = threading.Event()
+    executor.submit(TURN_USER, lambda turn: release.wait(2.0))
+    calls = []
+
+    first = executor.submit(TURN_ALERT, lambda turn: calls.append(1), key="event")
+    second = executor.submit(TURN_ALERT, lambda turn: calls.append(2), key="event")
+    release.set()
+    first.result(2.0)
+    assert second is first
+    assert calls == [1]
+    executor.stop()
+
+
+def test_alert_during_a_conversation_is_folded_into_the_next_user_turn():
+    executor = TurnExecutor(max_alert_delay=5.0)
+    alerts = []
+    with executor.conversation():
+        alert = executor.submit(TURN_ALERT, lambda turn: alerts.append("spoken"), note="Dentist at 5")
+        time.sleep(0.05)
+        notes = executor.submit(TURN_USER, lambda turn: list(turn.notes)).result(2.0)
+
+    assert notes == ["Dentist at 5"]
+    assert alert.result(1.0) is None
+    assert alerts == []
+    executor.stop()
+
+
+def test_held_alert_runs_after_the_delay():
+    executor = TurnExecutor(max_alert_delay=0.2)
+    with executor.conversation():
+        started = time.monotonic()
+        alert = executor.submit(TURN_ALERT, lambda turn: time.monotonic(), note="Dentist at 5")
+        spoken_at = alert.result(2.0)
+
+    assert 0.2 <= spoken_at - started < 1.0
+    assert executor.metrics()["alert_wait_max"] >= 0.2
+    executor.stop()
+
+
+def test_alert_is_delivered_when_the_conversation_ends():
+    executor = TurnExecutor(max_alert_delay=10.0)
+    with executor.conversation():
+        alert = executor.submit(TURN_ALERT, lambda turn: "spoken", note="Dentist at 5")
+        time.sleep(0.05)
+        assert not alert.future.done()
+
+    assert alert.result(2.0) == "spoken"
+    executor.stop()
@@ -0,0 +1,50 @@
+import numpy as np
+
+from agent.speech.vad import EnergyVAD, VADGate
+
+RATE = 16000
+CHUNK = 1600
+
+
+def _noise(seconds, level, rng):
+    return (rng.normal(0, level, int(seconds * RATE))).astype(np.int16)
+
+
+def _voice(seconds, level):
+    t = np.arange(int(seconds * RATE)) / RATE
+    # A voiced sound: low fundamental with harmonics
+    wave = np.sin(2 * np.pi * 150 * t) + 0.5 * np.sin(2 * np.pi * 300 * t)
+    return (level * wave).astype(np.int16)
+
+
+def test_vad_separates_voice_from_room_noise():
+    rng = np.random.default_rng(0)
+    vad = EnergyVAD(RATE)
+    assert not vad.is_speech(_noise(0.1, 50, rng))
+    assert vad.is_speech(_voice(0.1, 4000))
+
+
+def test_noise_floor_adapts_to_a_noisy_room():
+    rng = np.random.default_rng(1)
+    vad = EnergyVAD(RATE)
+    for _ in range(100):
+        vad.is_speech(_noise(0.1, 400, rng) + _voice(0.1, 200))
+    assert vad.noise_floor > 300
+    assert not vad.is_speech(_noise(0.1, 400, rng) + _voice(0.1, 200))
+    assert vad.is_speech(_voice(0.1, 8000))
+
+
+def test_gate_passes_speech_with_preroll_and_hangover():
+    rng = np.random.default_rng(2)
+    audio = np.concatenate([_noise(2.0, 50, rng), _voice(0.5, 4000), _noise(2.0, 50, rng)])
+    gate = VADGate(EnergyVAD(RATE), CHUNK)
+
+    passed, closed = [], 0
+    for start in range(0, len(audio) - CHUNK + 1, CHUNK):
+        passed.extend(gate.process(audio[start:start + CHUNK]))
+        closed += gate.closed_now
+
+    speech_chunks = 5
+    assert closed == 1
+    assert len(passed) == gate.preroll_chunks + speech_chunks + gate.hangover_chunks + 1
+    assert gate.pass_ratio < 0.5
@@ -0,0 +1,21 @@
+from agent.speech.models import VoskModelRegistry
+
+
+def test_model_is_loaded_once(fake_vosk, tmp_path):
+    registry = VoskModelRegistry()
+    wake = registry.pool(str(tmp_path), 16000, grammar=["hey buddy", "[unk]"])
+    dictation = registry.pool(str(tmp_path), 16000)
+
+    assert len(fake_vosk) == 1
+    assert wake is not dictation
+    assert wake.model is dictation.model
+    assert registry.pool(str(tmp_path), 16000) is dictation
+
+
+def test_recognizers_are_reset_and_reused(fake_vosk, tmp_path):
+    pool = VoskModelRegistry().pool(str(tmp_path), 16000, grammar=["hey buddy"])
+    with pool.recognizer() as first:
+        assert first.grammar == '["hey buddy"]'
+    with pool.recognizer() as second:
+        assert second is first
+    assert first.resets == 2
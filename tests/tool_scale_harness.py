@@ -0,0 +1,172 @@
+"""Scale harness of the tool-layer benchmarks.
+
+Generates synthetic `events.json` and `lists.json` stores of increasing size
+in the current directory (the paths of TOOLS_CONFIG are relative), then
+measures every tool of AVAILABLE_TOOLS and the event poller
+(`check_and_alert_events`) against them: the wall time of a call (best of a
+few, without tracemalloc) and its peak allocated memory (tracemalloc,
+in a separate call). The log-log slope of time against size tells the
+complexity: ~1 for a tool that reads and rewrites the whole store.
+
+Environment:
+    BUDDIES_TOOL_SCALE_FULL: Set to measure up to 100k events and items
+        (default: up to 10k).
+    BUDDIES_TOOL_SCALE_TIMINGS: Set to check the complexity measured from the
+        timings (wall-clock times vary too much between machines to check by
+        default).
+    BUDDIES_BENCH_OUTPUT: Directory the results are written to, as tool_scale.json.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from agent.config import EVENTS_FILE_PATH, LISTS_FILE_PATH
+from agent.tools import AVAILABLE_TOOLS, TOOLS_CONFIG, build_registry
+
+SIZES = [100, 1000, 10000]
+FULL_SIZES = SIZES + [100000]
+ITEMS_PER_LIST = 20
+REPEATS = 3
+
+# The first event, the events are one hour apart
+START = datetime(2030, 1, 1)
+
+
+def sizes() -> List[int]:
+    return FULL_SIZES if os.environ.get("BUDDIES_TOOL_SCALE_FULL") else SIZES
+
+
+def compare_timings() -> bool:
+    return bool(os.environ.get("BUDDIES_TOOL_SCALE_TIMINGS"))
+
+
+def write_events(count: int) -> None:
+    """A store of `count` future events with notifications."""
+    events = [{"time": (START + timedelta(hours=index)).isoformat(), "notification": index % 2 == 0,
+               "importance": 1 + index % 5, "description": f"Event {index}", "has_passed": False}
+              for index in range(count)]
+    with open(EVENTS_FILE_PATH, "w") as file:
+        json.dump(events, file, indent=2)
+
+
+def write_lists(item_count: int) -> None:
+    """A store of `item_count` items, ITEMS_PER_LIST per list."""
+    lists = {f"list {index}": [f"item {index}-{position}" for position in range(ITEMS_PER_LIST)]
+             for index in range(max(1, item_count // ITEMS_PER_LIST))}
+    with open(LISTS_FILE_PATH, "w") as file:
+        json.dump(lists, file, indent=2)
+
+
+class _NoAlerts:
+    """AgentFlow stand-in for the event poller."""
+
+    def __init__(self) -> None:
+        self.alerts = 0
+
+    def alert(self, message: str, key: Optional[str] = None) -> None:
+        self.alerts += 1
+
+
+def operations() -> Dict[str, Callable[[int, int], Callable[[], Any]]]:
+    """
+    For every tool and the event poller: given the store size and the
+    repetition, the call to measure. Mutating calls touch a different
+    record on every repetition.
+    """
+    from buddy.events_handler import check_and_alert_events
+
+    tools = build_registry(discover=False).create_tools(TOOLS_CONFIG)
+
+    def tool(name: str, arguments: Callable[[int, int], Dict[str, Any]]) -> Callable[[int, int], Callable[[], Any]]:
+        def bind(size: int, repeat: int) -> Callable[[], Any]:
+            parsed = tools[name].validator(arguments(size, repeat))
+            return lambda: tools[name].execute(parsed)
+        return bind
+
+    middle = lambda size: max(1, size // ITEMS_PER_LIST) // 2
+    day = lambda size: (START + timedelta(hours=size // 2)).date()
+    return {
+        "add_to_list": tool("add_to_list", lambda size, repeat: {"item": "milk", "list_name": f"new {repeat}"}),
+        "remove_from_list": tool("remove_from_list", lambda size, repeat: {
+            "list_name": f"list {middle(size)}", "item": f"item {middle(size)}-{repeat}"}),
+        "add_event": tool("add_event", lambda size, repeat: {
+            "time": "01/06/2031 17:00", "notification": True, "importance": 3, "description": f"New {repeat}"}),
+        "remove_event": tool("remove_event", lambda size, repeat: {"description": f"Event {size // 2 + repeat}"}),
+        "get_events": tool("get_events", lambda size, repeat: {
+            "start_date": day(size).isoformat(), "end_date": (day(size) + timedelta(days=1)).isoformat()}),
+        "get_lists_headers": tool("get_lists_headers", lambda size, repeat: {}),
+        "get_list_by_name": tool("get_list_by_name", lambda size, repeat: {"list_name": f"list {middle(size)}"}),
+        "check_and_alert_events": lambda size, repeat: lambda: check_and_alert_events(_NoAlerts()),
+    }
+
+
+@dataclass
+class ScaleCurve:
+    """Measurements of one operation over the store sizes."""
+    name: str
+    sizes: List[int] = field(default_factory=list)
+    seconds: List[float] = field(default_factory=list)
+    peak_bytes: List[int] = field(default_factory=list)
+
+    def slope(self) -> float:
+        """Log-log slope of the time against the size (the exponent k of O(n^k))."""
+        if len(self.sizes) < 2:
+            return float("nan")
+        return float(np.polyfit(np.log(self.sizes), np.log(np.maximum(self.seconds, 1e-9)), 1)[0])
+
+
+def measure(call: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def peak_memory(call: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(store_sizes: List[int], repeats: int = REPEATS) -> Dict[str, ScaleCurve]:
+    """Measure every operation on stores of every size (in the current directory)."""
+    calls = operations()
+    names = [manifest.name for manifest in AVAILABLE_TOOLS] + ["check_and_alert_events"]
+    assert set(names) == set(calls), "Every tool of AVAILABLE_TOOLS needs a benchmark operation"
+    curves = {name: ScaleCurve(name) for name in names}
+    for size in store_sizes:
+        write_events(size)
+        write_lists(size)
+        for name, bind in calls.items():
+            best = min(measure(bind(size, repeat)) for repeat in range(repeats))
+            curve = curves[name]
+            curve.sizes.append(size)
+            curve.seconds.append(best)
+            curve.peak_bytes.append(peak_memory(bind(size, repeats)))
+    return curves
+
+
+def report(curves: Dict[str, ScaleCurve]) -> str:
+    """Format the curves as a table, and write them to BUDDIES_BENCH_OUTPUT if set."""
+    output = os.environ.get("BUDDIES_BENCH_OUTPUT")
+    if output:
+        os.makedirs(output, exist_ok=True)
+        with open(os.path.join(output, "tool_scale.json"), "w") as file:
+            json.dump([dict(asdict(curve), slope=curve.slope()) for curve in curves.values()], file, indent=2)
+
+    store_sizes = next(iter(curves.values())).sizes if curves else []
+    lines = ["operation".ljust(24) + "".join(f"{size:>21}" for size in store_sizes) + "slope".rjust(8)]
+    for curve in curves.values():
+        cells = "".join(f"{seconds * 1000:9.2f}ms {peak / 1024:6.0f}KiB"
+                        for seconds, peak in zip(curve.seconds, curve.peak_bytes))
+        lines.append(curve.name.ljust(24) + cells + f"{curve.slope():8.2f}")
+    return "\n".join(lines)